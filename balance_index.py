@@ -0,0 +1,130 @@
+import os
+from array import array
+from pathlib import Path
+import date_codec
+import ledger_columns
+import ledger_pipeline
+
+# 홈 경로 설정
+HOME_DIR = Path.cwd()
+# 가계부 파일 접미사
+LEDGER_FILE_SUFFIX = "_HL.txt"
+
+# 트리가 다루는 날짜 범위 (가계부에서 허용하는 1900-01-01 ~ 2099-12-31)
+_FIRST_DAY = date_codec.parse_date(f"{date_codec.MIN_YEAR}-01-01")
+_LAST_DAY = date_codec.parse_date(f"{date_codec.MAX_YEAR}-12-31")
+_TREE_SIZE = _LAST_DAY - _FIRST_DAY + 1
+
+# 사용자별 일 단위 누적합 트리 (Fenwick tree). 로그인 세션 동안 메모리에 유지
+# 키: user_id, 값: {'fingerprint': (크기, 수정시각), 'income': array, 'expense': array}
+_trees = {}
+
+
+def _ledger_path(user_id):
+    return HOME_DIR / f"{user_id}{LEDGER_FILE_SUFFIX}"
+
+
+def _fingerprint(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _build(user_id):
+    """가계부 파일을 한 번 읽어 수입/지출 트리 생성 (O(n + 일 수))"""
+    ledger_file_path = _ledger_path(user_id)
+    fingerprint = _fingerprint(ledger_file_path)
+    income = array('q', bytes(8 * (_TREE_SIZE + 1)))
+    expense = array('q', bytes(8 * (_TREE_SIZE + 1)))
+    # 날짜/유형/금액 열만 블록 단위로 읽어 날짜별로 더함
+    ledger_pipeline.sum_by_day(ledger_pipeline.read_columns(user_id), income, expense, _FIRST_DAY - 1)
+    for tree in (income, expense):
+        _to_fenwick(tree)
+    _trees[user_id] = {'fingerprint': fingerprint, 'income': income, 'expense': expense}
+    return _trees[user_id]
+
+
+def _to_fenwick(tree):
+    """날짜별 합계 배열(1부터 사용)을 제자리에서 Fenwick tree로 변환"""
+    np = ledger_columns.np
+    if np is not None:
+        # tree[i] = (1..i 누적합) - (1..i - lowbit(i) 누적합)
+        values = np.frombuffer(tree, dtype=np.int64)
+        prefix = np.cumsum(values)
+        pos = np.arange(len(values))
+        values[1:] = prefix[1:] - prefix[pos[1:] - (pos[1:] & -pos[1:])]
+        return
+    for i in range(1, _TREE_SIZE + 1):
+        j = i + (i & -i)
+        if j <= _TREE_SIZE:
+            tree[j] += tree[i]
+
+
+def _get_tree(user_id):
+    """사용자의 트리 반환. 세션 밖에서 가계부가 바뀌었으면 다시 생성"""
+    tree = _trees.get(user_id)
+    if tree is None or tree['fingerprint'] != _fingerprint(_ledger_path(user_id)):
+        tree = _build(user_id)
+    return tree
+
+
+def _prefix_sum(tree, pos):
+    total = 0
+    while pos > 0:
+        total += tree[pos]
+        pos -= pos & -pos
+    return total
+
+
+def _add(tree, pos, delta):
+    while pos <= _TREE_SIZE:
+        tree[pos] += delta
+        pos += pos & -pos
+
+
+def range_totals(user_id, ord_1, ord_2):
+    """
+    [ord_1, ord_2] 기간(날짜 ordinal, 양 끝 포함)의 (총 지출, 총 수입) 반환. O(log n)
+    """
+    tree = _get_tree(user_id)
+    lo = max(ord_1, _FIRST_DAY) - _FIRST_DAY
+    hi = min(ord_2, _LAST_DAY) - _FIRST_DAY + 1
+    if lo >= hi:
+        return 0, 0
+    expense = _prefix_sum(tree['expense'], hi) - _prefix_sum(tree['expense'], lo)
+    income = _prefix_sum(tree['income'], hi) - _prefix_sum(tree['income'], lo)
+    return expense, income
+
+
+def apply_change(user_id, removed=None, added=None):
+    """
+    가계부에 쓴 변경을 메모리의 트리에 반영 (트리가 아직 없으면 아무것도 하지 않음).
+    removed, added: 지운/추가한 내역의 (날짜, 유형, 금액)
+    """
+    _apply(user_id, ((removed, -1), (added, 1)))
+
+
+def apply_entries(user_id, added):
+    """한꺼번에 추가한 내역들((날짜, 유형, 금액) 목록)을 트리에 반영"""
+    _apply(user_id, ((entry, 1) for entry in added))
+
+
+def _apply(user_id, changes):
+    tree = _trees.get(user_id)
+    if tree is None:
+        return
+    for entry, sign in changes:
+        if entry is None:
+            continue
+        date_str, type_str, amount = entry
+        date_ord = date_codec.parse_date(date_str)
+        if date_ord is None:
+            continue
+        key = 'income' if type_str == 'I' else 'expense'
+        _add(tree[key], date_ord - _FIRST_DAY + 1, sign * int(amount))
+    # 방금 쓴 가계부 상태를 트리가 반영하고 있음을 기록
+    tree['fingerprint'] = _fingerprint(_ledger_path(user_id))
+
+
+def invalidate(user_id):
+    """사용자의 트리 제거 (다음 조회 때 다시 생성)"""
+    _trees.pop(user_id, None)
@@ -0,0 +1,114 @@
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+import balance_index
+import date_codec
+import ledger_columns
+import ledger_pipeline
+import ledger_summary
+
+# 사용법: python bench_ledger.py [행 수]  (기본 1,000,000행)
+# 임의의 가계부를 열 단위로 만든 뒤 집계(total_asset, range_totals, month_totals),
+# 조회/검색(search_row_ids, sorted_row_ids)과 가계부 전체를 읽는 경로
+# (총계/월별 집계 재생성 ledger_summary.scan_ledger, 잔고 트리 생성 balance_index._build)의
+# 순수 파이썬과 NumPy 처리 시간을 비교한다.
+
+BENCH_USER = 'bench'
+
+CATEGORIES = ['식비', '교통', '주거', '여가', '기타', '입금']
+PAYMENTS = ['카드', '현금', '계좌이체']
+
+
+def make_columns(rows, seed=0):
+    """rows 행짜리 임의의 열 단위 가계부 생성 (2000-01-01 ~ 2024-12-31)"""
+    rng = random.Random(seed)
+    first = date_codec.parse_date("2000-01-01")
+    last = date_codec.parse_date("2024-12-31")
+    columns = ledger_columns.new_columns()
+    for i in range(rows):
+        type_str = 'I' if rng.random() < 0.2 else 'E'
+        ledger_columns.append_row(
+            columns, i + 1,
+            date_codec.to_date(rng.randint(first, last)).isoformat(), type_str,
+            rng.randint(1, 1000000),
+            '입금' if type_str == 'I' else rng.choice(CATEGORIES[:-1]),
+            rng.choice(PAYMENTS))
+    return columns
+
+
+def write_ledger(columns, home):
+    """열 단위 가계부를 home 폴더의 가계부 파일로 저장"""
+    with open(home / f"{BENCH_USER}{ledger_pipeline.LEDGER_FILE_SUFFIX}", 'w', encoding='utf-8') as f:
+        for row_id in range(ledger_columns.row_count(columns)):
+            row = ledger_columns.get_row(columns, row_id)
+            f.write(f"{row['날짜']}\t{row['유형']}\t{row['금액']}\t{row['카테고리']}\t{row['결제수단']}\n")
+
+
+def build_tree():
+    tree = balance_index._build(BENCH_USER)
+    return tree['income'], tree['expense']
+
+
+def run_all(columns):
+    """집계/조회/검색/전체 읽기를 한 번씩 실행하고 (결과, 항목별 시간) 반환"""
+    first, last = date_codec.parse_month_range("2012-01")
+    end = date_codec.parse_date("2018-06-30")
+    jobs = [
+        ('총 자산', lambda: ledger_columns.total_asset(columns)),
+        ('기간 합계', lambda: ledger_columns.range_totals(columns, first, end)),
+        ('월별 집계', lambda: ledger_columns.month_totals(columns)),
+        ('월 필터', lambda: ledger_columns.filter_row_ids(columns, range(ledger_columns.row_count(columns)),
+                                                         first, last)),
+        ('집계 재생성', lambda: ledger_summary.scan_ledger(BENCH_USER)),
+        ('잔고 트리', build_tree),
+        ('최신순 조회', lambda: ledger_columns.sorted_row_ids(columns)),
+        ('월 검색', lambda: ledger_columns.search_row_ids(columns, first, last)),
+        ('카테고리 검색', lambda: ledger_columns.search_row_ids(columns, category='식비')),
+        ('복합 검색', lambda: ledger_columns.search_row_ids(columns, first, end, '식비', '카드')),
+        ('금액 검색', lambda: ledger_columns.search_row_ids(columns, type='E', amount_min=990000)),
+    ]
+    results, times = [], []
+    for name, job in jobs:
+        start = time.perf_counter()
+        results.append(job())
+        times.append((name, time.perf_counter() - start))
+    return results, times
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    print(f"{rows:,}행 생성 중...")
+    columns = make_columns(rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        # 전체 읽기 경로는 임시 폴더에 쓴 가계부 파일을 읽음
+        home = Path(tmp)
+        write_ledger(columns, home)
+        balance_index.HOME_DIR = ledger_pipeline.HOME_DIR = home
+        compare(columns)
+
+
+def compare(columns):
+    numpy_module = ledger_columns.np
+    ledger_columns.np = None
+    py_results, py_times = run_all(columns)
+    if numpy_module is None:
+        print("NumPy가 설치되어 있지 않아 순수 파이썬 결과만 출력합니다.")
+        for name, sec in py_times:
+            print(f"{name:<10} {sec:8.3f}s")
+        return
+    ledger_columns.np = numpy_module
+    np_results, np_times = run_all(columns)
+
+    print(f"{'항목':<10} {'파이썬':>9} {'NumPy':>9} {'배속':>7}")
+    for (name, py_sec), (_, np_sec) in zip(py_times, np_times):
+        print(f"{name:<10} {py_sec:8.3f}s {np_sec:8.3f}s {py_sec / np_sec:6.1f}x")
+    if py_results != np_results:
+        print("!오류: 파이썬과 NumPy 결과가 다릅니다.")
+        sys.exit(1)
+    print("결과 일치")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,7 @@
 import os
 from pathlib import Path
 
-import re
-from query_edit import load_user_ledger, save_ledger_data
+import file_rewrite
 
 HOME_DIR = Path.cwd()
 SETTING_FILE_SUFFIX = "_setting.txt"
@@ -10,6 +9,17 @@ SETTING_FILE_SUFFIX = "_setting.txt"
 # 로그인 시 로드될 전역 카테고리 맵
 # 키: 표준명 (str), 값: {'separator': str, 'synonyms': list of str}
 USER_CATEGORY_MAP = {} 
+# 로그인 시 로드될 삭제된 카테고리 구분자 목록
+USER_DELETED_SEPARATORS = []
+
+# 가계부의 카테고리 칸에는 구분자(C1, C2, ...)를 저장하고 읽을 때 설정 파일의 표준명으로 바꾼다
+# (ledger_storage). 그래서 카테고리 수정/삭제는 설정 파일만 고친다.
+# 삭제한 카테고리의 구분자는 설정 파일 카테고리 섹션에 '#구분자' 줄로 남겨 다시 쓰지 않고,
+# 그 구분자로 저장된 내역은 '미분류'로 보인다.
+DELETED_CATEGORY_MARK = '#'
+UNCATEGORIZED = '미분류'
+# 입금 카테고리 구분자 (삭제할 수 없고 지출 카테고리로 고를 수 없음)
+INCOME_SEPARATOR = 'C1'
 
 # 회원가입 시 사용할 기본 카테고리 맵
 DEFAULT_CATEGORIES = {
@@ -27,6 +37,126 @@ PAYMENT_MAP = {
     '계좌이체': {'synonyms': ['transfer', 'bank', 'account', '송금', '계']},
 }
 
+# 표준명/동의어 검색용 별칭 표: casefold한 표준명 또는 동의어 → 표준명
+# 사용자 카테고리 표는 설정 파일의 카테고리 섹션이 바뀔 때만 다시 만든다.
+_CATEGORY_ALIASES = {}
+# _CATEGORY_ALIASES를 만든 카테고리 맵과 그 맵을 읽은 카테고리 섹션 (줄 튜플, 모르면 None)
+_ALIASES_MAP = None
+_ALIASES_SECTION = None
+
+
+def compile_aliases(item_map):
+    """
+    {표준명: {'synonyms': [...]}} 맵을 casefold한 별칭 → 표준명 dict로 변환.
+    별칭이 겹치면 앞에 정의된 표준명이 우선
+    """
+    table = {}
+    for standard_name, data in item_map.items():
+        for alias in [standard_name, *data['synonyms']]:
+            table.setdefault(alias.casefold(), standard_name)
+    return table
+
+
+_DEFAULT_CATEGORY_ALIASES = compile_aliases(DEFAULT_CATEGORIES)
+_PAYMENT_ALIASES = compile_aliases(PAYMENT_MAP)
+
+
+def _compile_categories(category_map, section=None):
+    """카테고리 맵의 별칭 표를 다시 만듦. section: 맵을 읽은(또는 저장한) 카테고리 섹션"""
+    global _CATEGORY_ALIASES, _ALIASES_MAP, _ALIASES_SECTION
+    _CATEGORY_ALIASES = compile_aliases(category_map)
+    _ALIASES_MAP = category_map
+    _ALIASES_SECTION = section
+
+
+def resolve_category(name):
+    """
+    카테고리 표준명 또는 동의어(대소문자 무시) → 표준명. 없으면 None.
+    로드된 사용자 카테고리가 없으면 기본 카테고리에서 찾음
+    """
+    if not USER_CATEGORY_MAP:
+        return _DEFAULT_CATEGORY_ALIASES.get(name.casefold())
+    if _ALIASES_MAP is not USER_CATEGORY_MAP:
+        _compile_categories(USER_CATEGORY_MAP)
+    return _CATEGORY_ALIASES.get(name.casefold())
+
+
+def resolve_payment(name):
+    """결제수단 표준명 또는 동의어(대소문자 무시) → 표준명. 없으면 None"""
+    return _PAYMENT_ALIASES.get(name.casefold())
+
+
+# 사용자별 (설정 파일 (크기, 수정시각), 구분자 → 표준명, 표준명 → 구분자)
+_category_ids = {}
+
+
+def category_ids(user_id):
+    """
+    사용자 가계부의 (구분자 → 표준명, 표준명 → 구분자) dict. 삭제된 구분자는 UNCATEGORIZED.
+    설정 파일이 없거나 카테고리가 없으면 기본 카테고리. 설정 파일이 바뀔 때만 다시 읽음
+    """
+    settings_file_path = HOME_DIR / f"{user_id}{SETTING_FILE_SUFFIX}"
+    try:
+        st = os.stat(settings_file_path)
+        fingerprint = (st.st_size, st.st_mtime_ns)
+    except OSError:
+        fingerprint = None
+    cached = _category_ids.get(user_id)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1], cached[2]
+
+    parsed = None
+    if fingerprint is not None:
+        try:
+            parsed = _parse_section(_read_section(settings_file_path))
+        except (OSError, UnicodeDecodeError):
+            parsed = None
+    if parsed is None or not parsed[0]:
+        parsed = (DEFAULT_CATEGORIES, [])
+    category_map, deleted = parsed
+    names = {data['separator']: standard_name for standard_name, data in category_map.items()}
+    names.update(dict.fromkeys(deleted, UNCATEGORIZED))
+    ids = {standard_name: data['separator'] for standard_name, data in category_map.items()}
+    _category_ids[user_id] = (fingerprint, names, ids)
+    return names, ids
+
+
+def _read_section(settings_file_path):
+    """설정 파일의 카테고리 섹션(첫 빈 줄 전까지) 줄 튜플"""
+    section = []
+    with open(settings_file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                break # 빈 줄(카테고리 섹션 끝) 발견
+            section.append(line)
+    return tuple(section)
+
+
+def _parse_section(section):
+    """카테고리 섹션 줄들 → (카테고리 맵, 삭제된 구분자 목록). 형식이 틀리면 None"""
+    category_map = {}
+    deleted = []
+    for line in section:
+        if line.startswith(DELETED_CATEGORY_MARK):
+            deleted.append(line[len(DELETED_CATEGORY_MARK):].strip())
+            continue
+
+        parts = line.split('\t')
+        
+        if len(parts) < 2:
+            return None
+        
+        separator = parts[0].strip()
+        standard_name = parts[1].strip()
+        synonyms = [p.strip() for p in parts[2:] if p.strip()]
+
+        category_map[standard_name] = {
+            'separator': separator,
+            'synonyms': synonyms
+        }
+    return category_map, deleted
+
 # 카테고리 맵 관리 및 파일 I/O 함수
 
 def create_default_settings(user_id):
@@ -61,42 +191,34 @@ def create_default_settings(user_id):
 def load_user_categories(user_id):
     """
     로그인 시 호출되어 <ID>_setting.txt 파일에서 카테고리 정보 로드.
+    카테고리 섹션이 마지막으로 읽은 것과 같으면 맵과 별칭 표를 그대로 사용.
+    읽지 못하면 빈 맵이 됨 (별칭 검색은 기본 카테고리 사용)
     """
-    global USER_CATEGORY_MAP
+    global USER_CATEGORY_MAP, USER_DELETED_SEPARATORS
     settings_file_path = HOME_DIR / f"{user_id}{SETTING_FILE_SUFFIX}"
     
     if not settings_file_path.exists():
+        USER_CATEGORY_MAP, USER_DELETED_SEPARATORS = {}, []
         return False 
 
-    USER_CATEGORY_MAP = {}
-    
     try:
-        with open(settings_file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    break # 빈 줄(카테고리 섹션 끝) 발견
-                
-                parts = line.split('\t')
-                
-                if len(parts) < 2:
-                    return False 
-                
-                separator = parts[0].strip()
-                standard_name = parts[1].strip()
-                synonyms = [p.strip() for p in parts[2:] if p.strip()]
-
-                USER_CATEGORY_MAP[standard_name] = {
-                    'separator': separator,
-                    'synonyms': synonyms
-                }
-                
-        return True
-        
+        section = _read_section(settings_file_path)
     except Exception as e:
         print(f"오류: 설정 파일 로드 중 문제 발생: {e}")
+        USER_CATEGORY_MAP, USER_DELETED_SEPARATORS = {}, []
         return False
 
+    if section == _ALIASES_SECTION and _ALIASES_MAP is USER_CATEGORY_MAP:
+        return True
+
+    parsed = _parse_section(section)
+    if parsed is None:
+        USER_CATEGORY_MAP, USER_DELETED_SEPARATORS = {}, []
+        return False
+    USER_CATEGORY_MAP, USER_DELETED_SEPARATORS = parsed
+    _compile_categories(USER_CATEGORY_MAP, section)
+    return True
+
 
 def get_category_map():
     """
@@ -113,10 +235,13 @@ def get_payment_map():
     return PAYMENT_MAP
 
 
-def save_user_settings(user_id, map_data):
+def save_user_settings(user_id, map_data, deleted_separators=None):
     """
     변경된 카테고리 맵을 파일에 저장. (예산 데이터와 함께 저장해야 함)
+    deleted_separators를 주지 않으면 로그인한 사용자의 삭제된 구분자(USER_DELETED_SEPARATORS)를 씀
     """
+    if deleted_separators is None:
+        deleted_separators = USER_DELETED_SEPARATORS
     settings_file_path = HOME_DIR / f"{user_id}{SETTING_FILE_SUFFIX}"
 
     budget_lines = []
@@ -148,6 +273,9 @@ def save_user_settings(user_id, map_data):
         if synonyms_str:
             line += f"\t{synonyms_str}"
         category_lines.append(line)
+    # 삭제된 카테고리 구분자 (형식: #<Category구분자>)
+    for separator in deleted_separators:
+        category_lines.append(f"{DELETED_CATEGORY_MARK}{separator}")
 
     # 2. 카테고리 섹션과 예산 섹션을 빈 줄로 구분
     content = '\n'.join(category_lines) + '\n\n'
@@ -155,12 +283,58 @@ def save_user_settings(user_id, map_data):
     content += '\n'.join([line for line in budget_lines if line.strip()])
 
     try:
-        with open(settings_file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        # 임시 파일에 쓴 뒤 교체 (저장 중 끊겨도 설정 파일이 깨지지 않음)
+        file_rewrite.rewrite_file(settings_file_path, content.splitlines(keepends=True))
+        _category_ids.pop(user_id, None)
+        _compile_categories(map_data, tuple(line.strip() for line in category_lines))
         return True
     except Exception as e:
         print(f"오류: 설정 파일 저장 중 문제 발생: {e}")
         return False
+
+
+def legacy_category_ids(user_id, names):
+    """
+    이전 가계부에 저장된 카테고리 이름들 → 구분자 dict (이전 가계부를 구분자로 바꿀 때 사용).
+    표준명/동의어는 그 카테고리의 구분자. 설정 파일에 없는 이름은 새 구분자를 붙여 카테고리로 추가하고,
+    표준명으로 쓸 수 없는 이름(빈 값, '미분류', 한글/영문/숫자 이외의 문자)은 삭제된 구분자 하나로 모아
+    '미분류'로 읽히게 한다. 설정 파일을 저장하지 못하면 OSError
+    """
+    settings_file_path = HOME_DIR / f"{user_id}{SETTING_FILE_SUFFIX}"
+    parsed = None
+    if settings_file_path.exists():
+        parsed = _parse_section(_read_section(settings_file_path))
+    if parsed is None or not parsed[0]:
+        # 카테고리가 없는 설정 파일은 기본 카테고리로 읽으므로(category_ids) 기본 카테고리에 추가
+        parsed = ({name: dict(data) for name, data in DEFAULT_CATEGORIES.items()}, [])
+    category_map, deleted = parsed
+    aliases = compile_aliases(category_map)
+    separators = [data['separator'] for data in category_map.values()] + deleted
+    next_num = max(int(separator[1:]) for separator in separators) + 1
+    result = {}
+    unnamed = None
+    changed = False
+    for name in names:
+        standard_name = aliases.get(name.casefold())
+        if standard_name is not None:
+            result[name] = category_map[standard_name]['separator']
+        elif not name or name == UNCATEGORIZED or \
+                any(not (('가' <= char <= '힣') or char.isalnum()) for char in name):
+            if unnamed is None:
+                unnamed = f"C{next_num}"
+                next_num += 1
+                deleted.append(unnamed)
+                changed = True
+            result[name] = unnamed
+        else:
+            category_map[name] = {'separator': f"C{next_num}", 'synonyms': []}
+            aliases[name.casefold()] = name
+            result[name] = f"C{next_num}"
+            next_num += 1
+            changed = True
+    if changed and not save_user_settings(user_id, category_map, deleted):
+        raise OSError("설정 파일에 카테고리를 추가하지 못했습니다.")
+    return result
     
 
 
@@ -171,13 +345,11 @@ def save_user_settings(user_id, map_data):
 
 
 def search_category(category_map, searchcat):
-    std_category=None
-    for key, value in category_map.items():
-        if(searchcat == key):
-            std_category=key
-        elif(searchcat in value["synonyms"]):
-            std_category=key
-    return std_category
+    # 표준명 또는 동의어(대소문자 무시)의 표준명, 없으면 None
+    # (아래 편집 함수들은 맵을 고친 뒤 _compile_categories로 별칭 표를 다시 만든다)
+    if category_map is not _ALIASES_MAP:
+        _compile_categories(category_map)
+    return _CATEGORY_ALIASES.get(searchcat.casefold())
 
 
 def add_category(category_map,user_id):
@@ -188,13 +360,16 @@ def add_category(category_map,user_id):
             print("한글, 알파벳 대문자 A~Z, 소문자 a~z, 정수 0~9 이외의 문자는 허용하지 않습니다.")
         elif(search_category(category_map,stdcat)!=None):
             print("이미 존재하는 표준명 또는 동의어입니다.")
+        elif(stdcat==UNCATEGORIZED):
+            print("'"+UNCATEGORIZED+"'은(는) 카테고리 표준명으로 쓸 수 없습니다.")
         else:
             break
-    #카테고리 구분자 할당 (규칙?) -> 전체 카테고리 구분자 중 제일 큰 값보다 1 크게 설정 
-    sep=[details['separator'] for details in category_map.values()]
+    #카테고리 구분자 할당 (규칙?) -> 전체 카테고리 구분자(삭제된 구분자 포함) 중 제일 큰 값보다 1 크게 설정 
+    sep=[details['separator'] for details in category_map.values()]+USER_DELETED_SEPARATORS
     nsep=max(int(separator[1:]) for separator in sep)+1
     #맵에 카테고리 표준명 추가
     category_map[stdcat]={'separator':"C"+str(nsep),'synonyms':[]}
+    _compile_categories(category_map)
     #동의어 입력 및 오류처리
     while 1:
         addlist=input("동의어 입력(공백으로 구분, 동의어를 설정하지 않으려면 enter입력): ")
@@ -220,6 +395,7 @@ def add_category(category_map,user_id):
             break
     #맵에 카테고리 동의어 추가
     category_map[stdcat]["synonyms"]=addlist
+    _compile_categories(category_map)
     #저장여부 확인
     while 1:
         yn=input("이대로 저장하시겠습니까?(Y/N): ")
@@ -233,6 +409,7 @@ def add_category(category_map,user_id):
         elif(yn=='n'):
             #맵에서 카테고리 삭제하여 저장취소
             del category_map[stdcat]
+            _compile_categories(category_map)
             print("\n저장을 취소합니다.")
             break
          
@@ -263,6 +440,8 @@ def update_category(category_map,user_id):
             print("한글, 알파벳 대문자 A~Z, 소문자 a~z, 정수 0~9 이외의 문자는 허용하지 않습니다.")
         elif(search_category(category_map,nstdcat)!=None):
             print("이미 존재하는 표준명 또는 동의어입니다.")
+        elif(nstdcat==UNCATEGORIZED):
+            print("'"+UNCATEGORIZED+"'은(는) 카테고리 표준명으로 쓸 수 없습니다.")
         else:
             break
     #맵에 수정명으로 수정(새로운 항목 추가 및 기존 항목 삭제)
@@ -270,6 +449,7 @@ def update_category(category_map,user_id):
     osynonyms=category_map[ostdcat]["synonyms"]#수정전 카테고리 동의어
     category_map[nstdcat]["synonyms"]=[]#수정후 카테고리 동의어는 일단 빈집합
     del category_map[ostdcat]
+    _compile_categories(category_map)
     #동의어 입력 및 오류처리
     while 1:
         corlist=input("동의어 입력(공백으로 구분, 기존의 동의어를 삭제하려면 '-' 입력): ")
@@ -300,6 +480,7 @@ def update_category(category_map,user_id):
                 break
     #맵에 카테고리 동의어 추가
     category_map[nstdcat]["synonyms"]=corlist
+    _compile_categories(category_map)
     #저장여부 확인
     while 1:
         print("-------------------------")
@@ -316,13 +497,14 @@ def update_category(category_map,user_id):
             category_map[ostdcat]=category_map[nstdcat]
             category_map[ostdcat]["synonyms"]=osynonyms
             del category_map[nstdcat]
+            _compile_categories(category_map)
             print("\n저장을 취소합니다.")
         break
 
 def delete_category(category_map,user_id):
     #입금카테고리 표준명
     for key,value in category_map.items():
-        if value['separator']=='C1':
+        if value['separator']==INCOME_SEPARATOR:
             income=key
     print("   카테고리")
     print("\t",end="")
@@ -348,34 +530,11 @@ def delete_category(category_map,user_id):
         if(yn=='y'):
             print("\n삭제하는 중...")
             print("-------------------------")
-            #print(category_map[stdcat]["separator"])
-            #가계부 파일에서 삭제할 카테고리로 저장된 항목 카테고리 변경
-            data=load_user_ledger(user_id)
-
-            target_separator = category_map[stdcat]["separator"]
-            separator_char = " " 
-
-            for item in data:
-                category_string = item['카테고리']
-                if not category_string:
-                    continue
-                current_separators = re.split(separator_char, category_string)
-                updated_separators = [
-                    sep for sep in current_separators 
-                    if sep and sep != target_separator
-                ]
-                item['카테고리'] = separator_char.join(updated_separators)
-            save_ledger_data(user_id,data)
-
-
-            #for item in data:
-                #print(item['카테고리'])
-            #    if(item['카테고리']==category_map[stdcat]["separator"]):
-            #        item['카테고리']=""
-            #save_ledger_data(user_id,data)
-            
+            #가계부는 고치지 않음: 구분자를 삭제 표시로 남기면 그 구분자로 저장된 내역은 '미분류'로 보임
+            USER_DELETED_SEPARATORS.append(category_map[stdcat]["separator"])
             #맵에서 카테고리 삭제
             del category_map[stdcat]
+            _compile_categories(category_map)
             #사용자 설정파일에서 삭제
             save_user_settings(user_id,category_map)
             print("\n삭제가 완료되었습니다.")
@@ -0,0 +1,112 @@
+import datetime
+from bisect import bisect_right
+from functools import lru_cache
+
+# 가계부에서 허용하는 연도 범위
+MIN_YEAR = 1900
+MAX_YEAR = 2099
+# 파싱 결과를 기억할 날짜 문자열 개수
+DATE_CACHE_SIZE = 65536
+
+
+def _build_calendar():
+    """MIN_YEAR-01 ~ MAX_YEAR-12 각 월의 1일 ordinal과 일 수 목록 생성"""
+    month_start = []
+    days_in_month = []
+    for year in range(MIN_YEAR, MAX_YEAR + 1):
+        for month in range(1, 13):
+            start = datetime.date(year, month, 1)
+            end = datetime.date(year + 1, 1, 1) if month == 12 else datetime.date(year, month + 1, 1)
+            month_start.append(start.toordinal())
+            days_in_month.append(end.toordinal() - start.toordinal())
+    return month_start, days_in_month
+
+# 미리 계산한 달력표. 인덱스: (연도 - MIN_YEAR) * 12 + (월 - 1)
+_MONTH_START, _DAYS_IN_MONTH = _build_calendar()
+
+
+def _month_index(year_str, month_str):
+    """'YYYY', 'MM' 문자열을 달력표 인덱스로 변환. 형식/범위가 틀리면 None"""
+    if len(year_str) != 4 or len(month_str) != 2:
+        return None
+    if not (year_str.isascii() and year_str.isdigit() and month_str.isascii() and month_str.isdigit()):
+        return None
+    year = int(year_str)
+    month = int(month_str)
+    if not (MIN_YEAR <= year <= MAX_YEAR) or not (1 <= month <= 12):
+        return None
+    return (year - MIN_YEAR) * 12 + (month - 1)
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date(date_str):
+    """
+    'YYYY-MM-DD' 문자열을 검사하여 날짜 ordinal(int)로 변환.
+    형식이 틀리거나 존재하지 않는 날짜(예: 2023-02-30)면 None 반환.
+    """
+    if len(date_str) != 10 or date_str[4] != '-' or date_str[7] != '-':
+        return None
+    idx = _month_index(date_str[0:4], date_str[5:7])
+    day_str = date_str[8:10]
+    if idx is None or not (day_str.isascii() and day_str.isdigit()):
+        return None
+    day = int(day_str)
+    if not (1 <= day <= _DAYS_IN_MONTH[idx]):
+        return None
+    return _MONTH_START[idx] + day - 1
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_month(month_str):
+    """
+    'YYYY-MM' 문자열을 검사하여 그 달 1일의 ordinal(int)로 변환.
+    형식이 틀리면 None 반환.
+    """
+    if len(month_str) != 7 or month_str[4] != '-':
+        return None
+    idx = _month_index(month_str[0:4], month_str[5:7])
+    if idx is None:
+        return None
+    return _MONTH_START[idx]
+
+
+def parse_month_range(month_str):
+    """
+    'YYYY-MM' 문자열을 그 달의 (1일 ordinal, 말일 ordinal)로 변환.
+    형식이 틀리면 None 반환.
+    """
+    first = parse_month(month_str)
+    if first is None:
+        return None
+    idx = _month_index(month_str[0:4], month_str[5:7])
+    return first, first + _DAYS_IN_MONTH[idx] - 1
+
+
+def month_starts():
+    """달력표의 각 월 1일 ordinal 목록 (인덱스: (연도 - MIN_YEAR) * 12 + (월 - 1))"""
+    return _MONTH_START
+
+
+def days_in_month():
+    """달력표의 각 월 일 수 목록 (인덱스는 month_starts와 같음)"""
+    return _DAYS_IN_MONTH
+
+
+def month_index_of(ordinal):
+    """날짜 ordinal이 속한 달의 달력표 인덱스"""
+    return bisect_right(_MONTH_START, ordinal) - 1
+
+
+def month_key(idx):
+    """달력표 인덱스를 'YYYY-MM' 문자열로 변환"""
+    return f"{MIN_YEAR + idx // 12}-{idx % 12 + 1:02d}"
+
+
+def today_ordinal():
+    """오늘 날짜의 ordinal"""
+    return datetime.date.today().toordinal()
+
+
+def to_date(ordinal):
+    """ordinal을 datetime.date로 변환"""
+    return datetime.date.fromordinal(ordinal)
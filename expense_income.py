@@ -1,8 +1,10 @@
 import sys
 import os
-import datetime
-import re
 from pathlib import Path
+import date_codec
+import ledger_summary
+import ledger_storage
+import category
 
 # 홈 경로 설정
 HOME_DIR = Path.cwd()
@@ -13,32 +15,14 @@ SEPERATOR1 = '--------------------------------------------------------------'
 SEPERATOR2 = '=============================================================='
 
 user_id_global = ''
-cat1={'식비','음식','밥','food','식'}
-cat2={'교통','차','지하철','transport','transportation','교'}
-cat3={'주거','월세','관리비','housing','house','rent','주'}
-cat4={'여가','취미','문화생활','hobby','leisure','여'}
-cat5={'입금','월급','용돈','sallary','wage','income','입'}
-cat6={'기타','etc','other','기'}
-
-meth1={'현금','cash','지폐','현'}
-meth2={'카드','card','credit','카'}
-meth3={'계좌이체','transfer','bank','account','송금','계'}
 
 def valid_date(date_str):
     """날짜 유효성 검사 및 반환 (5.2.1.1 ~ 5.2.1.4절)"""
-    if not re.fullmatch(r'\d{4}-\d{2}-\d{2}', date_str):
+    date_ord = date_codec.parse_date(date_str)
+    if(date_ord is None):
         print("날짜는 YYYY-MM-DD 형식으로 입력해야합니다.")
         return 0
-    try:
-        y, m, d = map(int, date_str.split('-'))
-        date_obj = datetime.date(y, m, d)
-    except ValueError:
-        print("날짜는 YYYY-MM-DD 형식으로 입력해야합니다.")
-        return 0
-    if(y>2099 or y<1900):
-        print("날짜는 YYYY-MM-DD 형식으로 입력해야합니다.")
-        return 0
-    elif(date_obj > datetime.date.today()):
+    elif(date_ord > date_codec.today_ordinal()):
         print("오늘 이후의 날짜는 입력할 수 없습니다.")
         return 0
     return 1
@@ -56,29 +40,18 @@ def dinput():
     return date
 
 def cinput():
+    #사용자 카테고리(로드 전이면 기본 카테고리) 중 입금 카테고리를 뺀 것
+    category_map=category.get_category_map() or category.DEFAULT_CATEGORIES
     print("카테고리")
-    print(" [식비][교통][주거][여가][기타]\n")
+    print(" ["+"][".join(name for name, data in category_map.items() if data['separator']!=category.INCOME_SEPARATOR)+"]\n")
     while 1:
-        category=input('카테고리 입력: ')
-        if(category in cat1):
-            category='식비'
-            break
-        elif(category in cat2):
-            category='교통'
-            break
-        elif(category in cat3):
-            category='주거'
-            break
-        elif(category in cat4):
-            category='주거'
-            break
-        elif(category in cat6):
-            category='기타'
+        category_name=category.resolve_category(input('카테고리 입력: '))
+        if(category_name is not None and category_map[category_name]['separator']!=category.INCOME_SEPARATOR):
             break
         else:
             print("올바른 카테고리를 입력해야 합니다.")
     print("------------------------------------------------------------")
-    return category
+    return category_name
 
 def ainput():
     while 1:
@@ -100,15 +73,8 @@ def minput():
     print("결제수단")
     print(" [카드][현금][계좌이체]\n")
     while 1:
-        method=input('결제수단 입력: ')
-        if(method in meth1):
-            method='현금'
-            break
-        elif(method in meth2):
-            method='카드'
-            break
-        elif(method in meth3):
-            method='계좌이체'
+        method=category.resolve_payment(input('결제수단 입력: '))
+        if(method is not None):
             break
         else:
             print("올바른 결제수단을 입력해야 합니다.")
@@ -122,39 +88,20 @@ def hsave(user_id, date, type, amount, category, method):
         print("")
         
         if(yn=='y'):
-            ledger_file_name = f"{user_id}{LEDGER_FILE_SUFFIX}"
-            ledger_file_path = HOME_DIR / ledger_file_name
             try:
-                with open(ledger_file_path, 'a+', encoding='utf-8') as f:
-                    f.seek(0)
-                    hh=f.readlines() #파일 불러오기
-                    f.seek(0,2)
-                    for line in hh: #줄바꿈문자 유무 확인 후 추가
-                        if not line.endswith('\n'):
-                            f.write("\n")
-
-                    #지출이 수입보다 큰경우 계산
-                    hh = [line for line in hh if line.strip()] #빈 줄 무시
-                    sum=0
-                    for line in hh:
-                        line=line.split()
-                        if(line[1]=='E'):
-                            sum=sum-int(line[2])
-                        elif(line[1]=='I'):
-                            sum=sum+int(line[2])
-                    origin_sum = sum
-                    if type == 'I' :
-                        sum += int(amount)
-                    else :
-                        sum -= int(amount)
-                    if sum < 0 :
-                        print(SEPERATOR1)
-                        print("현재 지출이 수입보다 커집니다.")
-                        print(f"현재 {user_id}님의 총 자산은 ₩{origin_sum}입니다.")
-                        print(SEPERATOR1)
-                        return False            
-
-                    f.write(date+'\t'+type+'\t'+amount+'\t'+category+'\t'+method+"\n") #파일에 저장
+                #지출이 수입보다 큰경우 계산 (저장소의 총 자산 사용, 가계부 전체를 다시 읽지 않음)
+                sum = ledger_storage.total_asset(user_id)
+                origin_sum = sum
+                sum += ledger_summary.entry_amount(type, amount)
+                if sum < 0 :
+                    print(SEPERATOR1)
+                    print("현재 지출이 수입보다 커집니다.")
+                    print(f"현재 {user_id}님의 총 자산은 ₩{origin_sum}입니다.")
+                    print(SEPERATOR1)
+                    return False            
+
+                # 저장소에 추가 (TSV는 파일 끝에 추가하고 캐시와 집계를 함께 갱신)
+                ledger_storage.append_row(user_id, date, type, amount, category, method)
             
             except Exception as e:
                 # 파일을 읽는 도중 인코딩 등 다른 문제가 발생했을 경우
@@ -216,26 +163,12 @@ def calculate_budget(date_str=None):
         print("조회할 예산내역이 없습니다.")
         return False # 오류는 아니므로 True
 
-    # 2. 가계부 파일 읽기 및 지출 합산
+    # 2. 저장소에서 예산 월의 지출 합계 가져오기 (가계부 전체를 읽지 않음)
     expenses = {key: 0 for key in budgets.keys()} # { 'YYYY-MM': total_expense }
     
     try:
         if ledger_file_path.exists():
-            with open(ledger_file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    parts = line.split('\t')
-                    # parts: [Date, Type, Amount, Category, Payment]
-                    l_date_str = parts[0] # YYYY-MM-DD
-                    l_type = parts[1]
-                    l_amount = int(parts[2])
-
-                    # YYYY-MM 추출
-                    l_month_str = l_date_str[:7]
-
-                    # 해당 월이 예산 목록에 있고, 지출(E)인 경우 합산
-                    # (설계서 잔고 부분 참고: 수입(I) 제외한 것이 지출)
-                    if l_month_str in expenses and l_type == 'E':
-                        expenses[l_month_str] += l_amount
+            expenses.update(ledger_storage.month_expenses(user_id_global, list(expenses)))
     except Exception as e:
         print(f"!오류: {ledger_file_path} 파일을 읽는 중 오류가 발생했습니다: {e}")
         return False
@@ -286,11 +219,12 @@ def income(user_id):
     type='I'
     print("\n")
     date=dinput()
-    category='입금'
+    #입금 카테고리의 현재 표준명
+    category_name=category.category_ids(user_id)[0].get(category.INCOME_SEPARATOR, '입금')
     amount=ainput()
     method=minput()
     print("날짜         지출    수입    카테고리    결제수단")
-    print(date+"     -     "+amount+"     "+category+"        "+method)
-    hsave(user_id, date, type, amount, category, method)
+    print(date+"     -     "+amount+"     "+category_name+"        "+method)
+    hsave(user_id, date, type, amount, category_name, method)
     
 
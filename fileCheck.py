@@ -1,10 +1,16 @@
 import os
 import sys
 import re
-import datetime
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import verify_cache
+import date_codec
+import ledger_storage
+import ledger_summary
+import ledger_pipeline
+import ledger_reader
 # 🥠2차: category 모듈 import
-from category import SETTING_FILE_SUFFIX, get_payment_map
+from category import SETTING_FILE_SUFFIX, DELETED_CATEGORY_MARK, resolve_payment
 
 # --- 설정 변수 ---
 # 홈 경로 설정
@@ -13,6 +19,9 @@ HOME_DIR = Path.cwd()
 USER_INFO_FILE = "user_info.txt"
 # 가계부 파일 접미사
 LEDGER_FILE_SUFFIX = "_HL.txt"
+# 전체 검사 시 사용할 프로세스 수, 병렬 검사를 시작할 최소 파일 수
+VERIFY_WORKERS = os.cpu_count() or 1
+PARALLEL_MIN_FILES = 32
 #CATEGORY_MAP = {
 #    '식비': ['음식', '밥', 'food', '식'],
 #    '교통': ['차', '지하철', 'transport', 'transportation', '교'],
@@ -47,19 +56,8 @@ def check_valid_payment(payment_input):
 
     if not payment_input: # 빈 문자열은 항상 False
         return False
-    payment_map = get_payment_map()
-    
-    for standard_name, synonyms in payment_map.items():
-        # 표준명 검사
-        if standard_name == payment_input:
-            return True
-        # 동의어 검사
-        for s in synonyms:
-            if s == payment_input:
-                return True
-                
-    # 일치하는 항목을 찾지 못하면 False 반환
-    return False
+    # 가계부 파일에는 표준명만 저장됨: 별칭 표에서 자기 자신으로 찾아지는 이름만 유효
+    return resolve_payment(payment_input) == payment_input
             
 def check_userfile(users):
     user_id_regex = re.compile(r'^[A-Za-z0-9]{6,12}$')
@@ -94,11 +92,44 @@ def check_userfile(users):
     return None
 
 def check_ledgerfile(ledgers):
-        
-    today = datetime.date.today()
-    # 1. Date 형식 Regex (1900-2099년, MM, DD 형식 체크)
-    #    - 논리적 검사 (예: 2월 30일)는 strptime으로 별도 수행
-    date_regex = re.compile(r'^(19[0-9]{2}|20[0-9]{2})-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01])$')
+    line_num, sum = scan_ledger_lines(ledgers)
+    if line_num is not None:
+        return line_num
+    # 지출이 수입보다 큰 경우 검사
+    if sum < 0 :
+        return False
+    # 모든 라인이 유효
+    return None
+
+def _check_deleted_line(line, today, type_regex, amount_regex):
+    """
+    삭제 표시된 줄 검사. line_index는 줄의 첫 글자만 덮어쓰므로, 날짜의 첫 글자를 뺀 나머지와
+    유형/금액/카테고리/결제수단은 여전히 올바른 형식이어야 한다.
+    """
+    parts = line.split('\t')
+    if len(parts) != 5:
+        return False
+    date_rest, type_str, amount_str, category_str, payment_str = parts
+    # 덮어쓴 첫 글자는 연도의 첫 자리 (1900-2099년이므로 1 또는 2)
+    date_rest = date_rest[len(ledger_reader.TOMBSTONE):]
+    line_date = date_codec.parse_date('2' + date_rest)
+    if line_date is None:
+        line_date = date_codec.parse_date('1' + date_rest)
+    return (line_date is not None and line_date <= today
+            and type_regex.match(type_str) is not None
+            and amount_regex.match(amount_str) is not None
+            and check_valid_category(category_str)
+            and check_valid_payment(payment_str.strip()))
+
+def scan_ledger_lines(ledgers, start_line=1, sum=0, stats=None, months=None):
+    """
+    가계부 줄들을 검사하며 총 자산을 이어서 계산. 삭제 표시된 줄은 첫 글자 외의 형식만 검사.
+    start_line, sum: 앞부분을 이미 검사한 경우 그 다음 행 번호와 그때까지의 총 자산
+    stats가 주어지면 다 검사한 뒤 stats['deleted']에 삭제 표시된 줄 수를 기록.
+    months가 주어지면 월별 집계 파일과 같은 형식({'YYYY-MM': {'expense', 'income', 'count'}})으로 더함.
+    (오류 행 번호 또는 None, 총 자산) 반환
+    """
+    today = date_codec.today_ordinal()
     
     # 2. Type Regex
     type_regex = re.compile(r'^(E|I)$')
@@ -107,60 +138,68 @@ def check_ledgerfile(ledgers):
     #    - 1~999,999,999 (1~9자리, 0으로 시작 안 함) / 1차 수정
     amount_regex = re.compile(r'^([1-9][0-9]{0,8})$')
 
-    sum = 0
-    for line_num, line in enumerate(ledgers, 1):
+    deleted = 0
+    for line_num, line in enumerate(ledgers, start_line):
         
+        # 0. 삭제 표시된 줄 (line_index로 지운 내역)은 형식만 검사하고 합계에서 뺌
+        if line.startswith(ledger_reader.TOMBSTONE):
+            if not _check_deleted_line(line, today, type_regex, amount_regex):
+                return line_num, sum
+            deleted += 1
+            continue
+
         # 1. 형식 검사: 정확히 4개의 탭 (5개 필드)
         parts = line.split('\t')
         if len(parts) != 5:
-            return line_num
+            return line_num, sum
         
         date_str, type_str, amount_str, category_str, payment_str = parts
 
         # 2. Date 검사
-        # 2-1. 형식 (Regex)
-        if not date_regex.match(date_str):
-            return line_num
+        # 2-1. 형식 (1900-2099년, MM, DD) 및 논리적 날짜 (예: 2월 30일) 검사
+        line_date = date_codec.parse_date(date_str)
+        if line_date is None:
+            return line_num, sum
         
-        # 2-2. 논리적 날짜 (예: 2월 30일) 및 미래 날짜 검사
-        try:
-            line_date = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
-            if line_date > today:
-                # 미래 날짜
-                return line_num
-        except ValueError:
-            # 존재하지 않는 날짜 (예: 2023-02-30)
-            return line_num
+        # 2-2. 미래 날짜 검사
+        if line_date > today:
+            return line_num, sum
 
         # 3. Type 검사
         if not type_regex.match(type_str):
-            return line_num
+            return line_num, sum
 
         # 4. Amount 검사
         if not amount_regex.match(amount_str):
             # 형식 (선행 0, 기호) 또는 범위 (1천만 초과) 오류
-            return line_num
+            return line_num, sum
 
         # 5. Category 검사 (외부 함수)
-        #### 카테고리 미구현 상태여서 주석 처리 
-        # if not check_valid_category(category_str):
-        #     return line_num
+        #### 표준명이 저장된 이전 가계부는 _report_check가 구분자로 바꾼 뒤 다시 검사함 (_migrate_legacy_ledger)
+        if not check_valid_category(category_str):
+            return line_num, sum
 
         # 6. Payment 검사 (외부 함수)
         if not check_valid_payment(payment_str.strip()):
-            return line_num
+            return line_num, sum
 
         #7. 지출이 수입보다 큰 경우 검사를 위한 총 자산 계산
         if type_str == 'I' : 
             sum += int(amount_str) 
         else :
             sum -= int(amount_str)
-        
-    # 지출이 수입보다 큰 경우 검사
-    if sum < 0 :
-        return False
-    # 모든 라인이 유효
-    return None
+
+        #8. 월별 집계 파일 대조를 위한 월별 합계 계산
+        if months is not None:
+            month = months.get(date_str[:7])
+            if month is None:
+                month = months[date_str[:7]] = {'expense': 0, 'income': 0, 'count': 0}
+            month['income' if type_str == 'I' else 'expense'] += int(amount_str)
+            month['count'] += 1
+
+    if stats is not None:
+        stats['deleted'] = deleted
+    return None, sum
 
 # 🥠2차: check_setting_file 함수 구현 (설정 파일 문법/의미 규칙 검사)
 def check_setting_file(settings_lines):
@@ -181,6 +220,12 @@ def check_setting_file(settings_lines):
             continue
         
         if is_category_section:
+            # 0. 삭제된 카테고리 구분자 (#<구분자>): 형식만 검사
+            if line.startswith(DELETED_CATEGORY_MARK):
+                if not re.fullmatch(r'C[1-9][0-9]*', line[len(DELETED_CATEGORY_MARK):]):
+                    return i
+                continue
+
             # 1. 카테고리 형식 검사 (<구분자>\t<표준명>\t<동의어>...)
             parts = line.split('\t')
             if len(parts) < 2:
@@ -235,8 +280,215 @@ def check_setting_file(settings_lines):
     return None
 
 
+def _read_file(file_path):
+    """파일을 한 번만 읽어 (내용 해시, 줄 목록) 반환. 줄 구분은 텍스트 모드 읽기와 동일."""
+    digest = verify_cache.new_digest()
+    with open(file_path, 'rb') as f:
+        lines = list(ledger_pipeline.read_lines(f, digest=digest))
+    return digest.hexdigest(), lines
+
+def _check_setting(setting_file_path):
+    """설정 파일을 한 번 흘려 읽으며 검사. (check_setting_file 결과, 내용 해시) 반환"""
+    digest = verify_cache.new_digest()
+    with open(setting_file_path, 'rb') as f:
+        lineNum = check_setting_file(ledger_pipeline.read_lines(f, digest=digest))
+    return lineNum, digest.hexdigest()
+
+def _validate_ledger(ledger_file_path, fingerprint, checkpoint):
+    """
+    가계부 파일 검사. (check_ledgerfile 결과, 내용 해시, 새 체크포인트, (총 자산, 줄 수, 월별 합계)) 반환.
+    파일을 한 번 흘려 읽으며 줄 단위로 검사하므로 파일 전체를 메모리에 올리지 않는다.
+    마지막 검사 이후 뒤에 줄만 추가되었으면 (체크포인트 직전 블록이 그대로이면)
+    추가된 부분만 읽어 검사하고, 저장된 총 자산에 이어서 합산.
+    월별 합계는 파일 전체를 읽은 경우에만 계산하고, 뒷부분만 읽은 경우는 None.
+    """
+    size = fingerprint[0]
+    stats = {}
+    with open(ledger_file_path, 'rb') as f:
+        if checkpoint is not None:
+            offset, line_count, total, tail, deleted = checkpoint
+            if size > offset and verify_cache.read_tail_digest(f, offset) == tail:
+                f.seek(offset)
+                lines = ledger_pipeline.read_lines(f, stats, limit=size - offset, tail_size=1)
+                lineNum, total = scan_ledger_lines(lines, line_count + 1, total, stats)
+                if lineNum is None and total < 0:
+                    lineNum = False
+                if lineNum is not None:
+                    return lineNum, '-', None, None
+                line_count += stats['lines']
+                deleted += stats['deleted']
+                new_checkpoint = None
+                if stats['tail'] == b'\n':
+                    new_checkpoint = (line_count, total, verify_cache.read_tail_digest(f, size), deleted)
+                # 앞부분을 읽지 않았으므로 전체 내용 해시는 알 수 없음
+                return lineNum, '-', new_checkpoint, (total, line_count - deleted, None)
+
+        f.seek(0)
+        digest = verify_cache.new_digest()
+        lines = ledger_pipeline.read_lines(f, stats, digest=digest, limit=size,
+                                           tail_size=verify_cache.TAIL_BLOCK_SIZE)
+        #2차 구현 strip 
+        months = {}
+        lineNum, total = scan_ledger_lines(lines, stats=stats, months=months)
+    if lineNum is None and total < 0:
+        lineNum = False
+    if lineNum is not None:
+        return lineNum, None, None, None
+    new_checkpoint = None
+    if stats['tail'].endswith(b'\n'):
+        new_checkpoint = (stats['lines'], total, verify_cache.compute_tail_digest(stats['tail']),
+                          stats['deleted'])
+    # 총계 파일과 대조하는 내역 수에는 삭제된 줄을 빼고 셈
+    return lineNum, digest.hexdigest(), new_checkpoint, (total, stats['lines'] - stats['deleted'], months)
+
+def _create_missing_user_files(user_id, reported):
+    """
+    사용자의 가계부/설정 파일이 없으면 빈 파일 생성.
+    같은 종류의 오류 메시지는 한 번만 출력하며, 출력한 종류는 reported에 기록.
+    """
+    ledger_file_path = HOME_DIR / f"{user_id}{LEDGER_FILE_SUFFIX}"
+    if not ledger_file_path.exists():
+        if 'ledger' not in reported:
+            print("!오류: 가계부 파일이 존재하지 않습니다.")
+            print("!오류: 프로그램이 자동으로 새로운 파일을 생성 중 입니다.")
+            reported.add('ledger')
+        # 해당 사용자의 가계부 파일 생성
+        with open(ledger_file_path, 'w', encoding='utf-8'): pass
+    
+    # 🥠사용자 설정 파일 검사
+    setting_file_path = HOME_DIR / f"{user_id}{SETTING_FILE_SUFFIX}"
+    if not setting_file_path.exists():
+        if 'setting' not in reported:
+            print("!오류: 설정 파일이 존재하지 않습니다.")
+            print("!오류: 프로그램이 자동으로 새로운 파일을 생성 중 입니다.")
+            reported.add('setting')
+        # 파일이 없으면 빈 설정 파일 생성
+        with open(setting_file_path, 'w', encoding='utf-8'): pass 
+
+def _plan_user_checks(user_id):
+    """
+    사용자 한 명에 대해 다시 검사해야 하는 파일 목록 반환 (가계부, 설정 순서).
+    항목: (종류, 파일 경로, 지문, 체크포인트). 마지막 검사 이후 바뀌지 않은 파일은 제외.
+    바뀌지 않은 가계부는 저장된 체크포인트로 총계/월별 집계 파일을 대조.
+    """
+    tasks = []
+    ledger_file_path = HOME_DIR / f"{user_id}{LEDGER_FILE_SUFFIX}"
+    
+    # 파일이 비어있으면 검사 통과
+    if ledger_file_path.stat().st_size == 0:
+        ledger_summary.reconcile_summary(user_id, 0, 0)
+        return tasks
+
+    ledger_fingerprint = verify_cache.get_fingerprint(ledger_file_path)
+    checkpoint = verify_cache.get_checkpoint(ledger_file_path)
+    if not verify_cache.is_unchanged(ledger_file_path, ledger_fingerprint):
+        tasks.append(('ledger', ledger_file_path, ledger_fingerprint, checkpoint))
+    elif checkpoint is not None:
+        offset, line_count, total, tail, deleted = checkpoint
+        ledger_summary.reconcile_summary(user_id, total, line_count - deleted)
+        
+    # 🥠사용자 설정 파일 문법 검사 (치명적 오류)
+    setting_file_path = HOME_DIR / f"{user_id}{SETTING_FILE_SUFFIX}"
+    
+    if setting_file_path.stat().st_size == 0:
+        return tasks
+
+    setting_fingerprint = verify_cache.get_fingerprint(setting_file_path)
+    if not verify_cache.is_unchanged(setting_file_path, setting_fingerprint):
+        tasks.append(('setting', setting_file_path, setting_fingerprint, None))
+    return tasks
+
+def _run_check(task):
+    """
+    파일 하나를 검사하고 결과 반환. 프로세스 풀에서도 실행되므로 출력/종료/캐시 기록을 하지 않음.
+    결과: ('ok', 내용 해시, 체크포인트, (총 자산, 줄 수)) / ('line', 행 번호) / ('negative',) / ('read', 오류 메시지)
+    """
+    kind, file_path, fingerprint, checkpoint = task
+    try:
+        if kind == 'ledger':
+            lineNum, digest, checkpoint, summary = _validate_ledger(file_path, fingerprint, checkpoint)
+        else:
+            lineNum, digest = _check_setting(file_path)
+            checkpoint = None
+            summary = None
+    except Exception as e:
+        return ('read', str(e))
+    if lineNum is False:
+        return ('negative',)
+    if lineNum is not None:
+        return ('line', lineNum)
+    return ('ok', digest, checkpoint, summary)
+
+def _migrate_legacy_ledger(file_path):
+    """
+    카테고리 칸에 표준명이 저장된 이전 가계부면 구분자로 바꾸고 다시 검사한 뒤 True 반환.
+    바꿀 줄이 없거나 바꾸지 못하면 False (원래 오류를 그대로 보고)
+    """
+    user_id = file_path.name[:-len(LEDGER_FILE_SUFFIX)]
+    try:
+        count = ledger_storage.migrate_categories(user_id)
+    except (OSError, ValueError) as e:
+        print(f"!오류: 이전 형식 가계부({file_path.name})의 카테고리를 바꾸지 못했습니다: {e}")
+        return False
+    if count == 0:
+        return False
+    print(f"이전 형식 가계부({file_path.name})의 카테고리 {count}건을 구분자로 바꿨습니다.")
+    task = ('ledger', file_path, verify_cache.get_fingerprint(file_path), None)
+    _report_check(task, _run_check(task))
+    return True
+
+def _report_check(task, result):
+    """검사 결과 처리: 오류면 메시지 출력 후 프로그램 종료, 통과면 캐시에 기록하고 총계/월별 집계 파일 대조"""
+    kind, file_path, fingerprint, _ = task
+    file_name = file_path.name
+    if result[0] == 'read':
+        print(f"!치명적오류: {file_name} 파일을 읽는 중 오류가 발생했습니다: {result[1]}")
+        print("프로그램을 종료시킵니다.")
+        sys.exit()
+    elif result[0] == 'line':
+        if kind == 'ledger' and _migrate_legacy_ledger(file_path):
+            return
+        print(f"!치명적오류: 현재 {file_name} {result[1]}행에서 오류가 발생되었습니다.")
+        print("프로그램을 종료시킵니다.")
+        sys.exit()
+    elif result[0] == 'negative':
+        print(f"!치명적오류: 현재 {file_name}에서 지출이 수입보다 많습니다.")
+        print("프로그램을 종료시킵니다.")
+        sys.exit()
+    verify_cache.mark_valid(file_path, fingerprint, result[1], result[2])
+    if kind == 'ledger':
+        user_id = file_name[:-len(LEDGER_FILE_SUFFIX)]
+        total, line_count, months = result[3]
+        ledger_summary.reconcile_summary(user_id, total, line_count, months)
+
+def _check_user_files(user_id):
+    """사용자 한 명의 가계부/설정 파일 문법 검사. 오류가 있으면 프로그램 종료"""
+    for task in _plan_user_checks(user_id):
+        _report_check(task, _run_check(task))
+
+def _check_all_user_files(user_ids, workers):
+    """
+    여러 사용자의 파일 검사. 검사할 파일이 많으면 프로세스 풀로 나누어 검사하되,
+    결과는 사용자 순서대로 처리하므로 첫 번째 오류는 순차 검사와 같은 파일/행으로 출력.
+    """
+    tasks = []
+    for user_id in user_ids:
+        tasks.extend(_plan_user_checks(user_id))
+
+    if workers <= 1 or len(tasks) < PARALLEL_MIN_FILES:
+        for task in tasks:
+            _report_check(task, _run_check(task))
+        return
+
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_run_check, tasks, chunksize=chunksize))
+    for task, result in zip(tasks, results):
+        _report_check(task, result)
+
 #이 함수를 부른후 false면 프로그램 재시작
-def verify_files():
+#workers: 검사에 사용할 프로세스 수 (1이면 순차 검사)
+def verify_files(workers=VERIFY_WORKERS):
     # 1. 사용자 파일(user_info.txt) 존재 확인
     user_file_path = HOME_DIR / USER_INFO_FILE
 
@@ -258,10 +510,11 @@ def verify_files():
         return True
         
     # 2. 사용자 목록 읽기 및 가계부 파일 존재 확인
+    verify_cache.load_cache()
+    user_fingerprint = verify_cache.get_fingerprint(user_file_path)
     try:
-        with open(user_file_path, 'r', encoding='utf-8') as f:
-            #2차 구현 strip
-            users = [line for line in f]
+        #2차 구현 strip
+        user_digest, users = _read_file(user_file_path)
     except Exception as e:
         # 파일을 읽는 도중 인코딩 등 다른 문제가 발생했을 경우
         print(f"!치명적오류: {USER_INFO_FILE} 파일을 읽는 중 오류가 발생했습니다: {e}")
@@ -270,95 +523,48 @@ def verify_files():
     
     # 3. 사용자 파일 문법 검사
     #    (예: 각 줄은 공백 없이 하나의 사용자 이름만 포함해야 함)
-    lineNum = check_userfile(users)
-    if(lineNum != None) :
-        print(f"!치명적오류: 현재 {USER_INFO_FILE} {lineNum}행에서 오류가 발생되었습니다.")
-        print("프로그램을 종료시킵니다.")
-        sys.exit()
+    #    마지막 검사 이후 바뀌지 않은 파일은 다시 검사하지 않음
+    if not verify_cache.is_unchanged(user_file_path, user_fingerprint):
+        lineNum = check_userfile(users)
+        if(lineNum != None) :
+            print(f"!치명적오류: 현재 {USER_INFO_FILE} {lineNum}행에서 오류가 발생되었습니다.")
+            print("프로그램을 종료시킵니다.")
+            sys.exit()
+        verify_cache.mark_valid(user_file_path, user_fingerprint, user_digest)
 
 
-    missing_ledger_files_exist = False
-    missing_setting_files_exist = False 
+    # 4. 모든 사용자의 가계부/설정 파일 존재 확인
+    reported = set()
     for line in users:
         parts = line.split('\t')     
         user_id = parts[0]
-        
-        ledger_file_name = f"{user_id}{LEDGER_FILE_SUFFIX}"
-        ledger_file_path = HOME_DIR / ledger_file_name
-        if not ledger_file_path.exists():
-            if not missing_ledger_files_exist:
-                print("!오류: 가계부 파일이 존재하지 않습니다.")
-                print("!오류: 프로그램이 자동으로 새로운 파일을 생성 중 입니다.")
-                missing_ledger_files_exist = True
-            # 해당 사용자의 가계부 파일 생성
-            with open(ledger_file_path, 'w', encoding='utf-8'): pass
-        
-        # 🥠사용자 설정 파일 검사
-        setting_file_name = f"{user_id}{SETTING_FILE_SUFFIX}"
-        setting_file_path = HOME_DIR / setting_file_name
-        if not setting_file_path.exists():
-            if not missing_setting_files_exist:
-                print("!오류: 설정 파일이 존재하지 않습니다.")
-                print("!오류: 프로그램이 자동으로 새로운 파일을 생성 중 입니다.")
-                missing_setting_files_exist = True
-            # 파일이 없으면 빈 설정 파일 생성
-            with open(setting_file_path, 'w', encoding='utf-8'): pass 
+        _create_missing_user_files(user_id, reported)
     
-    if missing_ledger_files_exist or missing_setting_files_exist:
+    if reported:
         print("프로그램이 재시작됩니다.")
         print(SEPERATOR2)
         # 재시작을 위해 False 반환
         return False
 
-    # 4. 가계부 파일 문법 검사
-    for line in users:
-        parts = line.split('\t')     
-        user_id = parts[0]
-        ledger_file_name = f"{user_id}{LEDGER_FILE_SUFFIX}"
-        ledger_file_path = HOME_DIR / ledger_file_name
-        
-        # 파일이 비어있으면 검사 통과
-        if ledger_file_path.stat().st_size == 0:
-            continue
-            
-        try:
-            with open(ledger_file_path, 'r', encoding='utf-8') as f:
-                #2차 구현 strip 
-                ledgers = [line for line in f if line]
-        except Exception as e:
-            print(f"!치명적오류: {ledger_file_name} 파일을 읽는 중 오류가 발생했습니다: {e}")
-            print("프로그램을 종료시킵니다.")
-            sys.exit()
-        lineNum = check_ledgerfile(ledgers)
-        if lineNum!=None and lineNum != False :
-            print(f"!치명적오류: 현재 {ledger_file_name} {lineNum}행에서 오류가 발생되었습니다.")
-            print("프로그램을 종료시킵니다.")
-            sys.exit()
-        elif lineNum == False :
-            print(f"!치명적오류: 현재 {ledger_file_name}에서 지출이 수입보다 많습니다.")
-            print("프로그램을 종료시킵니다.")
-            sys.exit()
-            
-        # 🥠사용자 설정 파일 문법 검사 (치명적 오류)
-        setting_file_name = f"{user_id}{SETTING_FILE_SUFFIX}"
-        setting_file_path = HOME_DIR / setting_file_name
-        
-        if setting_file_path.stat().st_size == 0:
-            continue
-        
-        try:
-            with open(setting_file_path, 'r', encoding='utf-8') as f:
-                setting = f.readlines()
-        except Exception as e:
-            print(f"!치명적오류: {setting_file_name} 파일을 읽는 중 오류가 발생했습니다: {e}")
-            print("프로그램을 종료시킵니다.")
-            sys.exit()
-        lineNum = check_setting_file(setting)
-        if lineNum is not None:
-            # 치명적 오류 메시지 출력 후 종료
-            print(f"!치명적오류: 현재 {setting_file_name} {lineNum}행에서 오류가 발생되었습니다.")
-            print("프로그램을 종료시킵니다.")
-            sys.exit()
+    # 5. 가계부 파일 문법 검사
+    user_ids = [line.split('\t')[0] for line in users]
+    _check_all_user_files(user_ids, workers)
             
-    # 모든 검사를 통과하면 True 반환
-    return True
\ No newline at end of file
+    # 모든 검사를 통과하면 캐시 저장 후 True 반환
+    verify_cache.save_cache()
+    return True
+
+# 기록/편집 후와 로그인 시에는 해당 사용자의 파일만 검사
+# false면 메인 메뉴로 돌아가 재시작
+def verify_user_files(user_id):
+    reported = set()
+    _create_missing_user_files(user_id, reported)
+    if reported:
+        print("프로그램이 재시작됩니다.")
+        print(SEPERATOR2)
+        return False
+
+    verify_cache.load_cache()
+    _check_user_files(user_id)
+    verify_cache.save_cache()
+    return True
@@ -0,0 +1,168 @@
+import os
+
+# 앞부분을 비교/복사할 때 한 번에 다루는 크기 (bytes)
+COPY_BUFFER_SIZE = 1 << 20
+
+
+# --------------------------------------------------------------
+# 원자적 파일 교체
+# 새 내용을 임시 파일에 다 쓰고 fsync한 뒤 os.replace로 바꾸고 폴더도 fsync하므로, 쓰는 도중이나
+# 교체 직후에 끊겨도 원래 파일 또는 새 파일이 온전히 남는다 (반쯤 쓰인 파일로 verify_files가 종료되는 일이 없음).
+# rewrite_file은 기존 파일과 새 내용을 앞에서부터 한 번만 읽어 비교하며, 같은 앞부분은 비교한 바이트를
+# 그대로 임시 파일에 쓴다. 내용이 그대로인 작은 파일은 임시 파일도 만들지 않는다.
+# 바뀌는 위치를 아는 rewrite_tail은 앞부분을 비교 없이 복사한다 (os.sendfile, 없으면 큰 버퍼 단위 복사).
+# --------------------------------------------------------------
+
+
+def _common_prefix(f, chunks, spill):
+    """
+    열린 기존 파일 f와 새 내용 chunks(bytes 반복자)를 앞에서부터 비교하며 같은 앞부분을 모음.
+    모은 크기가 COPY_BUFFER_SIZE 이상이 될 때마다 spill(bytes)로 넘기므로 기존 파일을 다시 읽을 필요가 없다.
+    (아직 넘기지 않은 같은 앞부분 조각 목록, 처음 달라진 새 내용 조각 또는 None) 반환.
+    새 내용이 모두 같으면 조각은 None. chunks는 그 다음 조각부터 남는다
+    """
+    same = []
+    size = 0
+    for data in chunks:
+        old = f.read(len(data))
+        if old != data:
+            return same, data
+        same.append(data)
+        size += len(data)
+        if size >= COPY_BUFFER_SIZE:
+            spill(b''.join(same))
+            same = []
+            size = 0
+    return same, None
+
+
+def _copy_prefix(src, dst, length):
+    """src 파일의 처음 length 바이트를 dst로 복사 (가능하면 커널 안에서 복사)"""
+    if length == 0:
+        return
+    if hasattr(os, 'sendfile'):
+        try:
+            offset = 0
+            while offset < length:
+                sent = os.sendfile(dst.fileno(), src.fileno(), offset, length - offset)
+                if sent == 0:
+                    break
+                offset += sent
+            if offset == length:
+                dst.seek(length)
+                return
+        except OSError:
+            # sendfile을 쓸 수 없는 파일 시스템이면 일반 복사로 처음부터 다시
+            dst.seek(0)
+            dst.truncate()
+    src.seek(0)
+    remaining = length
+    while remaining > 0:
+        block = src.read(min(COPY_BUFFER_SIZE, remaining))
+        if not block:
+            break
+        dst.write(block)
+        remaining -= len(block)
+
+
+def _write_rest(dst, rest):
+    """열린 임시 파일 dst에 rest(bytes 반복자)를 묶어서 쓰고 fsync"""
+    batch = []
+    size = 0
+    for data in rest:
+        batch.append(data)
+        size += len(data)
+        if size >= COPY_BUFFER_SIZE:
+            dst.write(b''.join(batch))
+            batch = []
+            size = 0
+    dst.write(b''.join(batch))
+    dst.flush()
+    os.fsync(dst.fileno())
+
+
+def _discard(dst, tmp_path):
+    """열린 임시 파일을 닫고 지움"""
+    dst.close()
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+
+def _replace(tmp_path, path):
+    """임시 파일로 path를 교체한 뒤 폴더를 fsync해 교체(폴더 항목 변경)도 디스크에 남김"""
+    os.replace(tmp_path, path)
+    try:
+        dir_fd = os.open(os.path.dirname(path) or '.', os.O_RDONLY)
+    except OSError:
+        # 폴더를 열 수 없는 플랫폼(Windows)
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def rewrite_file(path, lines):
+    """
+    path 파일의 내용을 lines(str 반복자, 줄바꿈 포함)로 교체 (UTF-8, 줄바꿈은 '\\n').
+    기존 파일을 한 번 읽으며 비교해 같은 앞부분은 그대로, 처음 달라진 줄부터는 새 내용을 임시 파일에 써서
+    fsync 후 교체. 내용이 그대로이면 파일을 건드리지 않는다. 바뀌었으면 True
+    """
+    path = str(path)
+    tmp_path = path + ".tmp"
+    chunks = (line.encode('utf-8') for line in lines)
+    dst = None
+
+    def spill(data):
+        # 같은 앞부분이 쌓였을 때 처음으로 임시 파일을 엶
+        nonlocal dst
+        if dst is None:
+            dst = open(tmp_path, 'wb')
+        dst.write(data)
+
+    try:
+        src = open(path, 'rb')
+    except FileNotFoundError:
+        src = None
+    try:
+        same, first = [], None
+        if src is not None:
+            with src:
+                same, first = _common_prefix(src, chunks, spill)
+                # 새 내용이 모두 같고 기존 파일에 더 남은 내용이 없으면 쓸 필요 없음
+                if first is None and not src.read(1):
+                    if dst is not None:
+                        _discard(dst, tmp_path)
+                    return False
+        spill(b''.join(same))
+        if first is not None:
+            dst.write(first)
+        _write_rest(dst, chunks)
+        dst.close()
+    except BaseException:
+        if dst is not None:
+            _discard(dst, tmp_path)
+        raise
+    _replace(tmp_path, path)
+    return True
+
+
+def rewrite_tail(path, offset, chunks):
+    """
+    path 파일의 처음 offset 바이트는 그대로 두고 그 뒤를 chunks(bytes 반복자)로 바꾼 파일로 교체.
+    앞부분은 비교하지 않고 바로 복사한다 (바뀌는 위치를 호출한 쪽이 아는 경우)
+    """
+    path = str(path)
+    tmp_path = path + ".tmp"
+    with open(path, 'rb') as src:
+        try:
+            with open(tmp_path, 'wb') as dst:
+                _copy_prefix(src, dst, offset)
+                _write_rest(dst, chunks)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    _replace(tmp_path, path)
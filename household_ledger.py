@@ -5,8 +5,10 @@ from fileCheck import verify_files
 from logIn import load_user_info, login
 
 def main_menu():
+    # 전체 파일 검사는 시작할 때만 수행 (이후에는 로그인한 사용자 단위로 검사)
+    while not verify_files():
+        pass
     while True:
-        if(not verify_files()) : continue
         print("\n=메인 메뉴=\n")
         print("[회원가입] [로그인] [종료]\n")
         choice = input("메뉴를 입력하세요: ").strip()
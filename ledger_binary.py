@@ -0,0 +1,216 @@
+import os
+import struct
+import sys
+from pathlib import Path
+import date_codec
+import fileCheck
+import ledger_pipeline
+import ledger_reader
+
+# 홈 경로 설정
+HOME_DIR = Path.cwd()
+# 가계부 파일 접미사
+LEDGER_FILE_SUFFIX = "_HL.txt"
+# 고정 길이 바이너리 가계부 / 문자열 사전 파일 접미사
+BINARY_FILE_SUFFIX = "_HL.bin"
+DICT_FILE_SUFFIX = "_HL.dic"
+
+
+# --------------------------------------------------------------
+# 고정 길이 바이너리 가계부 (<ID>_HL.bin + <ID>_HL.dic)
+# 헤더: 매직(4) 버전(2) 레코드 크기(2) 레코드 수(4) 변환한 TSV의 크기(8) 수정시각(8)
+# 레코드: 날짜 ordinal(int32) 유형(uint8: 0=E, 1=I) 금액(int64) 카테고리 코드(uint16) 결제수단 코드(uint16)
+# 사전 파일: 한 줄에 <종류(C/P)><탭><문자열>. 종류별로 나온 순서가 코드
+# 앱은 TSV(<ID>_HL.txt)에만 쓰고 파일 검사(verify_files)도 TSV를 기준으로 하므로, 이 형식은
+# TSV를 옮기거나 보관할 때 쓰는 변환 도구다 (import: TSV → 바이너리, export: 바이너리 → TSV).
+# 헤더에 기록한 TSV의 (크기, 수정시각)이 지금과 다르면 바이너리 가계부는 오래된 것으로 보고
+# 읽거나 내보내지 않는다 (다시 import 해야 함, 그 사이 앱에서 쓴 내용을 덮어쓰지 않음).
+# 레코드는 파일 검사와 같은 규칙(금액 1~999,999,999, 구분자/결제수단 형식, 미래 날짜 불가)을 통과해야 변환한다.
+# --------------------------------------------------------------
+
+MAGIC = b'HLB1'
+VERSION = 2
+_HEADER = struct.Struct('<4sHHIqq')
+_RECORD = struct.Struct('<iBqHH')
+HEADER_SIZE = _HEADER.size
+RECORD_SIZE = _RECORD.size
+
+TYPE_NAMES = ('E', 'I')
+_DICT_KINDS = {'category': 'C', 'payment': 'P'}
+
+
+def _ledger_path(user_id):
+    return HOME_DIR / f"{user_id}{LEDGER_FILE_SUFFIX}"
+
+
+def _binary_path(user_id):
+    return HOME_DIR / f"{user_id}{BINARY_FILE_SUFFIX}"
+
+
+def _dict_path(user_id):
+    return HOME_DIR / f"{user_id}{DICT_FILE_SUFFIX}"
+
+
+def _write_replace(path, data):
+    """임시 파일에 쓴 뒤 교체 (중간에 끊겨도 이전 파일 유지)"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_dictionary(user_id):
+    """
+    사전 파일을 읽어 {'category': [문자열...], 'payment': [문자열...]} 반환 (리스트 인덱스가 코드)
+    """
+    names = {'category': [], 'payment': []}
+    kinds = {v: k for k, v in _DICT_KINDS.items()}
+    with open(_dict_path(user_id), 'r', encoding='utf-8', newline='\n') as f:
+        for line in f:
+            kind, _, name = line.rstrip('\n').partition('\t')
+            names[kinds[kind]].append(name)
+    return names
+
+
+def _encode(record, codes, new_names):
+    """
+    (날짜, 유형, 금액, 카테고리, 결제수단) 문자열 레코드를 바이트로 변환. 처음 보는 문자열은 new_names에 추가.
+    파일 검사(scan_ledger_lines)에서 오류가 되는 레코드는 ValueError
+    """
+    date_str, type_str, amount, category, payment = record
+    date_ord = date_codec.parse_date(date_str)
+    if date_ord is None or date_ord > date_codec.today_ordinal() or type_str not in TYPE_NAMES:
+        raise ValueError("날짜/유형 형식 오류")
+    amount = int(amount)
+    if not 1 <= amount <= 999999999:
+        raise ValueError("금액은 1 이상 999,999,999 이하의 값만 허용됩니다.")
+    if not fileCheck.check_valid_category(category) or not fileCheck.check_valid_payment(payment):
+        raise ValueError("카테고리/결제수단 형식 오류")
+    code_values = []
+    for kind, name in (('category', category), ('payment', payment)):
+        code = codes[kind].get(name)
+        if code is None:
+            code = codes[kind][name] = len(codes[kind])
+            new_names.append((kind, name))
+        code_values.append(code)
+    return _RECORD.pack(date_ord, TYPE_NAMES.index(type_str), amount, *code_values)
+
+
+def _decode(raw, names):
+    date_ord, type_code, amount, category, payment = _RECORD.unpack(raw)
+    return (date_codec.to_date(date_ord).isoformat(), TYPE_NAMES[type_code], amount,
+            names['category'][category], names['payment'][payment])
+
+
+def _format_line(date, type, amount, category, payment):
+    return f"{date}\t{type}\t{amount}\t{category}\t{payment}"
+
+
+def import_tsv(user_id):
+    """
+    TSV 가계부(<ID>_HL.txt)를 바이너리 가계부로 변환하여 저장. 변환한 레코드 수 반환.
+    삭제 표시된 줄은 건너뛰고 제자리 수정으로 채운 줄 끝 공백은 무시한다 (정리된 가계부와 같음).
+    다시 TSV로 내보냈을 때 같은 줄이 되지 않는 줄(빈 줄, 금액 앞의 0 등)이 있으면
+    ValueError (메시지: 행 번호)
+    """
+    codes = {'category': {}, 'payment': {}}
+    new_names = []
+    records = bytearray()
+    count = 0
+    ledger_path = _ledger_path(user_id)
+    fingerprint = _fingerprint(ledger_path)
+    with open(ledger_path, 'rb') as f:
+        for line_num, line in enumerate(ledger_pipeline.read_lines(f), 1):
+            if line.startswith(ledger_reader.TOMBSTONE):
+                continue
+            line = line.rstrip('\n').rstrip(' ')
+            parts = line.split('\t')
+            try:
+                if len(parts) != 5 or _format_line(*parts[:2], int(parts[2]), *parts[3:]) != line:
+                    raise ValueError(line)
+                records += _encode(parts, codes, new_names)
+            except (ValueError, struct.error):
+                raise ValueError(f"{line_num}행")
+            count += 1
+    _write_replace(_dict_path(user_id), "".join(
+        f"{_DICT_KINDS[kind]}\t{name}\n" for kind, name in new_names).encode('utf-8'))
+    _write_replace(_binary_path(user_id), _HEADER.pack(MAGIC, VERSION, RECORD_SIZE, count, *fingerprint)
+                   + bytes(records))
+    return count
+
+
+def export_tsv(user_id, file_path=None):
+    """
+    바이너리 가계부를 TSV로 내보냄 (기본: <ID>_HL.txt 교체). 내보낸 레코드 수 반환.
+    <ID>_HL.txt를 교체한 경우 헤더의 TSV 지문도 새 파일로 바꾼다.
+    """
+    lines = [_format_line(*record) + "\n" for record in iter_records(user_id)]
+    if file_path is not None:
+        _write_replace(Path(file_path), "".join(lines).encode('utf-8'))
+        return len(lines)
+    ledger_path = _ledger_path(user_id)
+    _write_replace(ledger_path, "".join(lines).encode('utf-8'))
+    with open(_binary_path(user_id), 'r+b') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, RECORD_SIZE, len(lines), *_fingerprint(ledger_path)))
+        f.flush()
+        os.fsync(f.fileno())
+    return len(lines)
+
+
+def _fingerprint(path):
+    """TSV 가계부의 (크기, 수정시각). 파일이 없으면 (-1, -1)"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return -1, -1
+    return st.st_size, st.st_mtime_ns
+
+
+def _read_header(f, user_id):
+    """헤더를 읽어 (레코드 수, TSV 지문) 반환. 형식이 틀리거나 TSV가 변환 이후 바뀌었으면 ValueError"""
+    magic, version, record_size, count, size, mtime = _HEADER.unpack(f.read(HEADER_SIZE))
+    if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+        raise ValueError("바이너리 가계부 형식이 올바르지 않습니다.")
+    if (size, mtime) != _fingerprint(_ledger_path(user_id)):
+        raise ValueError("가계부 파일이 바이너리 가계부를 만든 뒤 바뀌었습니다. 다시 import 해야 합니다.")
+    return count, (size, mtime)
+
+
+def record_count(user_id):
+    """레코드 수"""
+    with open(_binary_path(user_id), 'rb') as f:
+        return _read_header(f, user_id)[0]
+
+
+def iter_records(user_id):
+    """레코드를 파일 순서대로 (날짜, 유형, 금액, 카테고리, 결제수단) 로 돌려주는 제너레이터"""
+    names = load_dictionary(user_id)
+    with open(_binary_path(user_id), 'rb') as f:
+        count = _read_header(f, user_id)[0]
+        for _ in range(count):
+            yield _decode(f.read(RECORD_SIZE), names)
+
+
+# 사용법: python ledger_binary.py import <ID>
+#         python ledger_binary.py export <ID> [내보낼 파일]  (기본: <ID>_HL.txt 교체)
+if __name__ == "__main__":
+    if not (len(sys.argv) == 3 and sys.argv[1] == 'import'
+            or len(sys.argv) in (3, 4) and sys.argv[1] == 'export'):
+        print("사용법: python ledger_binary.py import <ID>")
+        print("        python ledger_binary.py export <ID> [내보낼 파일]")
+        sys.exit(1)
+    command, user_id = sys.argv[1], sys.argv[2]
+    try:
+        if command == 'import':
+            count = import_tsv(user_id)
+        else:
+            count = export_tsv(user_id, sys.argv[3] if len(sys.argv) == 4 else None)
+    except ValueError as e:
+        print(f"!오류: 현재 {e}을(를) 변환할 수 없습니다.")
+        sys.exit(1)
+    except Exception as e:
+        print(f"!오류: {e}")
+        sys.exit(1)
+    print(f"{count}개의 내역을 변환했습니다.")
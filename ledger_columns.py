@@ -0,0 +1,666 @@
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from operator import le
+from pathlib import Path
+import date_codec
+import ledger_reader
+
+# NumPy가 설치되어 있으면 합계/검색 조건 검사/정렬을 벡터 연산으로 처리 (없으면 순수 파이썬)
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 홈 경로 설정
+HOME_DIR = Path.cwd()
+# 가계부 파일 접미사
+LEDGER_FILE_SUFFIX = "_HL.txt"
+
+# 유형 코드: 0 = 지출(E), 1 = 수입(I)
+TYPE_NAMES = ('E', 'I')
+TYPE_EXPENSE = 0
+TYPE_INCOME = 1
+_TYPE_CODES = {name: code for code, name in enumerate(TYPE_NAMES)}
+
+# 이 행 수 이상일 때만 NumPy 사용 (작은 가계부는 배열 변환 비용이 더 큼)
+NUMPY_MIN_ROWS = 4096
+
+
+# --------------------------------------------------------------
+# 열(column) 단위 가계부
+# 한 줄마다 dict를 만드는 대신 열마다 array 하나에 값을 모아 둔다.
+#   'date'     : 날짜 ordinal (int32)
+#   'type'     : 유형 코드 (int8)
+#   'amount'   : 금액 (int64)
+#   'category' : 카테고리 코드 (int16), 'category_names'[코드] 가 문자열
+#   'payment'  : 결제수단 코드 (int16), 'payment_names'[코드] 가 문자열
+#   'line'     : 가계부 파일의 행 번호 (int32, 편집 시 idx로 사용)
+# 행 번호(row id)는 배열 인덱스이며, 필요한 행만 get_row로 dict로 만든다.
+# 'line' 열은 항상 오름차순 (추가는 끝에, 옮겨진 수정도 파일 끝에 다시 추가됨)
+# 'sorted'는 행이 날짜 오름차순인지 여부 (날짜순 가계부, sorted_ledger). 참이면 최신순 정렬과
+# 기간 검색을 정렬 없이 처리한다.
+# --------------------------------------------------------------
+
+def new_columns():
+    """빈 열 단위 가계부 생성"""
+    return {
+        'date': array('i'),
+        'type': array('b'),
+        'amount': array('q'),
+        'category': array('h'),
+        'payment': array('h'),
+        'line': array('i'),
+        # 파일 전체 줄 수 (빈 줄 포함, 다음에 추가될 줄의 행 번호 계산에 사용)
+        'line_count': 0,
+        # 행이 날짜 오름차순이면 True (추가/수정 때 함께 갱신)
+        'sorted': True,
+        'category_names': [],
+        'payment_names': [],
+        # 문자열 → 코드 (적재 중 중복 문자열을 한 번만 저장)
+        'category_codes': {},
+        'payment_codes': {},
+        # 보조 색인 (아래 참고)
+        'index': {'category': {}, 'payment': {}, 'month': {}},
+    }
+
+
+def _code(columns, kind, name):
+    codes = columns[kind + '_codes']
+    code = codes.get(name)
+    if code is None:
+        code = len(columns[kind + '_names'])
+        columns[kind + '_names'].append(name)
+        codes[name] = code
+    return code
+
+
+def append_row(columns, line_num, date_str, type_str, amount, category, payment):
+    """
+    한 행 추가. 날짜/유형 형식이 틀리면 ValueError
+    """
+    date_ord = date_codec.parse_date(date_str)
+    if date_ord is None or type_str not in TYPE_NAMES:
+        raise ValueError(f"{line_num}행")
+    if columns['date'] and columns['date'][-1] > date_ord:
+        columns['sorted'] = False
+    columns['date'].append(date_ord)
+    columns['type'].append(TYPE_NAMES.index(type_str))
+    columns['amount'].append(int(amount))
+    columns['category'].append(_code(columns, 'category', category))
+    columns['payment'].append(_code(columns, 'payment', payment))
+    columns['line'].append(line_num)
+    _index_add(columns, len(columns['line']) - 1)
+
+
+def find_row(columns, line_num):
+    """가계부 파일의 행 번호로 행(row id) 찾기 ('line' 열 이진 탐색). 없으면 None"""
+    lines = columns['line']
+    row_id = bisect_left(lines, line_num)
+    if row_id < len(lines) and lines[row_id] == line_num:
+        return row_id
+    return None
+
+
+def set_row(columns, row_id, date_str, type_str, amount, category, payment):
+    """
+    행 하나의 내용을 바꿈 (행 번호는 그대로). 날짜/유형 형식이 틀리면 ValueError
+    """
+    date_ord = date_codec.parse_date(date_str)
+    if date_ord is None or type_str not in TYPE_NAMES:
+        raise ValueError(f"{columns['line'][row_id]}행")
+    dates = columns['date']
+    if (row_id > 0 and dates[row_id - 1] > date_ord) or (row_id + 1 < len(dates) and dates[row_id + 1] < date_ord):
+        columns['sorted'] = False
+    _index_remove(columns, row_id)
+    columns['date'][row_id] = date_ord
+    columns['type'][row_id] = TYPE_NAMES.index(type_str)
+    columns['amount'][row_id] = int(amount)
+    columns['category'][row_id] = _code(columns, 'category', category)
+    columns['payment'][row_id] = _code(columns, 'payment', payment)
+    _index_add(columns, row_id)
+
+
+def remove_row(columns, row_id):
+    """행 하나 제거 (뒤의 행들의 row id가 하나씩 당겨짐)"""
+    _index_remove(columns, row_id)
+    for name in ('date', 'type', 'amount', 'category', 'payment', 'line'):
+        del columns[name][row_id]
+
+
+def load_ledger_columns(user_id):
+    """
+    가계부 파일(<ID>_HL.txt)을 열 단위로 읽어 반환. 빈 줄은 건너뜀.
+    형식이 틀린 줄이 있으면 ValueError (메시지: 행 번호)
+    """
+    columns = new_columns()
+    ledger_file_path = HOME_DIR / f"{user_id}{LEDGER_FILE_SUFFIX}"
+    if not ledger_file_path.exists():
+        return columns
+    stats = {}
+    for line_nums, values in ledger_reader.iter_ledger_batches(ledger_file_path, stats=stats):
+        _extend_rows(columns, line_nums, *values)
+    columns['line_count'] = stats['line_count']
+    return columns
+
+
+def _extend_rows(columns, line_nums, dates, types, amounts, categories, payments):
+    """
+    블록 하나의 행들을 열마다 한 번에 추가. 날짜/유형 형식이 틀리면 ValueError (첫 오류 행)
+    """
+    date_ords = list(map(date_codec.parse_date, dates))
+    type_codes = list(map(_TYPE_CODES.get, types))
+    if None in date_ords or None in type_codes:
+        bad = next(i for i in range(len(dates)) if date_ords[i] is None or type_codes[i] is None)
+        raise ValueError(f"{line_nums[bad]}행")
+    if columns['sorted'] and date_ords:
+        if (columns['date'] and columns['date'][-1] > date_ords[0]) or not all(map(le, date_ords, date_ords[1:])):
+            columns['sorted'] = False
+    columns['date'].extend(date_ords)
+    columns['type'].extend(type_codes)
+    columns['amount'].extend(amounts)
+    keys = []
+    for kind, names in (('category', categories), ('payment', payments)):
+        codes = columns[kind + '_codes']
+        # 처음 보는 문자열만 코드 표에 추가한 뒤 dict 조회로 한 번에 변환
+        for name in set(names).difference(codes):
+            _code(columns, kind, name)
+        keys.append(list(map(codes.__getitem__, names)))
+        columns[kind].extend(keys[-1])
+    columns['line'].extend(line_nums)
+    _index_extend(columns, line_nums, *keys, _month_indexes(date_ords))
+
+
+# --------------------------------------------------------------
+# 보조 색인 (columns['index'])
+#   'category' : 카테고리 코드 → 행 번호 목록
+#   'payment'  : 결제수단 코드 → 행 번호 목록
+#   'month'    : 달력표 인덱스(date_codec) → 행 번호 목록
+# 목록(array 'i', 오름차순)에는 row id 대신 가계부 파일의 행 번호(line)를 담는다.
+# 행 번호는 다른 행을 지워도 바뀌지 않으므로, 추가/수정/삭제 때 그 행이 든 목록만 고치면 된다.
+# 검색은 조건에 맞는 가장 짧은 목록에서 시작하므로 비용이 결과 수에 비례한다.
+# --------------------------------------------------------------
+
+def _month_indexes(date_ords):
+    """날짜 ordinal 목록 → 달력표 인덱스 목록 (같은 날짜는 변환 결과 재사용)"""
+    month_of = {date_ord: date_codec.month_index_of(date_ord) for date_ord in set(date_ords)}
+    return list(map(month_of.__getitem__, date_ords))
+
+
+def _index_extend(columns, line_nums, category_codes, payment_codes, month_indexes):
+    """블록 하나의 행 번호들을 키별 목록 끝에 추가 (행 번호는 이미 있는 것보다 큼). 세 색인을 한 번에 훑음"""
+    by_category = {}
+    by_payment = {}
+    by_month = {}
+    for line_num, category, payment, month in zip(line_nums, category_codes, payment_codes, month_indexes):
+        lines = by_category.get(category)
+        if lines is None:
+            lines = by_category[category] = []
+        lines.append(line_num)
+        lines = by_payment.get(payment)
+        if lines is None:
+            lines = by_payment[payment] = []
+        lines.append(line_num)
+        lines = by_month.get(month)
+        if lines is None:
+            lines = by_month[month] = []
+        lines.append(line_num)
+    for kind, pending in (('category', by_category), ('payment', by_payment), ('month', by_month)):
+        groups = columns['index'][kind]
+        for key, lines in pending.items():
+            target = groups.get(key)
+            if target is None:
+                target = groups[key] = array('i')
+            target.extend(lines)
+
+
+def _row_keys(columns, row_id):
+    """행 하나가 들어가는 색인 키 (('category', 코드), ('payment', 코드), ('month', 인덱스))"""
+    return (('category', columns['category'][row_id]), ('payment', columns['payment'][row_id]),
+            ('month', date_codec.month_index_of(columns['date'][row_id])))
+
+
+def _index_add(columns, row_id):
+    line_num = columns['line'][row_id]
+    for kind, key in _row_keys(columns, row_id):
+        lines = columns['index'][kind].get(key)
+        if lines is None:
+            lines = columns['index'][kind][key] = array('i')
+        if not lines or lines[-1] < line_num:
+            lines.append(line_num)
+        else:
+            insort(lines, line_num)
+
+
+def _index_remove(columns, row_id):
+    line_num = columns['line'][row_id]
+    for kind, key in _row_keys(columns, row_id):
+        lines = columns['index'][kind][key]
+        del lines[bisect_left(lines, line_num)]
+        if not lines:
+            del columns['index'][kind][key]
+
+
+def plan_search(columns, date_from=None, date_to=None, category=None, payment=None):
+    """
+    검색에 쓸 색인 고르기. 조건마다 후보 행 번호 목록(월 조건은 여러 달의 목록)을 구해
+    후보가 가장 적은 조건을 고른다. (조건 이름, 목록들) 반환.
+    색인을 쓸 수 있는 조건이 없으면 ('scan', None), 결과가 없는 것이 확실하면 ('empty', [])
+    """
+    index = columns['index']
+    plans = []
+    for kind, name in (('category', category), ('payment', payment)):
+        if name is None:
+            continue
+        code = find_code(columns, kind, name)
+        if code is None or code not in index[kind]:
+            return 'empty', []
+        plans.append((kind, [index[kind][code]]))
+    if date_from is not None or date_to is not None:
+        first = date_codec.month_index_of(date_from) if date_from is not None else -1
+        last = date_codec.month_index_of(date_to) if date_to is not None else len(date_codec.month_starts())
+        plans.append(('month', [lines for month, lines in index['month'].items() if first <= month <= last]))
+    if not plans:
+        return 'scan', None
+    # 후보 행 수가 가장 적은 조건에서 시작
+    return min(plans, key=lambda plan: sum(map(len, plan[1])))
+
+
+def _lines_to_row_ids(columns, lists):
+    """오름차순 행 번호 목록들 → row id 목록 (오름차순)"""
+    if _use_numpy(columns):
+        lines = np.concatenate([np.frombuffer(lines, dtype=np.dtype(lines.typecode)) for lines in lists]) \
+            if lists else []
+        row_ids = np.searchsorted(_np_column(columns, 'line'), lines)
+        if len(lists) > 1:
+            row_ids.sort()
+        return row_ids
+    row_ids = [find_row(columns, line_num) for lines in lists for line_num in lines]
+    if len(lists) > 1:
+        row_ids.sort()
+    return row_ids
+
+
+def search_row_ids(columns, date_from=None, date_to=None, category=None, payment=None,
+                   type=None, amount_min=None, amount_max=None):
+    """
+    조건에 맞는 행을 날짜 최신순(같은 날짜는 파일 순서) row id 목록으로 반환.
+    plan_search가 고른 가장 짧은 후보 목록에서 시작하고, 나머지 조건(다른 색인의 조건 포함)은
+    후보의 열 값으로만 검사한다 (다른 색인 목록과의 교집합과 같은 결과, 후보 수에 비례).
+    date_from, date_to: 날짜 ordinal (양 끝 포함), category/payment: 표준명,
+    type: 'E' 또는 'I', amount_min/amount_max: 금액 범위 (양 끝 포함)
+    """
+    kind, lists = plan_search(columns, date_from, date_to, category, payment)
+    if kind == 'empty':
+        return []
+    has_date = date_from is not None or date_to is not None
+    if has_date:
+        lo = date_from if date_from is not None else 0
+        hi = date_to if date_to is not None else date_codec.parse_date(f"{date_codec.MAX_YEAR}-12-31")
+    if has_date and columns['sorted']:
+        # 날짜순이면 기간은 row id 구간 하나 (이진 탐색). 색인 후보보다 적으면 그 구간에서 시작
+        first = bisect_left(columns['date'], lo)
+        last = bisect_right(columns['date'], hi, first)
+        if kind in ('scan', 'month') or last - first <= sum(map(len, lists)):
+            kind = 'date'
+            row_ids = range(first, last)
+            if category is None and payment is None and type is None \
+                    and amount_min is None and amount_max is None:
+                return _reverse_date_runs(row_ids, columns['date'][first:last])
+    if kind == 'scan':
+        row_ids = range(row_count(columns))
+        if type is None and amount_min is None and amount_max is None:
+            return sorted_row_ids(columns)
+    elif kind != 'date':
+        row_ids = _lines_to_row_ids(columns, lists)
+    checks = []
+    if has_date and kind != 'date':
+        checks.append(('date', lo, hi))
+    for name, value in (('category', category), ('payment', payment)):
+        if value is not None and name != kind:
+            code = find_code(columns, name, value)
+            checks.append((name, code, code))
+    if type is not None:
+        checks.append(('type', _TYPE_CODES[type], _TYPE_CODES[type]))
+    if amount_min is not None or amount_max is not None:
+        checks.append(('amount', amount_min if amount_min is not None else 0,
+                       amount_max if amount_max is not None else 2 ** 63 - 1))
+    if _use_numpy(columns):
+        if kind == 'date':
+            ids = np.arange(row_ids.start, row_ids.stop, dtype=np.intp)
+            for name, lo, hi in checks:
+                values = _np_column(columns, name)[ids]
+                ids = ids[(values >= lo) & (values <= hi)]
+        elif kind == 'scan':
+            # 색인을 쓸 수 없는 조건(유형, 금액)만 있으면 열 전체를 한 번에 마스크
+            mask = np.ones(row_count(columns), dtype=bool)
+            for name, lo, hi in checks:
+                values = _np_column(columns, name)
+                mask &= (values >= lo) & (values <= hi)
+            ids = np.flatnonzero(mask)
+        else:
+            ids = np.asarray(row_ids, dtype=np.intp)
+            for name, lo, hi in checks:
+                values = _np_column(columns, name)[ids]
+                ids = ids[(values >= lo) & (values <= hi)]
+        dates = _np_column(columns, 'date')
+        if columns['sorted']:
+            # 후보가 row id 오름차순이면 날짜도 오름차순: 같은 날짜 묶음의 순서만 뒤집음
+            return _reverse_date_runs_np(ids, dates[ids]).tolist()
+        # 날짜 내림차순, 같은 날짜는 row id 오름차순 (안정 정렬)
+        return ids[np.argsort(-dates[ids], kind='stable')].tolist()
+    for name, lo, hi in checks:
+        col = columns[name]
+        row_ids = [i for i in row_ids if lo <= col[i] <= hi]
+    dates = columns['date']
+    if columns['sorted']:
+        return _reverse_date_runs(row_ids, [dates[i] for i in row_ids])
+    return sorted(row_ids, key=dates.__getitem__, reverse=True)
+
+
+def row_count(columns):
+    return len(columns['date'])
+
+
+def get_row(columns, row_id):
+    """행 하나를 조회/편집 기능에서 쓰는 dict 형태로 변환"""
+    return {
+        'idx': columns['line'][row_id],
+        '날짜': date_codec.to_date(columns['date'][row_id]).isoformat(),
+        '유형': TYPE_NAMES[columns['type'][row_id]],
+        '금액': columns['amount'][row_id],
+        '카테고리': columns['category_names'][columns['category'][row_id]],
+        '결제수단': columns['payment_names'][columns['payment'][row_id]],
+    }
+
+
+def get_rows(columns, row_ids):
+    """여러 행을 dict 목록으로 변환 (화면에 보여줄 행에만 사용)"""
+    return [get_row(columns, row_id) for row_id in row_ids]
+
+
+def sorted_row_ids(columns, reverse=True):
+    """날짜순 행 번호 목록 (기본: 최신순, 같은 날짜는 파일 순서 유지)"""
+    if columns['sorted']:
+        # 이미 날짜순: 정렬하지 않음 (O(n))
+        row_ids = range(row_count(columns))
+        return _reverse_date_runs(row_ids, columns['date']) if reverse else list(row_ids)
+    if _use_numpy(columns):
+        dates = _np_column(columns, 'date')
+        return np.argsort(-dates if reverse else dates, kind='stable').tolist()
+    dates = columns['date']
+    return sorted(range(len(dates)), key=dates.__getitem__, reverse=reverse)
+
+
+def _reverse_date_runs(row_ids, dates):
+    """
+    날짜 오름차순인 row_ids(dates는 각 행의 날짜)를 최신순으로 바꿈. 같은 날짜 묶음 안에서는
+    순서를 유지 (안정 정렬과 같은 결과). 묶음 경계는 이진 탐색으로 찾으므로 O(n)
+    """
+    result = []
+    end = len(dates)
+    while end > 0:
+        start = bisect_left(dates, dates[end - 1], 0, end)
+        result.extend(row_ids[start:end])
+        end = start
+    return result
+
+
+def find_code(columns, kind, name):
+    """카테고리/결제수단 문자열의 코드. 가계부에 없으면 None"""
+    return columns[kind + '_codes'].get(name)
+
+
+def filter_row_ids(columns, row_ids, date_from=None, date_to=None, category=None, payment=None):
+    """
+    row_ids 중 조건에 맞는 행만 순서를 유지하여 반환.
+    date_from, date_to: 날짜 ordinal (양 끝 포함), category/payment: 표준명
+    """
+    if _use_numpy(columns):
+        return _filter_row_ids_np(columns, row_ids, date_from, date_to, category, payment)
+    dates = columns['date']
+    result = row_ids
+    if date_from is not None or date_to is not None:
+        lo = date_from if date_from is not None else 0
+        hi = date_to if date_to is not None else date_codec.parse_date(f"{date_codec.MAX_YEAR}-12-31")
+        result = [i for i in result if lo <= dates[i] <= hi]
+    for kind, name in (('category', category), ('payment', payment)):
+        if name is None:
+            continue
+        code = find_code(columns, kind, name)
+        if code is None:
+            return []
+        col = columns[kind]
+        result = [i for i in result if col[i] == code]
+    return result
+
+
+# --------------------------------------------------------------
+# 합계
+# 아래 함수는 'date', 'type', 'amount' 열만 쓰므로 sum_columns로 만든 합계용 열에도 쓸 수 있다.
+# 가계부 전체를 읽는 경로(ledger_summary.scan_ledger, balance_index._build)는 읽은 블록마다
+# sum_columns로 열을 만들어 month_totals/add_day_totals로 더한다.
+# --------------------------------------------------------------
+
+def sum_columns(dates, types, amounts):
+    """
+    ledger_reader가 읽은 블록의 날짜/유형/금액 목록 → 합계용 열 단위 가계부 ('date', 'type', 'amount' 열만).
+    날짜나 유형이 틀린 행은 뺀다
+    """
+    if np is not None and len(dates) >= NUMPY_MIN_ROWS:
+        columns = _sum_columns_np(dates, types, amounts)
+        if columns is not None:
+            return columns
+    date_ords = list(map(date_codec.parse_date, dates))
+    type_codes = list(map(_TYPE_CODES.get, types))
+    if None in date_ords or None in type_codes:
+        keep = [i for i in range(len(dates)) if date_ords[i] is not None and type_codes[i] is not None]
+        date_ords = [date_ords[i] for i in keep]
+        type_codes = [type_codes[i] for i in keep]
+        amounts = [amounts[i] for i in keep]
+    return {'date': array('i', date_ords), 'type': array('b', type_codes), 'amount': array('q', amounts)}
+
+
+def total_asset(columns, row_ids=None):
+    """총 자산 (수입 - 지출). row_ids가 주어지면 그 행들만 합산"""
+    if _use_numpy(columns):
+        types, amounts = _np_column(columns, 'type'), _np_column(columns, 'amount')
+        if row_ids is not None:
+            ids = np.asarray(row_ids, dtype=np.intp)
+            types, amounts = types[ids], amounts[ids]
+        return int(amounts.sum(where=types == TYPE_INCOME)) - int(amounts.sum(where=types != TYPE_INCOME))
+    types = columns['type']
+    amounts = columns['amount']
+    if row_ids is None:
+        row_ids = range(len(amounts))
+    total = 0
+    for i in row_ids:
+        if types[i] == TYPE_INCOME:
+            total += amounts[i]
+        else:
+            total -= amounts[i]
+    return total
+
+
+def range_totals(columns, date_from, date_to):
+    """[date_from, date_to] 기간(날짜 ordinal)의 (총 지출, 총 수입)"""
+    if _use_numpy(columns):
+        dates = _np_column(columns, 'date')
+        amounts = _np_column(columns, 'amount')
+        in_range = (dates >= date_from) & (dates <= date_to)
+        is_income = _np_column(columns, 'type') == TYPE_INCOME
+        return int(amounts.sum(where=in_range & ~is_income)), int(amounts.sum(where=in_range & is_income))
+    dates = columns['date']
+    types = columns['type']
+    amounts = columns['amount']
+    expense = income = 0
+    for i in range(len(dates)):
+        if date_from <= dates[i] <= date_to:
+            if types[i] == TYPE_INCOME:
+                income += amounts[i]
+            else:
+                expense += amounts[i]
+    return expense, income
+
+
+def month_totals(columns):
+    """월별 집계 {'YYYY-MM': {'expense', 'income', 'count'}}"""
+    if _use_numpy(columns):
+        return _month_totals_np(columns)
+    months = {}
+    dates = columns['date']
+    types = columns['type']
+    amounts = columns['amount']
+    # 같은 날짜가 반복되므로 날짜 ordinal → 'YYYY-MM' 변환 결과를 재사용
+    month_of = {}
+    for i in range(len(dates)):
+        key = month_of.get(dates[i])
+        if key is None:
+            key = date_codec.to_date(dates[i]).isoformat()[:7]
+            month_of[dates[i]] = key
+        month = months.get(key)
+        if month is None:
+            month = months[key] = {'expense': 0, 'income': 0, 'count': 0}
+        if types[i] == TYPE_INCOME:
+            month['income'] += amounts[i]
+        else:
+            month['expense'] += amounts[i]
+        month['count'] += 1
+    return months
+
+
+def add_day_totals(columns, income, expense, offset):
+    """
+    날짜별 수입/지출 합계를 income, expense 배열(array('q'))의 [날짜 ordinal - offset] 자리에 더함.
+    (balance_index의 잔고 트리를 만들 때 사용)
+    """
+    if _use_numpy(columns):
+        positions = _np_column(columns, 'date') - offset
+        amounts = _np_column(columns, 'amount')
+        is_income = _np_column(columns, 'type') == TYPE_INCOME
+        for target, mask in ((income, is_income), (expense, ~is_income)):
+            target = np.frombuffer(target, dtype=np.int64)
+            target += _group_sums_np(positions[mask], amounts[mask], len(target))
+        return
+    dates = columns['date']
+    types = columns['type']
+    amounts = columns['amount']
+    for i in range(len(dates)):
+        if types[i] == TYPE_INCOME:
+            income[dates[i] - offset] += amounts[i]
+        else:
+            expense[dates[i] - offset] += amounts[i]
+
+
+# --------------------------------------------------------------
+# NumPy 벡터 연산
+# array 모듈의 배열을 복사 없이 NumPy 배열로 보고 마스크/그룹 합계/정렬을 계산한다.
+# 결과는 순수 파이썬 경로와 같은 형태(int, list, dict)로 돌려준다.
+# --------------------------------------------------------------
+
+def _use_numpy(columns):
+    return np is not None and len(columns['date']) >= NUMPY_MIN_ROWS
+
+
+def _np_column(columns, name):
+    """열 하나를 NumPy 배열로 (같은 메모리를 공유, 복사 없음)"""
+    col = columns[name]
+    return np.frombuffer(col, dtype=np.dtype(col.typecode))
+
+
+def _reverse_date_runs_np(ids, dates):
+    """_reverse_date_runs의 NumPy 버전 (ids, dates는 NumPy 배열)"""
+    size = len(dates)
+    if size == 0:
+        return ids
+    run_starts = np.r_[True, dates[1:] != dates[:-1]]
+    starts = np.flatnonzero(run_starts)
+    ends = np.r_[starts[1:], size]
+    run = np.cumsum(run_starts) - 1
+    result = np.empty_like(ids)
+    # 묶음 k의 원소는 (뒤 묶음들의 크기 합 + 묶음 안의 위치) 자리로
+    result[size - ends[run] + np.arange(size) - starts[run]] = ids
+    return result
+
+
+def _filter_row_ids_np(columns, row_ids, date_from, date_to, category, payment):
+    mask = None
+    if date_from is not None or date_to is not None:
+        dates = _np_column(columns, 'date')
+        lo = date_from if date_from is not None else 0
+        hi = date_to if date_to is not None else date_codec.parse_date(f"{date_codec.MAX_YEAR}-12-31")
+        mask = (dates >= lo) & (dates <= hi)
+    for kind, name in (('category', category), ('payment', payment)):
+        if name is None:
+            continue
+        code = find_code(columns, kind, name)
+        if code is None:
+            return []
+        cond = _np_column(columns, kind) == code
+        mask = cond if mask is None else mask & cond
+    if mask is None:
+        return row_ids
+    ids = np.asarray(row_ids, dtype=np.intp)
+    return ids[mask[ids]].tolist()
+
+
+def _sum_columns_np(dates, types, amounts):
+    """
+    sum_columns의 NumPy 버전: 날짜 문자열을 이어 붙인 바이트를 (행 수, 10) 배열로 보고 한 번에 ordinal로 바꿈.
+    틀린 날짜/유형이 하나라도 있으면 None (순수 파이썬 경로가 그 행만 뺀다)
+    """
+    if set(map(len, dates)) != {10} or set(types) - set(TYPE_NAMES):
+        return None
+    try:
+        chars = np.frombuffer(''.join(dates).encode('ascii'), dtype=np.uint8).reshape(len(dates), 10)
+    except UnicodeEncodeError:
+        return None
+    digits = chars[:, [0, 1, 2, 3, 5, 6, 8, 9]].astype(np.int32) - ord('0')
+    if (digits < 0).any() or (digits > 9).any() or (chars[:, 4] != ord('-')).any() or (chars[:, 7] != ord('-')).any():
+        return None
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 4] * 10 + digits[:, 5]
+    day = digits[:, 6] * 10 + digits[:, 7]
+    if ((year < date_codec.MIN_YEAR) | (year > date_codec.MAX_YEAR) | (month < 1) | (month > 12)).any():
+        return None
+    idx = (year - date_codec.MIN_YEAR) * 12 + month - 1
+    if ((day < 1) | (day > np.asarray(date_codec.days_in_month())[idx])).any():
+        return None
+    date_ords = np.asarray(date_codec.month_starts(), dtype=np.int32)[idx] + day - 1
+    is_income = np.frombuffer(''.join(types).encode('ascii'), dtype=np.uint8) == ord(TYPE_NAMES[TYPE_INCOME])
+    columns = {'date': array('i'), 'type': array('b'), 'amount': array('q', amounts)}
+    columns['date'].frombytes(date_ords.astype(np.int32).tobytes())
+    columns['type'].frombytes(is_income.astype(np.int8).tobytes())
+    return columns
+
+
+def _group_sums_np(idx, amounts, size):
+    """idx[i] 자리마다 amounts[i]를 더한 길이 size의 int64 배열"""
+    if len(idx) == 0:
+        return np.zeros(size, dtype=np.int64)
+    # 합계가 float64로 정확히 표현되는 범위(2^53 미만)면 bincount 가중합, 아니면 정렬 후 구간 합산
+    if int(amounts.max()) * len(amounts) < 2 ** 53:
+        return np.bincount(idx, weights=amounts, minlength=size).astype(np.int64)
+    result = np.zeros(size, dtype=np.int64)
+    order = np.argsort(idx, kind='stable')
+    idx = idx[order]
+    starts = np.flatnonzero(np.r_[True, idx[1:] != idx[:-1]])
+    result[idx[starts]] = np.add.reduceat(amounts[order], starts)
+    return result
+
+
+def _month_totals_np(columns):
+    dates = _np_column(columns, 'date')
+    amounts = _np_column(columns, 'amount')
+    is_income = _np_column(columns, 'type') == TYPE_INCOME
+    # 날짜 ordinal → 달력표 인덱스
+    month_idx = np.searchsorted(np.asarray(date_codec.month_starts()), dates, side='right') - 1
+    size = len(date_codec.month_starts())
+    counts = np.bincount(month_idx, minlength=size)
+    income = _group_sums_np(month_idx[is_income], amounts[is_income], size)
+    expense = _group_sums_np(month_idx[~is_income], amounts[~is_income], size)
+    months = {}
+    for idx in np.flatnonzero(counts).tolist():
+        months[date_codec.month_key(idx)] = {
+            'expense': int(expense[idx]), 'income': int(income[idx]), 'count': int(counts[idx]),
+        }
+    return months
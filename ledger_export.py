@@ -0,0 +1,179 @@
+import json
+import os
+import sys
+import category
+import ledger_pipeline
+from query_edit import parse_search_term
+
+# 한 번에 모아서 쓰는 행 수
+EXPORT_CHUNK_ROWS = 8192
+# 출력 파일 버퍼 크기 (bytes)
+WRITE_BUFFER_SIZE = 1 << 20
+# 내보내기 형식
+EXPORT_FORMATS = ('csv', 'jsonl', 'report')
+
+
+# --------------------------------------------------------------
+# 가계부 내보내기 (CSV, JSON Lines, 요약 보고서)
+# 가계부 파일을 ledger_pipeline으로 한 줄씩 읽어(read_rows → filter_rows) 바로 쓰므로
+# 가계부 크기와 관계없이 메모리 사용량이 일정하다. 행은 파일 순서(행 번호 순)로 나간다.
+# (날짜순 가계부는 날짜 오름차순이며 기간 조건이 있으면 그 기간만 읽는다)
+# 검색 조건은 조회 기능의 검색조회와 같다 (query_edit.parse_search_term).
+# 파일의 카테고리 구분자는 설정 파일의 표준명으로 바꿔 쓴다 (category.category_ids, 종류가 적으므로 한 번씩만).
+# 행은 EXPORT_CHUNK_ROWS개씩 한 문자열로 모아 한 번에 쓴다.
+# --------------------------------------------------------------
+
+CSV_HEADER = "번호,날짜,유형,금액,카테고리,결제수단\n"
+
+
+def _csv_field(text):
+    """CSV 필드 (쉼표, 따옴표, 줄바꿈이 있으면 따옴표로 감쌈)"""
+    if any(c in text for c in ',"\r\n'):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def _json_string(text):
+    return json.dumps(text, ensure_ascii=False)
+
+
+def _write_chunks(f, lines):
+    """줄 문자열들을 EXPORT_CHUNK_ROWS개씩 이어 붙여 쓰기. 쓴 줄 수 반환"""
+    count = 0
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            f.write(''.join(chunk))
+            count += len(chunk)
+            chunk = []
+    f.write(''.join(chunk))
+    return count + len(chunk)
+
+
+def _csv_lines(rows, names):
+    # 카테고리/결제수단은 종류가 적으므로 변환 결과를 재사용
+    quoted = {}
+    for line_num, date_str, type_str, amount, category_id, payment in rows:
+        category_field = quoted.get(category_id)
+        if category_field is None:
+            category_field = quoted[category_id] = _csv_field(names.get(category_id, category_id))
+        payment_field = quoted.get(payment)
+        if payment_field is None:
+            payment_field = quoted[payment] = _csv_field(payment)
+        yield f"{line_num},{date_str},{type_str},{amount},{category_field},{payment_field}\n"
+
+
+def _jsonl_lines(rows, names):
+    # 조회/편집 기능의 dict와 같은 키. 문자열 필드만 json으로 변환 (종류가 적으므로 재사용)
+    quoted = {}
+    for line_num, date_str, type_str, amount, category_id, payment in rows:
+        category_field = quoted.get(category_id)
+        if category_field is None:
+            category_field = quoted[category_id] = _json_string(names.get(category_id, category_id))
+        payment_field = quoted.get(payment)
+        if payment_field is None:
+            payment_field = quoted[payment] = _json_string(payment)
+        yield (f'{{"idx": {line_num}, "날짜": "{date_str}", "유형": "{type_str}", "금액": {amount}, '
+               f'"카테고리": {category_field}, "결제수단": {payment_field}}}\n')
+
+
+def _summarize(rows, names):
+    """행들의 총계, 월별, 카테고리별(표준명), 결제수단별 집계 (행을 저장하지 않음)"""
+    totals = {'expense': 0, 'income': 0, 'count': 0}
+    months = {}
+    categories = {}
+    payments = {}
+    for _, date_str, type_str, amount, category_id, payment in rows:
+        key = 'income' if type_str == 'I' else 'expense'
+        totals[key] += amount
+        totals['count'] += 1
+        # 삭제된 구분자들은 모두 '미분류' 한 줄로 모임
+        category_name = names.get(category_id, category_id)
+        for group, name in ((months, date_str[:7]), (categories, category_name), (payments, payment)):
+            entry = group.get(name)
+            if entry is None:
+                entry = group[name] = {'expense': 0, 'income': 0, 'count': 0}
+            entry[key] += amount
+            entry['count'] += 1
+    return totals, months, categories, payments
+
+
+def _report_lines(user_id, search_term, summary):
+    totals, months, categories, payments = summary
+    yield f"가계부 요약 보고서 (ID: {user_id}, 조건: {search_term or '전체'})\n"
+    yield "==============================================================\n"
+    yield f"총 수입 ₩{totals['income']:,} / 총 지출 ₩{totals['expense']:,}\n"
+    yield f"수입 - 지출 ₩{totals['income'] - totals['expense']:,} / 내역 {totals['count']:,}건\n"
+    for title, group in (("월별", months), ("카테고리별", categories), ("결제수단별", payments)):
+        yield "--------------------------------------------------------------\n"
+        yield f"[{title}]\n"
+        for name in sorted(group):
+            entry = group[name]
+            yield f"{name:<10} 지출:{entry['expense']:>15,} / 수입:{entry['income']:>15,} / {entry['count']:>9,}건\n"
+    yield "==============================================================\n"
+
+
+def export_ledger(user_id, out_path, fmt, search_term=None):
+    """
+    사용자의 가계부(search_term이 있으면 검색조회 결과)를 out_path에 fmt 형식으로 내보냄.
+    내보낸 내역 수 반환 (보고서는 요약한 내역 수). 검색 조건이 틀리면 ValueError
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"알 수 없는 형식입니다: {fmt}")
+    names, ids = category.category_ids(user_id)
+    conditions = {}
+    if search_term:
+        # 카테고리는 사용자 설정 파일의 표준명/동의어로 찾아 구분자로 검색
+        category.load_user_categories(user_id)
+        conditions = parse_search_term(search_term)
+        if conditions == -1 or conditions == -2:
+            raise ValueError("검색 조건이 올바르지 않습니다.")
+        if conditions and 'category' in conditions:
+            conditions['category'] = ids.get(conditions['category'], conditions['category'])
+    if conditions:
+        # 날짜순 가계부이면 기간 밖은 읽지 않음
+        rows = ledger_pipeline.read_rows(user_id, date_from=conditions.get('date_from'),
+                                         date_to=conditions.get('date_to'))
+    else:
+        rows = ledger_pipeline.read_rows(user_id)
+    if conditions is None:
+        # 존재하지 않는 날짜: 결과 없음
+        rows = iter(())
+    elif conditions:
+        rows = ledger_pipeline.filter_rows(rows, **conditions)
+
+    # 다 쓴 뒤 교체 (중간에 실패해도 이전 내보내기 파일이 반쯤 덮이지 않음)
+    tmp_path = f"{out_path}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', newline='', buffering=WRITE_BUFFER_SIZE) as f:
+            if fmt == 'csv':
+                f.write(CSV_HEADER)
+                count = _write_chunks(f, _csv_lines(rows, names))
+            elif fmt == 'jsonl':
+                count = _write_chunks(f, _jsonl_lines(rows, names))
+            else:
+                summary = _summarize(rows, names)
+                count = summary[0]['count']
+                _write_chunks(f, _report_lines(user_id, search_term, summary))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, out_path)
+    return count
+
+
+# 사용법: python ledger_export.py <ID> csv|jsonl|report <출력 파일> [검색 조건]
+if __name__ == "__main__":
+    if len(sys.argv) not in (4, 5) or sys.argv[2] not in EXPORT_FORMATS:
+        print("사용법: python ledger_export.py <ID> csv|jsonl|report <출력 파일> [검색 조건]")
+        sys.exit(1)
+    user_id, fmt, out_path = sys.argv[1], sys.argv[2], sys.argv[3]
+    search_term = sys.argv[4] if len(sys.argv) == 5 else None
+    try:
+        count = export_ledger(user_id, out_path, fmt, search_term)
+    except Exception as e:
+        print(f"!오류: {e}")
+        sys.exit(1)
+    print(f"{count}개의 내역을 {out_path}에 내보냈습니다.")
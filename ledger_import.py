@@ -0,0 +1,255 @@
+import csv
+import sys
+from pathlib import Path
+import category
+import date_codec
+import ledger_storage
+import ledger_summary
+from query_edit import get_valid_amount
+
+# 이 행 수만큼 오류를 출력하고 나머지는 개수만 알림
+MAX_REPORTED_ERRORS = 20
+
+
+# --------------------------------------------------------------
+# 은행/카드 내역 일괄 가져오기 (CSV, TSV)
+# 첫 줄(머리글)의 열 이름으로 날짜/유형/금액/카테고리/결제수단 열을 찾고,
+# 카테고리와 결제수단은 사용자 설정 파일의 별칭 표(category.resolve_category/resolve_payment)로 표준명으로 바꾼다.
+# 유형은 유형 열 또는 출금/입금 열로 정한다. 둘 다 없으면 금액의 부호로 정할지(--sign),
+# 모든 행을 한 유형으로 볼지(--default-type)를 지정해야 한다 (지정하지 않으면 추측하지 않고 오류).
+# 모든 행을 한 번에 검사하여 오류가 하나라도 있으면 아무것도 저장하지 않으며,
+# 지출이 수입보다 커지는지는 전체 내역을 더한 뒤 한 번만 검사한다.
+# 저장은 ledger_storage.append_rows 한 번 (가계부 파일 끝에 한 번에 추가, 날짜순 가계부는 날짜 위치에 끼워 넣음).
+# --------------------------------------------------------------
+
+# 머리글 열 이름 → 항목 (소문자, 공백 제거 후 비교)
+HEADER_NAMES = {
+    'date': ['날짜', '거래일', '거래일자', '거래일시', '이용일', '이용일자', '승인일', '승인일자', 'date'],
+    'type': ['유형', '구분', '거래구분', '입출금구분', 'type'],
+    'amount': ['금액', '거래금액', '이용금액', '승인금액', 'amount'],
+    'withdrawal': ['출금', '출금액', '출금금액', '찾으신금액', 'withdrawal'],
+    'deposit': ['입금액', '입금금액', '맡기신금액', 'deposit'],
+    'category': ['카테고리', '분류', 'category'],
+    'payment': ['결제수단', '결제방법', '거래수단', 'payment', 'method'],
+}
+
+# 유형 열의 값 → E/I
+TYPE_NAMES = {
+    'e': 'E', '지출': 'E', '출금': 'E', 'expense': 'E',
+    'i': 'I', '수입': 'I', '입금': 'I', 'income': 'I',
+}
+
+# 유형 열/출금·입금 열이 없을 때 금액의 부호로 유형을 정하는 방법 (음수는 지출, 양수는 수입)
+SIGN_TYPE = 'sign'
+
+# 카테고리 열이 없을 때 쓰는 카테고리 (수입은 입금 카테고리의 현재 표준명, 설정이 없으면 INCOME_CATEGORY)
+DEFAULT_EXPENSE_CATEGORY = '기타'
+INCOME_CATEGORY = '입금'
+
+
+def _find_columns(header):
+    """머리글에서 항목별 열 번호 {'date': 0, ...} 반환"""
+    names = {name.lower(): field for field, aliases in HEADER_NAMES.items() for name in aliases}
+    columns = {}
+    for i, title in enumerate(header):
+        field = names.get(title.replace(' ', '').lower())
+        if field is not None and field not in columns:
+            columns[field] = i
+    if 'date' not in columns:
+        raise ValueError("날짜 열을 찾을 수 없습니다.")
+    if 'amount' not in columns and 'withdrawal' not in columns and 'deposit' not in columns:
+        raise ValueError("금액 열을 찾을 수 없습니다.")
+    return columns
+
+
+def _parse_date(value, today):
+    """'2024.01.05', '2024/01/05 13:20' 같은 날짜를 YYYY-MM-DD로 바꾸어 검사"""
+    date_str = value.strip()[:10].replace('.', '-').replace('/', '-')
+    date_ord = date_codec.parse_date(date_str)
+    if date_ord is None:
+        raise ValueError("날짜는 YYYY-MM-DD 형식이어야 합니다.")
+    if date_ord > today:
+        raise ValueError("오늘 이후의 날짜는 입력할 수 없습니다.")
+    return date_str
+
+
+def _parse_amount(value):
+    """'12,000원', '₩12,000', '-12000' 같은 금액을 (부호, 금액)으로"""
+    amount_str = value.strip().replace(',', '').replace('₩', '').replace('원', '').strip()
+    sign = 1
+    if amount_str.startswith('-'):
+        sign = -1
+        amount_str = amount_str[1:]
+    elif amount_str.startswith('+'):
+        amount_str = amount_str[1:]
+    return sign, get_valid_amount(amount_str)
+
+
+def _has_amount(value):
+    """출금/입금 열에 0이 아닌 금액이 있는지 ('0', '' 은 없음)"""
+    return any(c in '123456789' for c in value)
+
+
+def _cell(row, columns, field):
+    i = columns.get(field)
+    if i is None or i >= len(row):
+        return ''
+    return row[i].strip()
+
+
+def _convert_row(row, columns, default_payment, income_category, category_ids, today, type_rule=None):
+    """
+    한 행을 (날짜, 유형, 금액, 카테고리, 결제수단)으로 변환. 틀리면 ValueError.
+    type_rule: 유형 열이 없을 때 'E'/'I'(모든 행을 그 유형으로) 또는 SIGN_TYPE(금액의 부호)
+    """
+    date = _parse_date(_cell(row, columns, 'date'), today)
+
+    # 금액과 유형: 출금/입금 열이 따로 있으면 값이 있는 쪽, 아니면 유형 열 또는 type_rule
+    withdrawal = _has_amount(_cell(row, columns, 'withdrawal'))
+    deposit = _has_amount(_cell(row, columns, 'deposit'))
+    if 'amount' not in columns and withdrawal == deposit:
+        raise ValueError("출금액과 입금액 중 하나만 있어야 합니다.")
+    if 'amount' not in columns:
+        type = 'E' if withdrawal else 'I'
+        sign, amount = _parse_amount(_cell(row, columns, 'withdrawal' if withdrawal else 'deposit'))
+    else:
+        sign, amount = _parse_amount(_cell(row, columns, 'amount'))
+        if 'type' in columns:
+            type = TYPE_NAMES.get(_cell(row, columns, 'type').lower())
+            if type is None:
+                raise ValueError("유형은 지출(E) 또는 수입(I)이어야 합니다.")
+        elif type_rule == SIGN_TYPE:
+            type = 'E' if sign < 0 else 'I'
+        elif type_rule in ('E', 'I'):
+            if sign < 0:
+                raise ValueError("유형을 지정해 가져올 때는 금액에 부호를 쓸 수 없습니다.")
+            type = type_rule
+        else:
+            raise ValueError("유형 열이 없으면 유형을 정하는 방법을 지정해야 합니다.")
+
+    # 카테고리: 수입은 항상 입금 카테고리 (income()과 같음), 지출은 동의어 맵으로 표준명 변환
+    if type == 'I':
+        category_name = income_category
+    elif 'category' in columns:
+        category_name = category.resolve_category(_cell(row, columns, 'category'))
+        if category_name is None:
+            raise ValueError("올바른 카테고리를 입력해야 합니다.")
+    else:
+        category_name = DEFAULT_EXPENSE_CATEGORY
+    # 가계부에는 구분자로 저장되므로 설정 파일에 있는 카테고리여야 함
+    if category_name not in category_ids:
+        raise ValueError("올바른 카테고리를 입력해야 합니다.")
+
+    if 'payment' in columns:
+        payment = category.resolve_payment(_cell(row, columns, 'payment'))
+    else:
+        payment = default_payment
+    if payment is None:
+        raise ValueError("올바른 결제수단을 입력해야 합니다.")
+
+    return date, type, amount, category_name, payment
+
+
+def read_statement(user_id, file_path, default_payment=None, type_rule=None):
+    """
+    내역 파일을 읽어 전부 검사. (가져올 내역 목록, 오류 목록[(행 번호, 메시지)]) 반환.
+    구분자는 확장자(.tsv/.txt는 탭)와 첫 줄로 판단.
+    default_payment: 결제수단 열이 없을 때 모든 행에 쓸 결제수단 (동의어 가능)
+    type_rule: 유형 열과 출금/입금 열이 없을 때 유형을 정하는 방법. SIGN_TYPE(금액의 부호) 또는
+    모든 행에 쓸 유형(지출/수입, E/I 등 유형 열의 값). 없는데 지정하지 않으면 ValueError
+    """
+    if type_rule is not None and type_rule != SIGN_TYPE:
+        type_rule = TYPE_NAMES.get(type_rule.strip().lower())
+        if type_rule is None:
+            raise ValueError("유형은 지출(E) 또는 수입(I)이어야 합니다.")
+    # 설정 파일이 없거나 카테고리가 없으면 기본 카테고리로 찾음
+    category.load_user_categories(user_id)
+    if default_payment is not None:
+        default_payment = category.resolve_payment(default_payment.strip())
+        if default_payment is None:
+            raise ValueError("올바른 결제수단을 입력해야 합니다.")
+    names, ids = category.category_ids(user_id)
+    income_category = names.get(category.INCOME_SEPARATOR, INCOME_CATEGORY)
+    today = date_codec.today_ordinal()
+
+    entries = []
+    errors = []
+    with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        header_line = f.readline()
+        if Path(file_path).suffix.lower() in ('.tsv', '.txt') or '\t' in header_line:
+            delimiter = '\t'
+        else:
+            delimiter = ','
+        columns = _find_columns(next(csv.reader([header_line], delimiter=delimiter), []))
+        if 'payment' not in columns and default_payment is None:
+            raise ValueError("결제수단 열이 없으면 결제수단을 지정해야 합니다.")
+        if 'amount' in columns and 'type' not in columns and type_rule is None:
+            raise ValueError("유형 열(또는 출금/입금 열)이 없으면 --sign 또는 --default-type으로 유형을 정해야 합니다.")
+        for line_num, row in enumerate(csv.reader(f, delimiter=delimiter), 2):
+            if not any(cell.strip() for cell in row):
+                continue
+            try:
+                entries.append(_convert_row(row, columns, default_payment, income_category, ids, today,
+                                            type_rule))
+            except ValueError as e:
+                errors.append((line_num, str(e)))
+    return entries, errors
+
+
+def import_statement(user_id, file_path, default_payment=None, type_rule=None):
+    """
+    내역 파일을 가계부에 추가. 추가한 내역 수 반환 (인자는 read_statement와 같음).
+    오류가 있는 행이 있거나 지출이 수입보다 커지면 ValueError (아무것도 저장하지 않음)
+    """
+    entries, errors = read_statement(user_id, file_path, default_payment, type_rule)
+    if errors:
+        for line_num, message in errors[:MAX_REPORTED_ERRORS]:
+            print(f"{line_num}행: {message}")
+        if len(errors) > MAX_REPORTED_ERRORS:
+            print(f"... 외 {len(errors) - MAX_REPORTED_ERRORS}개 행")
+        raise ValueError(f"{len(errors)}개 행에 오류가 있어 가져오지 않았습니다.")
+    if not entries:
+        return 0
+    # 지출이 수입보다 큰 경우 검사 (전체 내역을 더한 뒤 한 번)
+    total = ledger_storage.total_asset(user_id)
+    total += sum(ledger_summary.entry_amount(type, amount) for _, type, amount, _, _ in entries)
+    if total < 0:
+        raise ValueError(f"가져오면 지출이 수입보다 커집니다. (가져온 뒤 총 자산 ₩{total:,})")
+    ledger_storage.append_rows(user_id, entries)
+    return len(entries)
+
+
+def _parse_args(args):
+    """명령행 인자 → (ID, 내역 파일, 결제수단 또는 None, type_rule). 틀리면 None"""
+    args = list(args)
+    type_rule = None
+    if '--sign' in args:
+        args.remove('--sign')
+        type_rule = SIGN_TYPE
+    if '--default-type' in args:
+        i = args.index('--default-type')
+        if type_rule is not None or i + 1 >= len(args):
+            return None
+        type_rule = args[i + 1]
+        del args[i:i + 2]
+    if len(args) not in (2, 3) or any(arg.startswith('--') for arg in args):
+        return None
+    return args[0], args[1], args[2] if len(args) == 3 else None, type_rule
+
+
+# 사용법: python ledger_import.py <ID> <내역 파일> [결제수단] [--sign | --default-type 지출|수입]
+#   유형 열(또는 출금/입금 열)이 없는 파일은 --sign(음수는 지출, 양수는 수입) 또는
+#   --default-type(모든 행을 그 유형으로)을 지정해야 가져온다.
+if __name__ == "__main__":
+    parsed = _parse_args(sys.argv[1:])
+    if parsed is None:
+        print("사용법: python ledger_import.py <ID> <내역 파일(CSV/TSV)> [결제수단] [--sign | --default-type 지출|수입]")
+        sys.exit(1)
+    user_id, file_path, default_payment, type_rule = parsed
+    try:
+        count = import_statement(user_id, file_path, default_payment, type_rule)
+    except Exception as e:
+        print(f"!오류: {e}")
+        sys.exit(1)
+    print(f"{count}개의 내역을 가져왔습니다.")
+    print(f"현재 {user_id}님의 총 자산은 ₩{ledger_storage.total_asset(user_id)}입니다.")
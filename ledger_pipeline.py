@@ -0,0 +1,153 @@
+import codecs
+from pathlib import Path
+import date_codec
+import ledger_columns
+import ledger_reader
+import sorted_ledger
+
+# 홈 경로 설정
+HOME_DIR = Path.cwd()
+# 가계부 파일 접미사
+LEDGER_FILE_SUFFIX = "_HL.txt"
+# 파일을 나누어 읽는 크기 (bytes)
+CHUNK_SIZE = 1 << 16
+# 합계 계산에 필요한 열만 읽음 (카테고리/결제수단은 변환하지 않음)
+SUM_FIELDS = ('date', 'type', 'amount')
+
+
+# --------------------------------------------------------------
+# 가계부 스트리밍 파이프라인
+# 읽기 → 필터 → 집계 를 제너레이터로 이어 붙인다. 어느 단계도 파일 전체를 메모리에 올리지 않는다.
+# 행 단위: 받는 쪽(ledger_export)이 한 행씩 쓰거나 집계한다.
+#   예) filter_rows(read_rows(user_id, date_from=a, date_to=b), date_from=a, date_to=b)
+#   행(row)은 (행 번호, 날짜, 유형, 금액, 카테고리, 결제수단) 튜플.
+# 블록 단위 합계: 읽을 때 날짜/유형/금액 열만 남기고(read_columns) 블록마다 더한다.
+# 총계/월별 집계(ledger_summary)와 잔고 트리(balance_index)를 다시 만들 때 사용.
+#   예) sum_by_month(read_columns(user_id)), sum_by_day(read_columns(user_id), income, expense, offset)
+#   블록은 ledger_columns.sum_columns로 만든 열 dict (NumPy가 있으면 블록마다 벡터 연산)
+# --------------------------------------------------------------
+
+
+def read_lines(f, stats=None, digest=None, limit=None, tail_size=0):
+    """
+    열린 바이너리 파일에서 줄을 하나씩 돌려주는 제너레이터 (텍스트 모드 읽기와 같은 줄 구분,
+    줄 끝 '\\n' 포함). limit이 주어지면 그 바이트 수까지만 읽는다.
+    digest(hashlib 객체)가 주어지면 읽은 바이트를 함께 해시하고, 다 읽은 뒤 stats['lines']에
+    줄 수, stats['tail']에 마지막 tail_size 바이트를 기록.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    pending = ''
+    tail = b''
+    count = 0
+    while True:
+        chunk_size = CHUNK_SIZE if limit is None else min(CHUNK_SIZE, limit)
+        chunk = f.read(chunk_size) if chunk_size else b''
+        if limit is not None:
+            limit -= len(chunk)
+        if digest is not None:
+            digest.update(chunk)
+        if tail_size:
+            tail = (tail + chunk)[-tail_size:]
+        final = not chunk
+        text = pending + decoder.decode(chunk, final)
+        # '\r\n'이 두 덩어리에 걸쳐 있을 수 있으므로 끝의 '\r'은 다음 덩어리로 미룸
+        carry = ''
+        if not final and text.endswith('\r'):
+            text, carry = text[:-1], '\r'
+        lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+        pending = lines.pop() + carry
+        for line in lines:
+            count += 1
+            yield line + '\n'
+        if final:
+            break
+    if pending:
+        count += 1
+        yield pending
+    if stats is not None:
+        stats['lines'] = count
+        stats['tail'] = tail
+
+
+def read_rows(user_id, stats=None, date_from=None, date_to=None):
+    """
+    가계부 파일의 행을 하나씩 돌려주는 제너레이터 (빈 줄 제외, 형식 오류는 ValueError).
+    날짜순 가계부(sorted_ledger)이면 date_from(ordinal) 전의 줄은 대부분 건너뛰고 date_to 뒤에서 멈춤.
+    기간 밖의 행이 섞일 수 있으므로 기간 조건은 filter_rows로 따로 검사해야 한다 (stats를 쓰면 전체를 읽음)
+    """
+    ledger_file_path = HOME_DIR / f"{user_id}{LEDGER_FILE_SUFFIX}"
+    if not ledger_file_path.exists():
+        return
+    start = None
+    if stats is None and (date_from is not None or date_to is not None):
+        start = sorted_ledger.find_start(user_id, date_from)
+    if start is None:
+        yield from ledger_reader.iter_ledger_fields(ledger_file_path, stats=stats)
+        return
+    first_line, offset = start
+    last = date_codec.to_date(date_to).isoformat() if date_to is not None else None
+    for row in ledger_reader.iter_ledger_fields(ledger_file_path, offset=offset, first_line=first_line):
+        if last is not None and row[1] > last:
+            break
+        yield row
+
+
+def filter_rows(rows, date_from=None, date_to=None, category=None, payment=None,
+                type=None, amount_min=None, amount_max=None):
+    """
+    조건에 맞는 행만 통과시키는 제너레이터.
+    date_from, date_to: 날짜 ordinal (양 끝 포함), category/payment: 표준명,
+    type: 'E' 또는 'I', amount_min/amount_max: 금액 범위 (양 끝 포함)
+    """
+    for row in rows:
+        if date_from is not None or date_to is not None:
+            date_ord = date_codec.parse_date(row[1])
+            if date_ord is None:
+                continue
+            if date_from is not None and date_ord < date_from:
+                continue
+            if date_to is not None and date_ord > date_to:
+                continue
+        if category is not None and row[4] != category:
+            continue
+        if payment is not None and row[5] != payment:
+            continue
+        if type is not None and row[2] != type:
+            continue
+        if amount_min is not None and row[3] < amount_min:
+            continue
+        if amount_max is not None and row[3] > amount_max:
+            continue
+        yield row
+
+
+def read_columns(user_id):
+    """
+    가계부 파일을 블록 단위로 읽어 블록마다 합계용 열(날짜/유형/금액)을 돌려주는 제너레이터.
+    빈 줄/삭제된 줄은 건너뛰고, 형식 오류는 ValueError (날짜/유형이 틀린 행은 sum_columns가 뺀다)
+    """
+    ledger_file_path = HOME_DIR / f"{user_id}{LEDGER_FILE_SUFFIX}"
+    if not ledger_file_path.exists():
+        return
+    for _, (dates, types, amounts) in ledger_reader.iter_ledger_batches(ledger_file_path, SUM_FIELDS):
+        yield ledger_columns.sum_columns(dates, types, amounts)
+
+
+def sum_by_month(batches):
+    """블록들의 월별 집계 {'YYYY-MM': {'expense', 'income', 'count'}}"""
+    months = {}
+    for columns in batches:
+        for key, batch in ledger_columns.month_totals(columns).items():
+            month = months.get(key)
+            if month is None:
+                months[key] = batch
+            else:
+                for name in month:
+                    month[name] += batch[name]
+    return months
+
+
+def sum_by_day(batches, income, expense, offset):
+    """블록들의 날짜별 수입/지출 합계를 income, expense 배열의 [날짜 ordinal - offset] 자리에 더함"""
+    for columns in batches:
+        ledger_columns.add_day_totals(columns, income, expense, offset)
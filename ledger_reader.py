@@ -0,0 +1,124 @@
+import mmap
+import os
+from itertools import repeat
+
+# 가계부 한 줄의 필드 순서: <날짜><탭><유형><탭><금액><탭><카테고리><탭><결제수단>
+FIELD_NAMES = ('date', 'type', 'amount', 'category', 'payment')
+_FIELD_INDEX = {name: i for i, name in enumerate(FIELD_NAMES)}
+# 삭제된 줄 표시: 줄의 첫 글자를 이 문자로 덮어쓴다 (날짜는 숫자로 시작하므로 구분됨)
+TOMBSTONE = '#'
+_TOMBSTONE_BYTE = TOMBSTONE.encode('ascii')
+_TOMBSTONE_CODE = _TOMBSTONE_BYTE[0]
+# 한 번에 나누어 처리하는 블록 크기 (bytes)
+READ_BLOCK_SIZE = 1 << 20
+
+
+def iter_ledger_batches(file_path, fields=FIELD_NAMES, stats=None, offset=0, first_line=1):
+    """
+    가계부 파일을 mmap으로 열어 블록마다 (행 번호 목록, 요청한 필드별 값 목록) 을 돌려주는 지연 반복자.
+    파일을 한 번에 읽지 않고 줄 경계에서 끊은 블록 단위로 처리하며 (메모리 사용량 일정),
+    요청한 필드만 열로 모으고 그 열만 변환한다. 금액은 int, 나머지는 str.
+    빈 줄과 삭제 표시(TOMBSTONE)된 줄은 건너뛰고, 필드가 5개가 아니거나 변환할 수 없는 줄은 ValueError (메시지: 행 번호).
+    stats가 주어지면 다 읽은 뒤 stats['line_count']에 전체 줄 수(빈 줄 포함)를 기록.
+    offset, first_line: 파일 중간(first_line번째 줄이 시작하는 바이트 위치)부터 읽을 때 사용
+    """
+    indices = [_FIELD_INDEX[name] for name in fields]
+    check_amount = 'amount' in fields
+    decode_all = sum(name != 'amount' for name in fields) > 2
+    line_num = first_line - 1
+    if os.path.getsize(file_path) > offset:
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for block in _iter_blocks(mm, offset):
+                # 블록 전체를 변환하지 않고 bytes 그대로 나눈 뒤 요청한 열만 변환
+                lines = block.split(b'\n')
+                first = line_num + 1
+                line_num += len(lines)
+                lines = list(map(bytes.strip, lines))
+                if b'' in lines or _TOMBSTONE_BYTE in block:
+                    line_nums = [first + i for i, line in enumerate(lines) if line and line[0] != _TOMBSTONE_CODE]
+                    lines = [line for line in lines if line and line[0] != _TOMBSTONE_CODE]
+                    if not lines:
+                        continue
+                else:
+                    line_nums = range(first, line_num + 1)
+                # 줄마다 리스트를 만들지 않도록 탭 수로 형식을 검사한 뒤 블록 전체를 한 번에 나눔
+                if set(map(bytes.count, lines, repeat(b'\t'))) != {4}:
+                    raise ValueError(f"{line_nums[_find_bad_line(lines, check_amount)]}행")
+                if decode_all:
+                    # 문자열 열이 대부분이면 블록을 한 번에 변환하는 편이 빠름
+                    flat = _decode_split(b'\t'.join(lines), '\t', line_nums, len(FIELD_NAMES))
+                else:
+                    flat = b'\t'.join(lines).split(b'\t')
+                values = []
+                for name, idx in zip(fields, indices):
+                    # 5개씩 이어진 필드에서 idx번째 열만 잘라냄
+                    col = flat[idx::5]
+                    if name == 'amount':
+                        try:
+                            col = list(map(int, col))
+                        except ValueError:
+                            raise ValueError(f"{line_nums[_find_bad_line(lines, check_amount)]}행")
+                    elif not decode_all:
+                        # 요청한 열만 이어 붙여 한 번에 변환 (C 구현이라 필드마다 변환하는 것보다 빠름)
+                        col = _decode_split(b'\n'.join(col), '\n', line_nums, 1)
+                    values.append(col)
+                yield line_nums, values
+    if stats is not None:
+        stats['line_count'] = line_num
+
+
+def is_record(line):
+    """앞뒤 공백을 뗀 줄이 내역이면 True (빈 줄, 삭제된 줄이 아님)"""
+    return line != '' and line[0] != TOMBSTONE
+
+
+def iter_ledger_fields(file_path, fields=FIELD_NAMES, stats=None, offset=0, first_line=1):
+    """
+    iter_ledger_batches를 한 줄씩 풀어 (행 번호, 요청한 필드...) 를 돌려주는 지연 반복자.
+    """
+    for line_nums, values in iter_ledger_batches(file_path, fields, stats, offset, first_line):
+        yield from zip(line_nums, *values)
+
+
+def _decode_split(data, sep, line_nums, fields_per_line):
+    """
+    data를 UTF-8로 변환해 sep으로 나눈 목록. data는 줄마다 fields_per_line개의 필드를 sep으로 이은 것이며,
+    변환할 수 없는 바이트가 있으면 그 줄의 번호로 ValueError
+    """
+    try:
+        return data.decode('utf-8').split(sep)
+    except UnicodeDecodeError as e:
+        bad = data.count(sep.encode('ascii'), 0, e.start) // fields_per_line
+        raise ValueError(f"{line_nums[bad]}행")
+
+
+def _find_bad_line(lines, check_amount):
+    """블록(bytes 줄 목록)에서 처음으로 형식이 틀린 줄의 위치 (필드 수, 요청한 경우 금액 형식)"""
+    for i, line in enumerate(lines):
+        parts = line.split(b'\t')
+        if len(parts) != 5:
+            return i
+        if check_amount:
+            try:
+                int(parts[2])
+            except ValueError:
+                return i
+
+
+def _iter_blocks(mm, pos=0):
+    """mmap을 pos부터 줄 경계에서 끊은 약 READ_BLOCK_SIZE 크기의 bytes 블록으로 나누어 반환"""
+    size = len(mm)
+    while pos < size:
+        limit = pos + READ_BLOCK_SIZE
+        if limit >= size:
+            # 마지막 블록: 파일 끝 줄바꿈 뒤에는 줄이 없음
+            end = size - 1 if mm[size - 1] == 0x0A else size
+        else:
+            end = mm.rfind(b'\n', pos, limit)
+            if end == -1:
+                # 블록보다 긴 줄
+                end = mm.find(b'\n', limit)
+                if end == -1:
+                    end = size
+        yield mm[pos:end]
+        pos = end + 1
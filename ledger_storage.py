@@ -0,0 +1,224 @@
+import os
+import re
+import sys
+import category
+import file_rewrite
+import storage_sqlite
+import storage_tsv
+
+# --------------------------------------------------------------
+# 가계부 저장소 인터페이스
+# 조회/편집/입력/잔고/예산 기능은 이 모듈의 함수로만 가계부에 접근하고,
+# 실제 저장은 선택된 백엔드 모듈이 담당한다.
+#   tsv    : <ID>_HL.txt 파일 (기본값, storage_tsv)
+#   sqlite : household_ledger.db (storage_sqlite, 검색/합계를 SQL로 처리)
+# 백엔드는 환경 변수 HL_STORAGE 또는 set_backend()로 고른다.
+# 백엔드 모듈은 아래 함수를 같은 이름, 같은 인자로 제공해야 한다.
+#   start_session(user_id), end_session()
+#   load_rows(user_id), search_rows(user_id, date_from, date_to, category, payment, type, amount_min, amount_max)
+#   search_result(user_id, 검색 조건은 search_rows와 같음) → {'count': 내역 수, 'fetch': fetch(start, stop)}
+#     (search_rows 결과의 [start:stop] 구간만 dict로 만드는 fetch. 화면에 보여줄 페이지만 가져올 때 사용)
+#   total_asset(user_id), range_totals(user_id, date_from, date_to), month_expenses(user_id, months)
+#   append_row(user_id, date, type, amount, category, payment), save_rows(user_id, rows)
+#   append_rows(user_id, entries) → 추가한 첫 내역의 idx
+#   update_row(user_id, idx, date, type, amount, category, payment) → 바뀐 내역의 idx, delete_row(user_id, idx)
+# 행은 {'idx', '날짜', '유형', '금액', '카테고리', '결제수단'} dict, 날짜/금액 조건은 양 끝 포함 (날짜는 ordinal).
+#
+# 카테고리: 백엔드에는 구분자(C1, C2, ...)를 저장하고, 이 모듈이 설정 파일(category.category_ids)로
+# 쓸 때는 표준명 → 구분자, 읽을 때는 구분자 → 표준명으로 바꾼다 (삭제된 구분자는 '미분류').
+# 읽은 행에는 저장된 구분자를 '구분자' 키로 함께 넣는다 ('미분류' 내역을 고칠 때 그 구분자를 그대로 씀).
+# 쓰는 함수는 표준명 대신 설정 파일에 있는 구분자(삭제된 구분자 포함)도 받고, 둘 다 아니면 ValueError.
+# 표준명이 그대로 저장된 이전 가계부는 파일 검사(fileCheck)가 처음 발견할 때 migrate_categories로 바꾼다.
+# --------------------------------------------------------------
+
+BACKENDS = {
+    'tsv': storage_tsv,
+    'sqlite': storage_sqlite,
+}
+DEFAULT_BACKEND = 'tsv'
+# 가계부에 저장하는 카테고리 구분자 형식 (fileCheck.check_valid_category와 같음)
+_SEPARATOR_PATTERN = re.compile(r'C[1-9][0-9]*')
+
+_backend = BACKENDS.get(os.environ.get('HL_STORAGE', DEFAULT_BACKEND), BACKENDS[DEFAULT_BACKEND])
+
+
+def set_backend(name):
+    """사용할 백엔드 변경 ('tsv' 또는 'sqlite')"""
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"알 수 없는 저장소입니다: {name}")
+    _backend.end_session()
+    _backend = BACKENDS[name]
+
+
+def backend_name():
+    return next(name for name, module in BACKENDS.items() if module is _backend)
+
+
+def start_session(user_id):
+    """로그인 세션 시작 (백엔드의 캐시/연결 준비)"""
+    _backend.start_session(user_id)
+
+
+def end_session():
+    """로그인 세션 종료"""
+    _backend.end_session()
+
+
+def _category_id(user_id, name):
+    """카테고리 표준명(또는 설정 파일에 있는 구분자) → 저장할 구분자. 둘 다 아니면 ValueError"""
+    names, ids = category.category_ids(user_id)
+    if name in ids:
+        return ids[name]
+    if name in names:
+        return name
+    raise ValueError(f"설정 파일에 없는 카테고리입니다: {name}")
+
+
+def _row_category_id(user_id, row):
+    """dict 행의 저장할 구분자 ('미분류'로 읽은 행은 읽을 때의 구분자)"""
+    if row['카테고리'] == category.UNCATEGORIZED and '구분자' in row:
+        return row['구분자']
+    return _category_id(user_id, row['카테고리'])
+
+
+def _with_names(user_id, rows):
+    """백엔드가 만든 dict 행들의 카테고리 구분자를 표준명으로 바꾸고 구분자는 '구분자' 키로 남겨 반환"""
+    names = category.category_ids(user_id)[0]
+    for row in rows:
+        category_id = row['카테고리']
+        row['구분자'] = category_id
+        row['카테고리'] = names.get(category_id, category_id)
+    return rows
+
+
+def _legacy_category(line):
+    """가계부 줄의 카테고리 칸이 구분자가 아니면(이전 가계부의 표준명) 그 값, 아니면 None"""
+    parts = line.split('\t')
+    if len(parts) != 5 or _SEPARATOR_PATTERN.fullmatch(parts[3]):
+        return None
+    return parts[3]
+
+
+def migrate_categories(user_id):
+    """
+    표준명이 그대로 저장된 이전 가계부(<ID>_HL.txt)의 카테고리 칸을 구분자로 바꿔 다시 씀. 바꾼 줄 수 반환.
+    설정 파일에 없는 이름은 카테고리로 추가한다 (category.legacy_category_ids).
+    삭제된 줄도 같이 바꾸고, 칸 수가 틀린 줄은 그대로 둔다 (파일 검사가 그 행을 알려 줌).
+    파일 단위로 고치므로 sqlite 백엔드는 다음 접근 때 파일에서 다시 가져온다
+    """
+    file_path = storage_tsv.ledger_file_path(user_id)
+    if not os.path.exists(file_path):
+        return 0
+    names = {}
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        for line in f:
+            value = _legacy_category(line)
+            if value is not None:
+                names[value] = None
+    if not names:
+        return 0
+    separators = category.legacy_category_ids(user_id, names)
+    count = 0
+
+    def migrated_lines():
+        nonlocal count
+        with open(file_path, 'r', encoding='utf-8', newline='') as f:
+            for line in f:
+                value = _legacy_category(line)
+                if value is not None:
+                    parts = line.split('\t')
+                    parts[3] = separators[value]
+                    line = '\t'.join(parts)
+                    count += 1
+                yield line
+
+    file_rewrite.rewrite_file(file_path, migrated_lines())
+    return count
+
+
+def load_rows(user_id):
+    """가계부 전체를 날짜 최신순 dict 리스트로 반환"""
+    return _with_names(user_id, _backend.load_rows(user_id))
+
+
+def search_rows(user_id, date_from=None, date_to=None, category=None, payment=None,
+                type=None, amount_min=None, amount_max=None):
+    """조건에 맞는 내역(모든 조건을 만족)을 날짜 최신순 dict 리스트로 반환"""
+    if category is not None:
+        category = _category_id(user_id, category)
+    return _with_names(user_id, _backend.search_rows(user_id, date_from, date_to, category, payment,
+                                                     type, amount_min, amount_max))
+
+
+def search_result(user_id, date_from=None, date_to=None, category=None, payment=None,
+                  type=None, amount_min=None, amount_max=None):
+    """
+    search_rows와 같은 검색 결과를 {'count': 내역 수, 'fetch': fetch(start, stop)}로 반환.
+    fetch는 결과의 [start:stop] 구간만 dict 리스트로 만든다 (조회 화면의 페이지 단위 출력)
+    """
+    if category is not None:
+        category = _category_id(user_id, category)
+    result = _backend.search_result(user_id, date_from, date_to, category, payment, type, amount_min, amount_max)
+    backend_fetch = result['fetch']
+
+    def fetch(start, stop):
+        return _with_names(user_id, backend_fetch(start, stop))
+
+    result['fetch'] = fetch
+    return result
+
+
+def total_asset(user_id):
+    """총 자산 (총 수입 - 총 지출)"""
+    return _backend.total_asset(user_id)
+
+
+def range_totals(user_id, date_from, date_to):
+    """기간의 (총 지출, 총 수입)"""
+    return _backend.range_totals(user_id, date_from, date_to)
+
+
+def month_expenses(user_id, months):
+    """months('YYYY-MM' 목록) 각각의 총 지출 {'YYYY-MM': 지출}"""
+    return _backend.month_expenses(user_id, months)
+
+
+def append_row(user_id, date, type, amount, category, payment):
+    """내역 한 건 추가"""
+    _backend.append_row(user_id, date, type, amount, _category_id(user_id, category), payment)
+
+
+def append_rows(user_id, entries):
+    """내역 여러 건((날짜, 유형, 금액, 카테고리, 결제수단) 목록)을 한 번에 추가. 추가한 첫 내역의 idx 반환"""
+    entries = [(date, type, amount, _category_id(user_id, category_name), payment)
+               for date, type, amount, category_name, payment in entries]
+    return _backend.append_rows(user_id, entries)
+
+
+def save_rows(user_id, rows):
+    """가계부 전체를 rows로 교체 (금액 합계가 그대로인 변경에 사용)"""
+    _backend.save_rows(user_id, [dict(row, 카테고리=_row_category_id(user_id, row)) for row in rows])
+
+
+def update_row(user_id, idx, date, type, amount, category, payment):
+    """idx 내역 수정. 바뀐 내역의 idx 반환 (원래 자리에 들어가지 않으면 끝으로 옮겨짐)"""
+    return _backend.update_row(user_id, idx, date, type, amount, _category_id(user_id, category), payment)
+
+
+def delete_row(user_id, idx):
+    """idx 내역 삭제"""
+    _backend.delete_row(user_id, idx)
+
+
+# 사용법: python ledger_storage.py migrate-categories <ID>
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != 'migrate-categories':
+        print("사용법: python ledger_storage.py migrate-categories <ID>")
+        sys.exit(1)
+    try:
+        count = migrate_categories(sys.argv[2])
+    except Exception as e:
+        print(f"!오류: {e}")
+        sys.exit(1)
+    print(f"{count}개 내역의 카테고리를 구분자로 바꿨습니다.")
@@ -0,0 +1,206 @@
+import os
+from pathlib import Path
+import balance_index
+import ledger_pipeline
+
+# 홈 경로 설정
+HOME_DIR = Path.cwd()
+# 총 수입/총 지출/내역 수를 저장하는 파일 접미사
+TOTAL_FILE_SUFFIX = "_total.txt"
+# 월별 지출/수입/내역 수를 저장하는 파일 접미사
+MONTH_FILE_SUFFIX = "_month.txt"
+
+
+# --------------------------------------------------------------
+# 총계 파일(<ID>_total.txt) 관리
+# 형식: <총 수입><탭><총 지출><탭><내역 수>
+# 가계부를 쓸 때마다 함께 갱신하고, 파일 검사 시 가계부와 대조하여 맞지 않으면 다시 만든다.
+# --------------------------------------------------------------
+
+def _total_file_path(user_id):
+    return HOME_DIR / f"{user_id}{TOTAL_FILE_SUFFIX}"
+
+
+def scan_ledger(user_id):
+    """
+    가계부 파일 전체를 읽어 (총계, 월별 집계) 계산.
+    총계: {'income', 'expense', 'count'}, 월별 집계: {'YYYY-MM': {'expense', 'income', 'count'}}
+    """
+    # 날짜/유형/금액 열만 블록 단위로 읽어 월별로 더함 (파일이 없으면 빈 집계)
+    months = ledger_pipeline.sum_by_month(ledger_pipeline.read_columns(user_id))
+    # 총계는 월별 집계의 합
+    return _sum_months(months), months
+
+
+def _sum_months(months):
+    """월별 집계를 더해 총계 {'income', 'expense', 'count'} 계산"""
+    totals = {'income': 0, 'expense': 0, 'count': 0}
+    for month in months.values():
+        for key in totals:
+            totals[key] += month[key]
+    return totals
+
+
+def _add_entry(totals, months, date_str, type_str, amount, sign):
+    """내역 하나를 총계와 월별 집계에 더하거나(sign=1) 뺀다(sign=-1)"""
+    key = 'income' if type_str == 'I' else 'expense'
+    amount = int(amount) * sign
+    totals[key] += amount
+    totals['count'] += sign
+    month = months.setdefault(date_str[:7], {'expense': 0, 'income': 0, 'count': 0})
+    month[key] += amount
+    month['count'] += sign
+    if month['count'] == 0:
+        del months[date_str[:7]]
+
+
+def save_totals(user_id, totals):
+    """총계 파일을 임시 파일에 쓴 뒤 교체하여 저장 (중간에 끊겨도 이전 내용 유지)"""
+    total_file_path = _total_file_path(user_id)
+    tmp_path = total_file_path.with_name(total_file_path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(f"{totals['income']}\t{totals['expense']}\t{totals['count']}\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, total_file_path)
+
+
+def _save_summary(user_id, months):
+    """월별 집계로 총계를 구해 총계 파일과 월별 집계 파일 저장"""
+    totals = _sum_months(months)
+    save_totals(user_id, totals)
+    save_months(user_id, months)
+    return totals, months
+
+
+def rebuild_summary(user_id):
+    """가계부 전체를 다시 읽어 총계 파일과 월별 집계 파일 재생성"""
+    return _save_summary(user_id, scan_ledger(user_id)[1])
+
+
+def load_totals(user_id):
+    """
+    총계 파일을 읽어 {'income', 'expense', 'count'} 반환.
+    파일이 없거나 형식이 깨져 있으면 가계부에서 다시 만든다.
+    """
+    try:
+        with open(_total_file_path(user_id), 'r', encoding='utf-8') as f:
+            parts = f.readline().rstrip('\n').split('\t')
+        if len(parts) == 3 and all(p.isdigit() for p in parts):
+            return {'income': int(parts[0]), 'expense': int(parts[1]), 'count': int(parts[2])}
+    except Exception:
+        # 없거나 읽을 수 없는 파일은 다시 만든다
+        pass
+    return rebuild_summary(user_id)[0]
+
+
+def get_total_asset(user_id):
+    """현재 총 자산 (총 수입 - 총 지출)"""
+    totals = load_totals(user_id)
+    return totals['income'] - totals['expense']
+
+
+def entry_amount(type_str, amount):
+    """내역 하나가 총 자산에 더하는 값 (수입은 +, 지출은 -)"""
+    return int(amount) if type_str == 'I' else -int(amount)
+
+
+def apply_change(user_id, removed=None, added=None):
+    """
+    가계부에 쓴 변경을 총계, 월별 집계와 잔고 조회용 트리에 반영.
+    removed, added: 지운/추가한 내역의 (날짜, 유형, 금액). 수정은 둘 다 전달
+    """
+    totals = load_totals(user_id)
+    months = load_months(user_id)
+    if removed is not None:
+        _add_entry(totals, months, *removed, -1)
+    if added is not None:
+        _add_entry(totals, months, *added, 1)
+    save_totals(user_id, totals)
+    save_months(user_id, months)
+    balance_index.apply_change(user_id, removed, added)
+    return totals
+
+
+def apply_entries(user_id, added):
+    """한꺼번에 추가한 내역들((날짜, 유형, 금액) 목록)을 반영. 집계 파일은 한 번만 저장"""
+    totals = load_totals(user_id)
+    months = load_months(user_id)
+    for entry in added:
+        _add_entry(totals, months, *entry, 1)
+    save_totals(user_id, totals)
+    save_months(user_id, months)
+    balance_index.apply_entries(user_id, added)
+    return totals
+
+
+def reconcile_summary(user_id, total_asset, count, scanned_months=None):
+    """
+    파일 검사에서 계산한 총 자산/내역 수와 총계 파일, 월별 집계 파일을 대조.
+    맞지 않으면 (쓰기 도중 종료, 외부 편집 등) 가계부에서 다시 만든다.
+    scanned_months: 가계부 전체를 검사하며 계산한 월별 합계. 주어지면 월별로 대조하여
+    (외부 편집으로 내역이 다른 달로 옮겨진 경우 등) 다르면 검사 결과로 두 파일을 다시 쓴다.
+    """
+    totals = load_totals(user_id)
+    months = load_months(user_id)
+    if scanned_months is not None:
+        if months != scanned_months or totals != _sum_months(scanned_months):
+            totals = _save_summary(user_id, scanned_months)[0]
+        return totals
+    month_income = sum(m['income'] for m in months.values())
+    month_expense = sum(m['expense'] for m in months.values())
+    month_count = sum(m['count'] for m in months.values())
+    if (totals['income'] - totals['expense'] != total_asset or totals['count'] != count
+            or month_income != totals['income'] or month_expense != totals['expense']
+            or month_count != count):
+        totals = rebuild_summary(user_id)[0]
+    return totals
+
+
+# --------------------------------------------------------------
+# 월별 집계 파일(<ID>_month.txt) 관리
+# 형식: <YYYY-MM><탭><지출 합계><탭><수입 합계><탭><내역 수>
+# 예산 조회/검사는 가계부 대신 이 파일의 월별 지출 합계를 사용한다.
+# --------------------------------------------------------------
+
+def _month_file_path(user_id):
+    return HOME_DIR / f"{user_id}{MONTH_FILE_SUFFIX}"
+
+
+def save_months(user_id, months):
+    """월별 집계 파일을 임시 파일에 쓴 뒤 교체하여 저장"""
+    month_file_path = _month_file_path(user_id)
+    tmp_path = month_file_path.with_name(month_file_path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for month in sorted(months):
+            m = months[month]
+            f.write(f"{month}\t{m['expense']}\t{m['income']}\t{m['count']}\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, month_file_path)
+
+
+def load_months(user_id):
+    """
+    월별 집계 파일을 읽어 {'YYYY-MM': {'expense', 'income', 'count'}} 반환.
+    파일이 없거나 형식이 깨져 있으면 가계부에서 다시 만든다.
+    """
+    months = {}
+    try:
+        with open(_month_file_path(user_id), 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.rstrip('\n').split('\t')
+                if len(parts) != 4 or not all(p.isdigit() for p in parts[1:]):
+                    raise ValueError(line)
+                months[parts[0]] = {'expense': int(parts[1]), 'income': int(parts[2]), 'count': int(parts[3])}
+        return months
+    except Exception:
+        # 없거나 읽을 수 없는 파일은 다시 만든다
+        pass
+    return rebuild_summary(user_id)[1]
+
+
+def get_month_expense(user_id, month_str):
+    """해당 월(YYYY-MM)의 총 지출"""
+    month = load_months(user_id).get(month_str)
+    return month['expense'] if month else 0
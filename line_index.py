@@ -0,0 +1,367 @@
+import os
+import struct
+import sys
+from array import array
+from itertools import accumulate, repeat
+from operator import add
+from pathlib import Path
+import file_rewrite
+import ledger_reader
+import verify_cache
+
+# 홈 경로 설정
+HOME_DIR = Path.cwd()
+# 가계부 파일 접미사
+LEDGER_FILE_SUFFIX = "_HL.txt"
+# 줄 위치 색인 파일 접미사
+INDEX_FILE_SUFFIX = "_HL.idx"
+# 한 번에 나누어 읽는 크기 (bytes)
+READ_BLOCK_SIZE = 1 << 20
+# 죽은 바이트(삭제된 줄, 수정 후 남은 공백)가 파일 크기의 이 비율을 넘으면 정리(compact) 대상
+COMPACT_RATIO = 0.25
+
+
+# --------------------------------------------------------------
+# 가계부 줄 위치 색인 (<ID>_HL.idx)
+# 행 번호 → 그 줄이 시작하는 바이트 위치. 한 줄을 고치거나 지울 때 파일 전체를 다시 쓰지 않고
+# 그 줄만 제자리에서 덮어쓴다.
+#   수정: 새 줄이 원래 줄 길이 안에 들어가면 덮어쓰고 남는 자리는 공백으로 채움
+#         (읽는 쪽은 줄 끝 공백을 무시). 들어가지 않으면 원래 줄을 지우고 끝에 추가
+#   삭제: 줄의 첫 글자를 삭제 표시(ledger_reader.TOMBSTONE)로 덮어씀. 읽는 쪽은 건너뜀
+# 행 번호는 정리(compact) 전까지 바뀌지 않는다.
+# 색인 파일: 헤더(매직, 가계부 크기, 수정시각, 죽은 바이트 수) + 줄 시작 위치(int64 배열)
+# 헤더의 크기/수정시각이 가계부와 다르면(다른 곳에서 고친 경우) 가계부를 읽어 다시 만든다.
+# --------------------------------------------------------------
+
+MAGIC = b'HLX1'
+_HEADER = struct.Struct('<4sqqq')
+HEADER_SIZE = _HEADER.size
+_TOMBSTONE_BYTE = ledger_reader.TOMBSTONE.encode('ascii')
+
+# 사용자별 색인 {'fingerprint': (크기, 수정시각), 'offsets': array('q'), 'dead': 죽은 바이트 수}
+_indexes = {}
+
+
+def _ledger_path(user_id):
+    return HOME_DIR / f"{user_id}{LEDGER_FILE_SUFFIX}"
+
+
+def _index_path(user_id):
+    return HOME_DIR / f"{user_id}{INDEX_FILE_SUFFIX}"
+
+
+def _fingerprint(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _padding(raw):
+    """줄 끝에 채워 둔 공백 수"""
+    return len(raw) - len(raw.rstrip(b' '))
+
+
+def build_index(file_path):
+    """
+    가계부 파일을 읽어 (줄 시작 위치 배열, 죽은 바이트 수) 반환.
+    행 번호는 ledger_reader와 같다 (offsets[n-1]이 n번째 줄, 파일 끝 줄바꿈 뒤에는 줄이 없음)
+    """
+    offsets = array('q')
+    dead = 0
+    size = os.path.getsize(file_path)
+    if size == 0:
+        return offsets, dead
+    offsets.append(0)
+    pos = 0
+    pending = b''
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(READ_BLOCK_SIZE)
+            if not chunk:
+                break
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            # 줄 길이(+줄바꿈)를 누적하여 다음 줄들의 시작 위치 계산
+            starts = accumulate(map(len, lines), lambda start, length: start + length + 1, initial=pos)
+            next(starts)
+            offsets.extend(starts)
+            pos = offsets[-1]
+            if _TOMBSTONE_BYTE in chunk or b' \n' in chunk:
+                dead += sum(len(line) + 1 if line[:1] == _TOMBSTONE_BYTE else _padding(line)
+                            for line in lines)
+    if pending[:1] == _TOMBSTONE_BYTE:
+        dead += len(pending)
+    if offsets[-1] == size:
+        # 파일이 줄바꿈으로 끝남
+        offsets.pop()
+    return offsets, dead
+
+
+def _save(user_id, index):
+    """색인 파일 전체를 임시 파일에 쓴 뒤 교체"""
+    index_path = _index_path(user_id)
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, *index['fingerprint'], index['dead']))
+        index['offsets'].tofile(f)
+    os.replace(tmp_path, index_path)
+
+
+def _save_header(user_id, index, appended=None):
+    """색인 파일의 헤더만 고쳐 씀 (appended: 끝에 추가할 줄 시작 위치 목록). 색인 파일이 없으면 전체 저장"""
+    try:
+        with open(_index_path(user_id), 'r+b') as f:
+            if appended is not None:
+                f.seek(0, 2)
+                f.write(array('q', appended).tobytes())
+            # 헤더를 마지막에 써야 중간에 끊겨도 색인이 가계부와 맞는 것으로 잘못 읽히지 않음
+            f.seek(0)
+            f.write(_HEADER.pack(MAGIC, *index['fingerprint'], index['dead']))
+    except FileNotFoundError:
+        _save(user_id, index)
+
+
+def _load(user_id, fingerprint):
+    """색인 파일을 읽어 반환. 없거나 가계부와 맞지 않으면 None"""
+    try:
+        with open(_index_path(user_id), 'rb') as f:
+            magic, size, mtime, dead = _HEADER.unpack(f.read(HEADER_SIZE))
+            if magic != MAGIC or (size, mtime) != fingerprint:
+                return None
+            offsets = array('q')
+            offsets.frombytes(f.read())
+    except Exception:
+        return None
+    return {'fingerprint': fingerprint, 'offsets': offsets, 'dead': dead}
+
+
+def get_index(user_id):
+    """사용자 가계부의 줄 위치 색인 반환. 가계부가 색인과 다르면 다시 만든다"""
+    ledger_path = _ledger_path(user_id)
+    fingerprint = _fingerprint(ledger_path)
+    index = _indexes.get(user_id)
+    if index is None or index['fingerprint'] != fingerprint:
+        index = _load(user_id, fingerprint)
+        if index is None:
+            offsets, dead = build_index(ledger_path)
+            index = {'fingerprint': fingerprint, 'offsets': offsets, 'dead': dead}
+            _save(user_id, index)
+        _indexes[user_id] = index
+    return index
+
+
+def line_count(user_id):
+    """가계부 전체 줄 수 (빈 줄, 삭제된 줄 포함)"""
+    return len(get_index(user_id)['offsets'])
+
+
+def _read_raw(f, index, line_num):
+    """line_num번째 줄의 (시작 위치, 줄바꿈을 뺀 내용 bytes)"""
+    offsets = index['offsets']
+    if not 1 <= line_num <= len(offsets):
+        raise IndexError(f"{line_num}행")
+    start = offsets[line_num - 1]
+    end = offsets[line_num] if line_num < len(offsets) else index['fingerprint'][0]
+    f.seek(start)
+    raw = f.read(end - start)
+    if raw.endswith(b'\n'):
+        raw = raw[:-1]
+    return start, raw
+
+
+def read_line(user_id, line_num):
+    """line_num번째 줄 내용 (앞뒤 공백 제거). 가계부 전체를 읽지 않음"""
+    index = get_index(user_id)
+    with open(_ledger_path(user_id), 'rb') as f:
+        return _read_raw(f, index, line_num)[1].decode('utf-8').strip()
+
+
+def read_raw_lines(user_id, first, stop=None):
+    """
+    first번째 줄부터 stop번째 줄 전까지(stop이 없으면 끝까지) 줄 내용 목록 (bytes, 줄바꿈과 앞뒤 공백은
+    그대로, 삭제된 줄 포함). 그 구간만 한 번에 읽음
+    """
+    index = get_index(user_id)
+    offsets = index['offsets']
+    if stop is None or stop > len(offsets):
+        stop = len(offsets) + 1
+    if first >= stop:
+        return []
+    start = offsets[first - 1]
+    end = offsets[stop - 1] if stop <= len(offsets) else index['fingerprint'][0]
+    with open(_ledger_path(user_id), 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    lines = data.split(b'\n')
+    if data.endswith(b'\n'):
+        lines.pop()
+    return lines
+
+
+def _finish_write(user_id, index, appended=None):
+    """줄을 쓴 뒤 색인 헤더 갱신. 제자리 수정은 파일 검사의 체크포인트(뒤에 추가된 줄만 검사)를 무효화"""
+    index['fingerprint'] = _fingerprint(_ledger_path(user_id))
+    _save_header(user_id, index, appended)
+    if appended is None:
+        verify_cache.invalidate(_ledger_path(user_id))
+        verify_cache.save_cache()
+
+
+def append_line(user_id, text):
+    """가계부 끝에 줄 추가 (마지막 줄에 줄바꿈이 없으면 먼저 추가). 추가한 줄의 행 번호 반환"""
+    return append_lines(user_id, [text])
+
+
+def append_lines(user_id, texts):
+    """
+    가계부 끝에 여러 줄을 한 번의 쓰기로 추가 (마지막 줄에 줄바꿈이 없으면 먼저 추가).
+    추가한 첫 줄의 행 번호 반환
+    """
+    index = get_index(user_id)
+    data = [text.encode('utf-8') + b"\n" for text in texts]
+    with open(_ledger_path(user_id), 'ab+') as f:
+        #마지막 줄의 줄바꿈문자 유무 확인 후 추가
+        f.seek(0, 2)
+        start = f.tell()
+        if start > 0:
+            f.seek(-1, 2)
+            if f.read(1) != b'\n':
+                f.write(b"\n")
+                start += 1
+        f.write(b''.join(data))
+    first_line = len(index['offsets']) + 1
+    starts = array('q', accumulate(map(len, data[:-1]), initial=start))
+    index['offsets'].extend(starts)
+    _finish_write(user_id, index, appended=starts)
+    return first_line
+
+
+def overwrite_line(user_id, line_num, text):
+    """
+    line_num번째 줄을 제자리에서 text로 덮어씀. 원래 줄보다 길면 쓰지 않고 False 반환
+    """
+    index = get_index(user_id)
+    data = text.encode('utf-8')
+    with open(_ledger_path(user_id), 'r+b') as f:
+        start, raw = _read_raw(f, index, line_num)
+        if raw[:1] == _TOMBSTONE_BYTE:
+            raise IndexError(f"{line_num}행")
+        if len(data) > len(raw):
+            return False
+        f.seek(start)
+        f.write(data + b' ' * (len(raw) - len(data)))
+    index['dead'] += len(raw) - len(data) - _padding(raw)
+    _finish_write(user_id, index)
+    return True
+
+
+def delete_line(user_id, line_num):
+    """line_num번째 줄의 첫 글자를 삭제 표시로 덮어씀 (1바이트 쓰기)"""
+    index = get_index(user_id)
+    with open(_ledger_path(user_id), 'r+b') as f:
+        start, raw = _read_raw(f, index, line_num)
+        if raw[:1] == _TOMBSTONE_BYTE:
+            raise IndexError(f"{line_num}행")
+        f.seek(start)
+        f.write(_TOMBSTONE_BYTE)
+    index['dead'] += len(raw) + 1 - _padding(raw)
+    _finish_write(user_id, index)
+
+
+def insert_lines(user_id, positions, texts):
+    """
+    texts[k]를 원래 가계부의 positions[k]번째 줄 앞에 끼워 넣음 (positions는 오름차순, 줄 수 + 1이면 끝).
+    같은 자리는 texts 순서대로. 끼워 넣은 줄들의 행 번호 목록 반환.
+    모두 끝이면 append_lines와 같고, 아니면 첫 자리 앞부분은 복사하고 뒷부분에 새 줄을 끼워
+    임시 파일에 쓴 뒤 교체 (file_rewrite). 행 번호가 바뀌므로 색인 파일 전체와 파일 검사 체크포인트를 갱신
+    """
+    index = get_index(user_id)
+    offsets = index['offsets']
+    count = len(offsets)
+    if positions[0] > count:
+        first = append_lines(user_id, texts)
+        return list(range(first, first + len(texts)))
+    base = offsets[positions[0] - 1]
+    with open(_ledger_path(user_id), 'rb') as f:
+        f.seek(base)
+        tail = f.read(index['fingerprint'][0] - base)
+    if not tail.endswith(b'\n'):
+        tail += b'\n'
+    end = base + len(tail)
+    chunks = []
+    new_offsets = array('q')
+    line_nums = []
+    line = positions[0]
+    prev = base
+    shift = 0
+    for k, (position, text) in enumerate(zip(positions, texts)):
+        data = text.encode('utf-8') + b"\n"
+        cut = offsets[position - 1] if position <= count else end
+        # 그 앞의 기존 줄들은 지금까지 끼워 넣은 바이트만큼 뒤로
+        new_offsets.extend(map(add, offsets[line - 1:position - 1], repeat(shift)))
+        new_offsets.append(cut + shift)
+        chunks.append(tail[prev - base:cut - base])
+        chunks.append(data)
+        line_nums.append(position + k)
+        shift += len(data)
+        prev = cut
+        line = position
+    new_offsets.extend(map(add, offsets[line - 1:], repeat(shift)))
+    chunks.append(tail[prev - base:])
+    file_rewrite.rewrite_tail(_ledger_path(user_id), base, chunks)
+    offsets[positions[0] - 1:] = new_offsets
+    index['fingerprint'] = _fingerprint(_ledger_path(user_id))
+    _save(user_id, index)
+    verify_cache.invalidate(_ledger_path(user_id))
+    verify_cache.save_cache()
+    return line_nums
+
+
+def needs_compaction(user_id):
+    """죽은 바이트가 COMPACT_RATIO를 넘었으면 True"""
+    if not _ledger_path(user_id).exists():
+        return False
+    index = get_index(user_id)
+    return index['dead'] > 0 and index['dead'] > index['fingerprint'][0] * COMPACT_RATIO
+
+
+def compact(user_id):
+    """
+    삭제된 줄, 빈 줄, 줄 끝에 채운 공백을 없앤 가계부를 임시 파일에 쓴 뒤 교체.
+    남은 줄의 순서는 그대로이고 행 번호는 앞으로 당겨진다. 줄어든 바이트 수 반환
+    """
+    ledger_path = _ledger_path(user_id)
+    tmp_path = ledger_path.with_name(ledger_path.name + ".tmp")
+    old_size = os.path.getsize(ledger_path)
+    with open(ledger_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+        pending = b''
+        while True:
+            chunk = src.read(READ_BLOCK_SIZE)
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            kept = [line.rstrip(b' ') for line in lines
+                    if line.strip() and line.strip()[:1] != _TOMBSTONE_BYTE]
+            if kept:
+                dst.write(b'\n'.join(kept) + b'\n')
+            if not chunk:
+                break
+        if pending.strip() and pending.strip()[:1] != _TOMBSTONE_BYTE:
+            dst.write(pending.rstrip(b' ') + b'\n')
+        dst.flush()
+        os.fsync(dst.fileno())
+    os.replace(tmp_path, ledger_path)
+    _indexes.pop(user_id, None)
+    index = get_index(user_id)
+    return old_size - index['fingerprint'][0]
+
+
+# 사용법: python line_index.py compact <ID>
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != 'compact':
+        print("사용법: python line_index.py compact <ID>")
+        sys.exit(1)
+    try:
+        reclaimed = compact(sys.argv[2])
+    except Exception as e:
+        print(f"!오류: {e}")
+        sys.exit(1)
+    print(f"가계부를 정리했습니다. ({reclaimed:,} bytes 감소)")
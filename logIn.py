@@ -2,6 +2,7 @@ import sys
 import os
 import re
 from mainPrompt import mainPrompt
+from fileCheck import verify_user_files
 # 🥠2차: category 모듈 import
 from category import create_default_settings, load_user_categories, SETTING_FILE_SUFFIX
 
@@ -39,6 +40,9 @@ def login(user_data):
 
     if user_id in user_data and user_data[user_id] == password:
         print("로그인 되었습니다.")
+        # 로그인한 사용자의 파일만 검사 (전체 검사는 시작 시와 [검사]에서 수행)
+        if not verify_user_files(user_id):
+            return False
         load_user_categories(user_id)
         print(SEPERATOR2)
         mainPrompt(user_id)
@@ -1,8 +1,9 @@
-import re
 import datetime
 import sys
 from pathlib import Path
-from fileCheck import verify_files
+import date_codec
+import ledger_storage
+from fileCheck import verify_files, verify_user_files
 from query_edit import handle_query_and_display
 from query_edit import handle_edit
 from query_edit import get_valid_amount
@@ -22,34 +23,24 @@ user_id_global = ""
 
 #예산, 잔고기능 날짜 형식 검사
 def get_valid_date(date_str):
+    # 형식 및 논리적 날짜 (예: 2월 30일) 검사
     date_type = 0
-    date_regex1 = re.compile(r'^(19[0-9]{2}|20[0-9]{2})-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01])$')
-    date_regex2 = re.compile(r'^(19[0-9]{2}|20[0-9]{2})-(0[1-9]|1[0-2])$')
-    
-    if date_regex1.match(date_str):
-       date_type = 1
-    elif date_regex2.match(date_str):
-        date_type = 2
+    date_ord = date_codec.parse_date(date_str)
+    if date_ord is not None:
+        date_type = 1
+    else:
+        date_ord = date_codec.parse_month(date_str)
+        if date_ord is not None:
+            date_type = 2
     if date_type == 0:
         raise ValueError("입력이 올바르지 않습니다.")
-    
         
-    # 2-2. 논리적 날짜 (예: 2월 30일) 및 미래 날짜 검사
-    try:
-        if date_type == 1: 
-            date_d = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
-        elif date_type == 2:
-            date_d = datetime.datetime.strptime(date_str, '%Y-%m').date()
-        today = datetime.date.today()
-        if date_d > today:
-            # 미래 날짜
-            raise ValueError
-    except ValueError:
-        # 존재하지 않는 날짜 (예: 2023-02-30)
+    # 미래 날짜 검사
+    if date_ord > date_codec.today_ordinal():
         raise ValueError
 
     #형식이 유효하면
-    return date_d, date_type
+    return date_codec.to_date(date_ord), date_type
 
 #잔고 기능 날짜 입력 형식 검사
 def valid_balance_date(date_str):
@@ -92,29 +83,14 @@ def valid_balance_date(date_str):
 
 #잔고 계산 및 출력
 def calculate_balance(date_1, date_2, user_id):
-    # 가계부 파일 열기
+    # 저장소에서 구간의 총 지출, 수입 계산 (TSV는 날짜별 누적합 트리, SQLite는 SQL 합계)
     ledger_file_name = str(user_id) + LEDGER_FILE_SUFFIX
-    ledger_file_path = HOME_DIR / ledger_file_name
     try:
-        with open(ledger_file_path, 'r', encoding='utf-8') as f:
-            ledgers = [line for line in f if line]
+        total_expense, total_income = ledger_storage.range_totals(user_id, date_1.toordinal(), date_2.toordinal())
     except Exception as e:
         print(f"!치명적오류: {ledger_file_name} 파일을 읽는 중 오류가 발생했습니다: {e}")
         print("프로그램을 종료시킵니다.")
         sys.exit()
-
-    # 구간의 총 지출, 수입 계산
-    total_expense = 0
-    total_income = 0
-    for ledger in ledgers:
-        part = ledger.split('\t')
-        date_str = part[0]
-        date_d = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
-        if date_d >= date_1 and date_d <= date_2 :
-            if part[1] == 'I':
-                total_income += int(part[2])
-            else :
-                total_expense += int(part[2])
     # 검색 결과 없을때
     if total_expense == 0 and total_income == 0 :
         print("검색 결과가 없습니다.")
@@ -207,26 +183,12 @@ def calculate_budget(date_str=None):
         print("조회할 예산내역이 없습니다.")
         return False # 오류는 아니므로 True
 
-    # 2. 가계부 파일 읽기 및 지출 합산
+    # 2. 저장소에서 예산 월의 지출 합계 가져오기 (가계부 전체를 읽지 않음)
     expenses = {key: 0 for key in budgets.keys()} # { 'YYYY-MM': total_expense }
     
     try:
         if ledger_file_path.exists():
-            with open(ledger_file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    parts = line.split('\t')
-                    # parts: [Date, Type, Amount, Category, Payment]
-                    l_date_str = parts[0] # YYYY-MM-DD
-                    l_type = parts[1]
-                    l_amount = int(parts[2])
-
-                    # YYYY-MM 추출
-                    l_month_str = l_date_str[:7]
-
-                    # 해당 월이 예산 목록에 있고, 지출(E)인 경우 합산
-                    # (설계서 잔고 부분 참고: 수입(I) 제외한 것이 지출)
-                    if l_month_str in expenses and l_type == 'E':
-                        expenses[l_month_str] += l_amount
+            expenses.update(ledger_storage.month_expenses(user_id_global, list(expenses)))
     except Exception as e:
         print(f"!오류: {ledger_file_path} 파일을 읽는 중 오류가 발생했습니다: {e}")
         return False
@@ -479,23 +441,10 @@ def budget_menu():
 def calculate_expense(date_str):
     ledger_file_name =user_id_global + LEDGER_FILE_SUFFIX
     ledger_file_path = HOME_DIR / ledger_file_name
-    expense = 0
     try:
         if ledger_file_path.exists():
-            with open(ledger_file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    parts = line.split('\t')
-                    # parts: [Date, Type, Amount, Category, Payment]
-                    l_date_str = parts[0] # YYYY-MM-DD
-                    l_type = parts[1]
-                    l_amount = int(parts[2])
-
-                    # YYYY-MM 추출
-                    l_month_str = l_date_str[:7]
-
-                    if l_month_str == date_str and l_type == 'E':
-                        expense += l_amount
-            return expense
+            # 저장소에서 해당 월의 지출 합계 조회
+            return ledger_storage.month_expenses(user_id_global, [date_str])[date_str]
     except Exception as e:
         print(f"!오류: {ledger_file_path} 파일을 읽는 중 오류가 발생했습니다: {e}")
         return False
@@ -512,15 +461,15 @@ def print_mainPrompt():
 def callFunc(c, user_id):
     if(c == '지출'):
         expenditure(user_id)
-        if(not verify_files()) : return -1
+        if(not verify_user_files(user_id)) : return -1
     elif(c == '수입'):
         income(user_id)
-        if(not verify_files()) : return -1
+        if(not verify_user_files(user_id)) : return -1
     elif(c == '조회'):
         handle_query_and_display(user_id)
     elif(c == '편집'):
         handle_edit(user_id)
-        if(not verify_files()) : return -1
+        if(not verify_user_files(user_id)) : return -1
     elif(c == '검사'):
         print("검사하는 중...")
         print(SEPERATOR)  
@@ -544,10 +493,13 @@ def callFunc(c, user_id):
 def mainPrompt(user_id):
     global user_id_global 
     user_id_global = user_id
+    # 로그인 세션 동안 저장소 세션 시작 (TSV는 가계부 캐시, SQLite는 연결)
+    ledger_storage.start_session(user_id)
     while(1):
         c = print_mainPrompt()
         check = callFunc(c, user_id)
         if check == -1: 
+            ledger_storage.end_session()
             return -1     
 
 
@@ -1,28 +1,17 @@
 import sys
-import os
-import datetime
 import re
 from pathlib import Path
+import date_codec
+import ledger_summary
+import ledger_storage
+import category
 
 # --------------------------------------------------------------
 # 1. 전역 상수/변수 및 헬퍼 함수 (Validation Logic)
 # --------------------------------------------------------------
 
-# 💡 카테고리/결제수단 표준명 및 동의어 정의
-CATEGORY_MAP = {
-    '식비': ['음식', '밥', 'food', '식'],
-    '교통': ['차', '지하철', 'transport', 'transportation', '교'],
-    '주거': ['월세', '관리비', 'housing', 'house', 'rent', '주'],
-    '여가': ['취미', '문화생활', 'hobby', 'leisure', '여'],
-    '입금': ['월급', '용돈', 'salary', 'wage', 'income', '입'],
-    '기타': ['etc', 'other', '기'],
-}
-
-PAYMENT_MAP = {
-    '현금': ['cash', '지폐', '현'],
-    '카드': ['card', 'credit', '카'],
-    '계좌이체': ['transfer', 'bank', 'account', '송금', '계'],
-}
+# 💡 카테고리/결제수단 표준명 및 동의어는 category 모듈의 별칭 표로 찾음
+#    (카테고리는 사용자 설정 파일 기준, resolve_category / resolve_payment)
 
 
 def get_valid_date(date_str, is_edit_mode=False):
@@ -32,20 +21,12 @@ def get_valid_date(date_str, is_edit_mode=False):
     if not date_str or date_str.isspace() or date_str.strip() != date_str:
         raise ValueError("날짜는 YYYY-MM-DD 형식으로 입력해야합니다.")
 
-    if not re.fullmatch(r'\d{4}-\d{2}-\d{2}', date_str):
-        raise ValueError("날짜는 YYYY-MM-DD 형식으로 입력해야합니다.")
-
-    try:
-        y, m, d = map(int, date_str.split('-'))
-        date_obj = datetime.date(y, m, d)
-    except ValueError:
-        raise ValueError("날짜는 YYYY-MM-DD 형식으로 입력해야합니다.")
-
-    # 연도 범위 검사(1차 수정)
-    if not (1900 <= y <= 2099):
+    # 형식, 논리적 날짜, 연도 범위 검사(1차 수정)
+    date_ord = date_codec.parse_date(date_str)
+    if date_ord is None:
         raise ValueError("날짜는 YYYY-MM-DD 형식으로 입력해야합니다.")
 
-    if is_edit_mode and date_obj > datetime.date.today():
+    if is_edit_mode and date_ord > date_codec.today_ordinal():
         raise ValueError("오늘 이후의 날짜는 입력할 수 없습니다.")
     
     return date_str
@@ -102,12 +83,9 @@ def get_valid_category(category_input):
     if ' ' in category_input:
         raise ValueError("올바른 카테고리를 입력해야 합니다.")
         
-    input_stripped = category_input.strip()
-    input_lower = input_stripped.lower()
-    
-    for standard_name, synonyms in CATEGORY_MAP.items():
-        if standard_name.lower() == input_lower or input_lower in [s.lower() for s in synonyms]:
-            return standard_name
+    standard_name = category.resolve_category(category_input)
+    if standard_name is not None:
+        return standard_name
             
     raise ValueError("올바른 카테고리를 입력해야 합니다.")
 
@@ -125,12 +103,9 @@ def get_valid_payment(payment_input):
     if ' ' in payment_input:
         raise ValueError("올바른 결제수단을 입력해야 합니다.")
     
-    input_stripped = payment_input.strip()
-    input_lower = input_stripped.lower()
-    
-    for standard_name, synonyms in PAYMENT_MAP.items():
-        if standard_name.lower() == input_lower or input_lower in [s.lower() for s in synonyms]:
-            return standard_name
+    standard_name = category.resolve_payment(payment_input)
+    if standard_name is not None:
+        return standard_name
             
     raise ValueError("올바른 결제수단을 입력해야 합니다.")
 
@@ -140,47 +115,8 @@ def get_valid_payment(payment_input):
 
 
 def load_user_ledger(user_id):
-    """사용자의 가계부 파일(<ID>_HL.txt)을 읽어 리스트로 반환 (6.2절)"""
-    
-    file_path = f"{user_id}_HL.txt"
-    data = []
-    
-    try:
-        # 파일이 없으면 빈 리스트 반환 (6.3.1.b절: 재시작 대신 빈 리스트)
-        if not os.path.exists(file_path):
-            print(f"!오류: 가계부 파일이 존재하지 않습니다. 새로운 파일 생성.")
-            with open(file_path, 'w', encoding='utf-8') as f:
-                pass
-            return data
-
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for i, line in enumerate(f, 1):
-                line = line.strip()
-                if not line: continue
-                
-                # 6.2.1절 문법 검사: <Date><탭문자><Type><탭문자><Amount>...
-                parts = line.split('\t')
-                if len(parts) != 5:
-                    print(f"!치명적오류: 현재 {file_path} {i}행에서 오류가 발생되었습니다.")
-                    print("프로그램을 종료시킵니다.")
-                    sys.exit()
-                
-                # 날짜, 유형, 금액, 카테고리, 결제수단
-                data.append({
-                    'idx': i, # 임시 인덱스 (삭제/수정 시 중요)
-                    '날짜': parts[0],
-                    '유형': parts[1],
-                    '금액': int(parts[2]),
-                    '카테고리': parts[3],
-                    '결제수단': parts[4],
-                })
-        
-        return sorted(data, key=lambda x: x['날짜'], reverse=True)
-        
-    except Exception as e:
-        print(f"!치명적오류: {file_path} 파일을 읽는 중 오류가 발생했습니다: {e}")
-        print("프로그램을 종료시킵니다.")
-        sys.exit()
+    """사용자의 가계부를 날짜 최신순 dict 리스트로 반환 (6.2절). 저장소는 ledger_storage에서 선택"""
+    return ledger_storage.load_rows(user_id)
 
 
 def calculate_total_asset(data_list):
@@ -196,105 +132,205 @@ def calculate_total_asset(data_list):
 
 
 def save_ledger_data(user_id, data_list):
-    """변경된 가계부 내역을 파일에 저장하고 무결성 검사 (7.10, 6.3절)"""
-    
-    file_path = f"{user_id}_HL.txt"
-    try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            for item in data_list:
-                # 6.2.1절 형식: <Date><탭문자><Type><탭문자><Amount><탭문자><Category><탭문자><Payment>
-                line = f"{item['날짜']}\t{item['유형']}\t{item['금액']}\t{item['카테고리']}\t{item['결제수단']}\n"
-                f.write(line)
-        return True
-        
-    except Exception as e:
-        print(f"!치명적오류: {file_path} 파일을 저장하는 중 오류가 발생했습니다: {e}")
-        print("프로그램을 종료시킵니다.")
-        sys.exit()
+    """변경된 가계부 내역을 저장소에 저장 (7.10, 6.3절)"""
+    ledger_storage.save_rows(user_id, data_list)
+    return True
 
 # --------------------------------------------------------------
 # 3. 조회 및 편집 기능 (Ledger Features)
 # --------------------------------------------------------------
 
-# 💡 조회 필터링 헬퍼 함수 (표준명 찾기)
-def _get_standard_name(input_str, item_map):
-    """주어진 맵에서 입력 문자열에 해당하는 표준명을 찾습니다. 없으면 None 반환."""
-    input_lower = input_str.strip().lower()
-    
-    for standard_name, synonyms in item_map.items():
-        if standard_name.lower() == input_lower or input_lower in [s.lower() for s in synonyms]:
-            return standard_name
-            
+# 💡 복합 검색 조건
+# 공백으로 나눈 조건을 모두 만족하는 내역을 찾는다 (AND). 항목마다 한 번씩만 쓸 수 있다.
+#   날짜     : 2024-01-05, 2024-01, 2024-01~2024-03, 2024-01-05~, ~2023-12  (양 끝 포함)
+#   금액     : 금액:10000, 금액:1000~5000, 금액:1000~, 금액:~5000
+#   유형     : 지출, 수입
+#   카테고리 / 결제수단 : 표준명 또는 동의어
+#   (삭제된 카테고리의 내역('미분류')은 카테고리로 검색할 수 없다. 구분자가 여러 개일 수 있어서 검색 조건 하나로 나타낼 수 없음)
+# 예) 2024-01~2024-03 식비 카드 금액:~10000
+RANGE_MARK = '~'
+AMOUNT_PREFIXES = ('금액:', 'amount:')
+TYPE_WORDS = {'지출': 'E', '수입': 'I'}
+
+
+def _parse_date_bound(text, is_end):
+    """날짜/연월 하나를 기간의 시작(또는 끝) ordinal로. 형식이 틀리면 ValueError, 존재하지 않는 날짜는 None"""
+    get_valid_date_or_month(text) # 형식만 검사 (5.3.1절)
+    date_ord = date_codec.parse_date(text)
+    if date_ord is not None:
+        return date_ord
+    # 연월은 그 달 전체 기간
+    month_range = date_codec.parse_month_range(text)
+    if month_range is not None:
+        return month_range[1] if is_end else month_range[0]
     return None
 
-def _filter_ledger_data(data_list, search_term):
-    """검색 조건(날짜/카테고리/결제수단)에 따라 데이터를 필터링"""
-    filtered_data = []
-    
-    # 1. 날짜/연월 검색 판단
-    if search_term and search_term[0].isdigit():
-        try:
-            get_valid_date_or_month(search_term) # 형식만 검사 (5.3.1절)
-            for item in data_list:
-                if item['날짜'].startswith(search_term):
-                    filtered_data.append(item)
-            return filtered_data
-        except ValueError as e:
-                print(f"오류 메시지: {e}")
-                return -2
 
-    # 2. 카테고리 검색 판단 (표준명 또는 동의어 사용)
-    standard_category = _get_standard_name(search_term, CATEGORY_MAP)
+def _split_range(text):
+    """'A~B', 'A~', '~B', 'A' → (시작 문자열, 끝 문자열). 빈 쪽은 ''"""
+    if RANGE_MARK not in text:
+        return text, text
+    start, end = text.split(RANGE_MARK, 1)
+    if not start and not end:
+        raise ValueError("범위는 시작~끝 형식이어야 합니다.")
+    return start, end
+
+
+def _parse_search_condition(term):
+    """
+    검색 조건 하나를 dict로 변환. 형식이 틀리면 ValueError, 알 수 없는 조건은 -1,
+    존재하지 않는 날짜(예: 2023-02-30)는 None
+    """
+    # 1. 날짜/연월 (범위 가능)
+    if term[0].isdigit() or term[0] == RANGE_MARK:
+        start, end = _split_range(term)
+        condition = {}
+        for key, text, is_end in (('date_from', start, False), ('date_to', end, True)):
+            if text:
+                bound = _parse_date_bound(text, is_end)
+                if bound is None:
+                    return None
+                condition[key] = bound
+        return condition
+
+    # 2. 금액 범위
+    for prefix in AMOUNT_PREFIXES:
+        if term.lower().startswith(prefix):
+            start, end = _split_range(term[len(prefix):])
+            condition = {}
+            for key, text in (('amount_min', start), ('amount_max', end)):
+                if text:
+                    condition[key] = get_valid_amount(text.replace(',', ''))
+            return condition
+
+    # 3. 유형
+    if term in TYPE_WORDS:
+        return {'type': TYPE_WORDS[term]}
+
+    # 4. 카테고리 판단 (표준명 또는 동의어 사용)
+    standard_category = category.resolve_category(term)
     if standard_category:
-        for item in data_list: 
-            if item['카테고리'] == standard_category:
-                filtered_data.append(item)
-        return filtered_data
+        return {'category': standard_category}
     
-    # 3. 결제수단 검색 판단 (표준명 또는 동의어 사용)
-    standard_payment = _get_standard_name(search_term, PAYMENT_MAP)
+    # 5. 결제수단 판단 (표준명 또는 동의어 사용)
+    standard_payment = category.resolve_payment(term)
     if standard_payment:
-        for item in data_list:
-            if item['결제수단'] == standard_payment:
-                filtered_data.append(item)
-        return filtered_data
+        return {'payment': standard_payment}
 
     return -1
 
-def _display_ledger_table(data_list, user_id, mode="query", total_asset_data_list=None):
-    """조회 결과를 UI/UX에 맞게 표 형태로 출력 (7.8절)"""
-    
-    if mode=="query":
-        print("번호|     날짜      | 지출    | 수입     | 카테고리| 결제수단")
-        print("--------------------------------------------------------------")
-    
-    asset_list_to_use = total_asset_data_list if total_asset_data_list is not None else data_list
-   
-    display_to_original_idx_map = []
-    cnt = 1
-    
-    for item in data_list:
-        expense = f"{item['금액']:,}" if item['유형'] == 'E' else '-'
-        income = f"{item['금액']:,}" if item['유형'] == 'I' else '-'
-        display_to_original_idx_map.append(item['idx'])
-        if mode=="query":
-            print(f" {cnt:<3}| {item['날짜']:<13} |{expense:>8} | {income:>8} | {item['카테고리']:<6}| {item['결제수단']:<6}")
-        cnt += 1
-    
-    if mode=="query":
-        print("--------------------------------------------------------------")
-    
-    total_asset = calculate_total_asset(asset_list_to_use)
-    if mode=="query":
-        print(f"현재 ID님의 총 자산은 ₩{total_asset:,}입니다.")
-        print("-------------------------------------------------------------")
-    
-    return display_to_original_idx_map  
+
+def parse_search_term(search_term):
+    """
+    검색 조건(복합 검색 조건, 위 참고)을 저장소 검색 조건 dict로 변환
+    (date_from, date_to, category, payment, type, amount_min, amount_max 중 일부).
+    형식이 틀린 조건은 오류 메시지를 출력하고 -2, 알 수 없는 조건은 -1,
+    형식은 맞지만 존재하지 않는 날짜(예: 2023-02-30)가 있으면 None (결과 없음)
+    """
+    terms = search_term.split()
+    if not terms:
+        return -1
+    conditions = {}
+    no_match = False
+    for term in terms:
+        try:
+            condition = _parse_search_condition(term)
+        except ValueError as e:
+            print(f"오류 메시지: {e}")
+            return -2
+        if condition == -1:
+            return -1
+        if condition is None:
+            no_match = True
+            continue
+        if any(key in conditions for key in condition):
+            print("오류 메시지: 같은 항목의 조건은 한 번만 입력할 수 있습니다.")
+            return -2
+        conditions.update(condition)
+    if no_match:
+        return None
+    return conditions
+
+def _filter_ledger_data(user_id, search_term):
+    """검색 조건(날짜/금액/유형/카테고리/결제수단의 조합)에 맞는 내역을 저장소에서 검색하여 날짜 최신순 결과 반환"""
+    conditions = parse_search_term(search_term)
+    if conditions == -1 or conditions == -2:
+        return conditions
+    if conditions is None:
+        return EMPTY_RESULT
+    return ledger_storage.search_result(user_id, **conditions)
+
+
+# --------------------------------------------------------------
+# 조회 결과 출력 (페이지 단위)
+# 결과는 ledger_storage.search_result의 {'count', 'fetch'}로 받아 보여줄 페이지의
+# 내역만 가져와 포맷하고, 페이지 전체를 문자열 하나로 모아 한 번에 출력한다.
+# 번호는 결과 전체의 순번이며 편집 기능은 번호로 결과에서 그 내역만 가져온다.
+# 결과가 한 페이지 이하이면 페이지 이동을 묻지 않는다.
+# --------------------------------------------------------------
+
+# 한 페이지에 보여줄 내역 수
+PAGE_SIZE = 20
+PAGE_NEXT = ('n', '다음')
+PAGE_PREV = ('p', '이전')
+PAGE_QUIT = ('', 'q', '끝')
+# 검색 결과가 없을 때의 결과
+EMPTY_RESULT = {'count': 0, 'fetch': lambda start, stop: []}
+
+
+def _page_count(result):
+    return (result['count'] + PAGE_SIZE - 1) // PAGE_SIZE
+
+
+def _page_text(result, page, total_asset):
+    """page번째(0부터) 페이지의 표 문자열 (그 페이지의 내역만 가져와 포맷)"""
+    start = page * PAGE_SIZE
+    lines = ["번호|     날짜      | 지출    | 수입     | 카테고리| 결제수단",
+             "--------------------------------------------------------------"]
+    for cnt, item in enumerate(result['fetch'](start, start + PAGE_SIZE), start + 1):
+        amount = f"{item['금액']:,}"
+        expense, income = (amount, '-') if item['유형'] == 'E' else ('-', amount)
+        lines.append(f" {cnt:<3}| {item['날짜']:<13} |{expense:>8} | {income:>8} | {item['카테고리']:<6}| {item['결제수단']:<6}")
+    lines.append("--------------------------------------------------------------")
+    page_count = _page_count(result)
+    if page_count > 1:
+        lines.append(f"{page + 1}/{page_count} 페이지 (전체 {result['count']:,}건)")
+    lines.append(f"현재 ID님의 총 자산은 ₩{total_asset:,}입니다.")
+    lines.append("-------------------------------------------------------------")
+    return '\n'.join(lines) + '\n'
+
+
+def _display_ledger_table(result, user_id, total_asset=None):
+    """조회 결과를 UI/UX에 맞게 표 형태로 출력 (7.8절). 한 페이지를 넘으면 페이지를 넘기며 봄"""
+    if total_asset is None:
+        total_asset = ledger_storage.total_asset(user_id)
+    page_count = _page_count(result)
+    page = 0
+    while True:
+        sys.stdout.write(_page_text(result, page, total_asset))
+        if page_count <= 1:
+            return
+        while True:
+            move = input("페이지 이동 ([n] 다음  [p] 이전  [번호] 페이지  [엔터] 끝내기): ").strip().lower()
+            if move in PAGE_QUIT:
+                return
+            if move in PAGE_NEXT and page + 1 < page_count:
+                page += 1
+            elif move in PAGE_PREV and page > 0:
+                page -= 1
+            elif move.isdigit() and 1 <= int(move) <= page_count:
+                page = int(move) - 1
+            else:
+                print("입력이 올바르지 않습니다.")
+                continue
+            break
+
 
 # 💡 [조회 함수] handle_query_and_display
 def handle_query_and_display(user_id, mode = "query"):
-    """조회 기능의 전체 흐름을 담당하고, 필터링된 리스트를 반환 (7.8절)"""
-    original_data_list = load_user_ledger(user_id) 
+    """조회 기능의 전체 흐름을 담당하고, 검색 결과({'count', 'fetch'})를 반환 (7.8절)"""
+    # 검색과 총 자산 계산은 저장소에서 처리 (ledger_storage)
+    total_asset = ledger_storage.total_asset(user_id)
     
     if mode == "query":
         pass
@@ -304,35 +340,40 @@ def handle_query_and_display(user_id, mode = "query"):
         print("--------------------------------------------------------------")
 
         if menu == "전체조회":
-            if original_data_list:
-                _display_ledger_table(original_data_list, user_id, mode="query", total_asset_data_list=original_data_list)
-                return original_data_list
+            # 내역 dict는 화면에 보여줄 페이지만 만든다
+            result = ledger_storage.search_result(user_id)
+            if result['count']:
+                _display_ledger_table(result, user_id, total_asset=total_asset)
             else:
                 print("검색 결과가 없습니다.")
-                return [] # 빈 리스트 반환하여 편집 모드에서 '조회할 내역 없음' 처리 유도
+            return result # 빈 결과면 편집 모드에서 '조회할 내역 없음' 처리 유도
             
         elif menu == "검색조회":
             
-            print("\n입력 형식")
-            print("   날짜 (YYYY-MM-DD 또는 YYYY-MM)")
+            print("\n입력 형식 (여러 조건은 공백으로 구분, 모두 만족하는 내역 검색)")
+            print("   날짜 (YYYY-MM-DD 또는 YYYY-MM, 기간은 시작~끝)")
+            print("   금액 (금액:최소~최대)")
+            print("   유형")
+            print("           [지출] [수입]")
             print("   카테고리")
             print("           [식비] [교통] [주거] [여가] [기타] [입금]")
             print("   결제수단")
             print("           [카드] [현금] [계좌이체]")
+            print("   예) 2024-01~2024-03 식비 카드 금액:~10000")
             
             search_term = input("\n검색 조건 입력: ").strip()
             print("--------------------------------------------------------------")
             
-            filtered_data = _filter_ledger_data(original_data_list, search_term)
+            filtered_data = _filter_ledger_data(user_id, search_term)
           
             if filtered_data == -1 or filtered_data == -2:
                 if filtered_data == -1:
                     print("입력이 올바르지 않습니다.")
                 continue
-            elif filtered_data:
-                _display_ledger_table(filtered_data, user_id, mode="query", total_asset_data_list=original_data_list)
+            elif filtered_data['count']:
+                _display_ledger_table(filtered_data, user_id, total_asset=total_asset)
                 return filtered_data
-            elif not filtered_data:
+            else:
                 print("검색 결과가 없습니다.")
                 continue
                 
@@ -357,14 +398,12 @@ def _format_item_for_display(item):
 def handle_edit(user_id):
     """가계부 편집 기능의 전체 흐름을 담당 (7.9절)"""
     
-    data_for_display = handle_query_and_display(user_id, mode="edit")
+    result = handle_query_and_display(user_id, mode="edit")
     
-    if not data_for_display:
+    if not result['count']:
         print("조회할 내역이 없습니다. 주 프롬프트로 돌아갑니다.")
         return
     
-    display_to_original_idx_map = _display_ledger_table(data_for_display, user_id, mode="edit")
-    
     print("===================================")
     while True:
         try:
@@ -375,20 +414,13 @@ def handle_edit(user_id):
                 continue
         
             display_num = int(edit_idx_input) 
-            map_index = display_num - 1
 
-            if 0 <= map_index < len(display_to_original_idx_map):
-                # 매핑 리스트에서 실제 레코드의 고유 인덱스(item['idx'])를 가져옵니다.
-                original_idx_to_edit = display_to_original_idx_map[map_index] 
-            else:
+            if not 1 <= display_num <= result['count']:
                 print("입력이 올바르지 않습니다. 표시된 번호 내에서 선택하세요.")
                 continue
             
-            selected_item = next((item for item in data_for_display if item['idx'] == original_idx_to_edit), None)
-
-            if selected_item is None:
-                print("입력이 올바르지 않습니다.")
-                continue
+            # 번호는 결과 전체의 순번이므로 그 내역 하나만 가져옴
+            selected_item = result['fetch'](display_num - 1, display_num)[0]
             
             print("\n편집 기능")
             print("      [ 수정 ]  [ 삭제 ]")
@@ -410,13 +442,12 @@ def handle_edit(user_id):
 def process_update(user_id, target_item):
     """선택된 내역을 수정하고 저장 처리 (7.9절)"""
     
-    original_data_list = load_user_ledger(user_id) # 원본 데이터 로드
+    # 선택된 내역의 복사본을 고친 뒤 저장소에서 그 내역만 수정 (가계부 전체를 다시 읽지 않음)
+    current_item = dict(target_item)
     
-    # target_item의 참조를 원본 리스트에서 업데이트
-    # (load_user_ledger가 복사본을 주므로, 실제 변경할 항목을 원본에서 찾아야 함)
-    current_item = next(item for item in original_data_list if item['idx'] == target_item['idx'])
-    
-    origin_sum = calculate_total_asset(original_data_list)
+    # 총 자산은 저장소에서 가져오고, 수정 중에는 바뀐 내역의 차이만 반영
+    origin_sum = ledger_storage.total_asset(user_id)
+    old_contribution = ledger_summary.entry_amount(current_item['유형'], current_item['금액'])
     old_type = current_item['유형']
     old_category = current_item['카테고리']
     old_amount = current_item['금액']
@@ -447,15 +478,15 @@ def process_update(user_id, target_item):
         try:
             standard_category = get_valid_category(new_category) # 💡 [수정] type_str 인자 제거
             
-            # 💡 [수정] 카테고리에 따라 유형(Type)을 자동으로 업데이트
-            if standard_category == '입금':
+            # 💡 [수정] 카테고리에 따라 유형(Type)을 자동으로 업데이트 (입금 카테고리는 구분자로 판단)
+            if category.category_ids(user_id)[1].get(standard_category) == category.INCOME_SEPARATOR:
                 current_item['유형'] = 'I'
             else:
                 current_item['유형'] = 'E'
             current_item['카테고리'] = standard_category
 
             #지출이 수입보다 큰 경우 처리
-            sum = calculate_total_asset(original_data_list)
+            sum = origin_sum - old_contribution + ledger_summary.entry_amount(current_item['유형'], current_item['금액'])
             if sum < 0:
                 print("현재 지출이 수입보다 커집니다.")
                 print(f"현재 {user_id}님의 총 자산은 ₩{origin_sum}입니다")
@@ -477,7 +508,7 @@ def process_update(user_id, target_item):
             current_item['금액'] = get_valid_amount(new_amount)
 
             #지출이 수입보다 큰 경우 처리
-            sum = calculate_total_asset(original_data_list)
+            sum = origin_sum - old_contribution + ledger_summary.entry_amount(current_item['유형'], current_item['금액'])
             if sum < 0:
                 print("현재 지출이 수입보다 커집니다.")
                 print(f"현재 {user_id}님의 총 자산은 ₩{origin_sum}입니다")
@@ -511,8 +542,13 @@ def process_update(user_id, target_item):
     # 저장 확인 및 최종 처리
     confirm = input("이대로 저장하시겠습니까?(Y/N): ").strip().upper()
     if confirm == 'Y':
-        save_ledger_data(user_id, original_data_list)
-        total_asset = calculate_total_asset(original_data_list)
+        # 삭제된 카테고리의 내역('미분류')은 카테고리를 바꾸지 않았으면 원래 구분자를 그대로 저장
+        category_value = current_item['카테고리']
+        if category_value == category.UNCATEGORIZED:
+            category_value = current_item['구분자']
+        ledger_storage.update_row(user_id, current_item['idx'], current_item['날짜'], current_item['유형'],
+                                  current_item['금액'], category_value, current_item['결제수단'])
+        total_asset = ledger_storage.total_asset(user_id)
         
         print("\n편집이 완료되었습니다.")
         print(f"현재 ID님의 총 자산은 ₩{total_asset:,}입니다.")
@@ -525,8 +561,6 @@ def process_update(user_id, target_item):
 # 💡 [편집 삭제 함수] process_delete
 def process_delete(user_id, target_item):
     """선택된 내역을 삭제하고 저장 처리 (7.9절)"""
-    original_data_list = load_user_ledger(user_id)
-    
     print("===================================")
     print(f"{'날짜':<11}   {'지출':<8}  {'수입':<8}  {'카테고리':<6}  {'결제수단'}")
     print(_format_item_for_display(target_item))
@@ -537,7 +571,7 @@ def process_delete(user_id, target_item):
         print("\n삭제하는 중 . . .")
 
         #지출이 수입보다 커지는 경우
-        sum = calculate_total_asset(original_data_list)
+        sum = ledger_storage.total_asset(user_id)
         if target_item['유형'] == 'I' :
             sum -= target_item['금액']
             if sum < 0:
@@ -548,11 +582,9 @@ def process_delete(user_id, target_item):
                 print("--------------------------------------------------------------")
                 return True
             
-        # 원본 데이터 리스트에서 해당 항목 제거
-        original_data_list[:] = [item for item in original_data_list if item['idx'] != target_item['idx']]
-        
-        save_ledger_data(user_id, original_data_list)
-        total_asset = calculate_total_asset(original_data_list)
+        # 저장소에서 해당 항목 제거
+        ledger_storage.delete_row(user_id, target_item['idx'])
+        total_asset = ledger_storage.total_asset(user_id)
         
         print("--------------------------------------------------------------")
         print("삭제가 완료되었습니다.")
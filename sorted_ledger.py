@@ -0,0 +1,322 @@
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from operator import gt, itemgetter
+from pathlib import Path
+import date_codec
+import file_rewrite
+import ledger_reader
+import line_index
+import verify_cache
+
+# 홈 경로 설정
+HOME_DIR = Path.cwd()
+# 가계부 파일 접미사
+LEDGER_FILE_SUFFIX = "_HL.txt"
+# 날짜 색인 파일 접미사 (이 파일이 있으면 그 사용자는 날짜순 저장을 씀)
+DATE_INDEX_FILE_SUFFIX = "_HL.dix"
+# 날짜 색인에 표본을 남기는 간격 (줄 수)
+SPARSE_STEP = 1024
+
+
+# --------------------------------------------------------------
+# 날짜순 가계부 (선택 사항)
+# 가계부 파일의 줄을 날짜 오름차순으로 유지한다. 새 내역은 끝에 붙이는 대신 날짜 자리
+# (같은 날짜는 기존 내역 뒤)에 끼워 넣으므로, 읽는 쪽은 정렬하지 않고 순서대로 읽으면 된다.
+# 자리는 날짜 색인(<ID>_HL.dix)으로 찾는다. 색인은 약 SPARSE_STEP줄마다 (날짜, 행 번호) 표본을
+# 하나씩 담으며, 표본을 이진 탐색한 뒤 표본 사이의 줄만 읽는다.
+# 대부분의 내역은 가장 최근 날짜이므로 파일 끝에 추가되고, 가운데에 들어가는 경우에만 그 뒤의
+# 줄을 다시 쓴다 (앞부분은 복사, 임시 파일에 쓴 뒤 교체).
+# 기존 가계부는 한 번 정렬해야 한다: python sorted_ledger.py migrate <ID>
+# 색인 파일: 헤더(매직, 가계부 크기, 수정시각, 표본 수) + 표본 날짜(int32 배열) + 표본 행 번호(int32 배열)
+# 헤더의 크기/수정시각이 가계부와 다르면 가계부를 읽어 다시 만들고, 날짜순이 아니면 날짜순 저장을 해제한다.
+# --------------------------------------------------------------
+
+MAGIC = b'HLD1'
+_HEADER = struct.Struct('<4sqqq')
+HEADER_SIZE = _HEADER.size
+_TOMBSTONE_BYTE = ledger_reader.TOMBSTONE.encode('ascii')
+
+# 사용자별 색인 {'fingerprint': (크기, 수정시각), 'dates': array('i'), 'lines': array('i')}
+_indexes = {}
+
+
+def _ledger_path(user_id):
+    return HOME_DIR / f"{user_id}{LEDGER_FILE_SUFFIX}"
+
+
+def _index_path(user_id):
+    return HOME_DIR / f"{user_id}{DATE_INDEX_FILE_SUFFIX}"
+
+
+def _fingerprint(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def is_enabled(user_id):
+    """사용자가 날짜순 저장을 쓰면 True"""
+    return _index_path(user_id).exists()
+
+
+def _live_date(raw):
+    """줄 내용(bytes)이 내역이면 날짜 문자열, 빈 줄/삭제된 줄이면 None"""
+    raw = raw.strip()
+    if not raw or raw[:1] == _TOMBSTONE_BYTE:
+        return None
+    return raw[:10].decode('utf-8', 'replace')
+
+
+def _add_samples(index, lines):
+    """(행 번호, 날짜 문자열 또는 None) 들을 행 번호 순서대로 받아 SPARSE_STEP줄마다 표본 추가"""
+    sample_dates = index['dates']
+    sample_lines = index['lines']
+    last = sample_lines[-1] if sample_lines else -SPARSE_STEP
+    for line_num, date_str in lines:
+        if date_str is not None and line_num - last >= SPARSE_STEP:
+            date_ord = date_codec.parse_date(date_str)
+            if date_ord is None:
+                raise ValueError(f"{line_num}행")
+            sample_dates.append(date_ord)
+            sample_lines.append(line_num)
+            last = line_num
+
+
+def _save(user_id, index):
+    """색인 파일 전체를 임시 파일에 쓴 뒤 교체"""
+    index_path = _index_path(user_id)
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, *index['fingerprint'], len(index['dates'])))
+        index['dates'].tofile(f)
+        index['lines'].tofile(f)
+    os.replace(tmp_path, index_path)
+
+
+def _load(user_id, fingerprint):
+    """색인 파일을 읽어 반환. 없거나 가계부와 맞지 않으면 None"""
+    try:
+        with open(_index_path(user_id), 'rb') as f:
+            magic, size, mtime, count = _HEADER.unpack(f.read(HEADER_SIZE))
+            if magic != MAGIC or (size, mtime) != fingerprint:
+                return None
+            dates = array('i')
+            lines = array('i')
+            dates.fromfile(f, count)
+            lines.fromfile(f, count)
+    except Exception:
+        return None
+    return {'fingerprint': fingerprint, 'dates': dates, 'lines': lines}
+
+
+def _build(user_id, fingerprint):
+    """가계부를 읽어 색인 생성. 날짜순이 아니면 None"""
+    index = {'fingerprint': fingerprint, 'dates': array('i'), 'lines': array('i')}
+    previous = ''
+    for line_nums, (dates,) in ledger_reader.iter_ledger_batches(_ledger_path(user_id), ('date',)):
+        if not dates:
+            continue
+        if dates[0] < previous or any(map(gt, dates, dates[1:])):
+            return None
+        _add_samples(index, zip(line_nums, dates))
+        previous = dates[-1]
+    return index
+
+
+def disable(user_id):
+    """날짜순 저장 해제 (가계부는 그대로 두고 색인만 지움)"""
+    _indexes.pop(user_id, None)
+    if is_enabled(user_id):
+        os.remove(_index_path(user_id))
+
+
+def get_date_index(user_id):
+    """
+    사용자의 날짜 색인 반환. 날짜순 저장을 쓰지 않으면 None.
+    가계부가 색인과 다르면 다시 만들고, 다른 곳에서 고쳐 날짜순이 아니게 되었으면 날짜순 저장을 해제
+    """
+    if not is_enabled(user_id):
+        return None
+    fingerprint = _fingerprint(_ledger_path(user_id))
+    index = _indexes.get(user_id)
+    if index is None or index['fingerprint'] != fingerprint:
+        index = _load(user_id, fingerprint)
+        if index is None:
+            try:
+                index = _build(user_id, fingerprint)
+            except ValueError:
+                index = None
+            if index is None:
+                disable(user_id)
+                print(f"!오류: {user_id}{LEDGER_FILE_SUFFIX} 파일이 날짜순이 아니어서 날짜순 저장을 해제합니다.")
+                return None
+            _save(user_id, index)
+        _indexes[user_id] = index
+    return index
+
+
+def note_write(user_id, fingerprint):
+    """
+    줄의 위치를 바꾸지 않는 쓰기(제자리 수정, 삭제 표시) 뒤에 호출. fingerprint는 쓰기 전 가계부 상태.
+    표본은 그대로 맞으므로 색인이 쓰기 전 가계부와 맞았으면 지문만 갱신 (다시 만들지 않음)
+    """
+    if not is_enabled(user_id):
+        return
+    index = _indexes.get(user_id)
+    if index is None or index['fingerprint'] != fingerprint:
+        index = _load(user_id, fingerprint)
+    if index is None:
+        return
+    index['fingerprint'] = _fingerprint(_ledger_path(user_id))
+    _indexes[user_id] = index
+    _save(user_id, index)
+
+
+def _block_keys(user_id, index, i, line_count):
+    """
+    표본 i-1과 표본 i 사이 구간(행 번호 lo ~ hi-1)의 (lo, hi, 줄별 날짜 목록).
+    빈 줄/삭제된 줄은 바로 앞 내역의 날짜를 이어받으므로 목록은 오름차순
+    """
+    lo = index['lines'][i - 1] + 1 if i > 0 else 1
+    hi = index['lines'][i] if i < len(index['lines']) else line_count + 1
+    keys = []
+    key = ''
+    for raw in line_index.read_raw_lines(user_id, lo, hi):
+        live = _live_date(raw)
+        if live is not None:
+            key = live
+        keys.append(key)
+    return lo, hi, keys
+
+
+def _insert_positions(user_id, index, line_count, dates):
+    """
+    오름차순 날짜 목록의 각 내역이 들어갈 원래 가계부의 행 번호 (그 날짜보다 늦은 첫 내역의 자리,
+    없으면 line_count + 1). 표본을 이진 탐색한 뒤 표본 사이의 줄만 읽으며, 같은 구간은 한 번만 읽는다.
+    (위치 목록, 새 줄이 들어간 구간 번호 목록) 반환
+    """
+    positions = []
+    blocks = []
+    block = None
+    for date_str in dates:
+        i = bisect_right(index['dates'], date_codec.parse_date(date_str))
+        if block is None or block[0] != i:
+            block = (i, *_block_keys(user_id, index, i, line_count))
+            blocks.append(i)
+        _, lo, _, keys = block
+        positions.append(lo + bisect_right(keys, date_str))
+    return positions, blocks
+
+
+def _split_blocks(user_id, index, blocks, line_count):
+    """끼워 넣은 줄 때문에 2 * SPARSE_STEP줄보다 길어진 구간에 표본 추가 (구간 번호는 뒤에서부터 처리)"""
+    for i in reversed(blocks):
+        lo = index['lines'][i - 1] + 1 if i > 0 else 1
+        hi = index['lines'][i] if i < len(index['lines']) else line_count + 1
+        if hi - lo <= 2 * SPARSE_STEP:
+            continue
+        block = {'dates': array('i'), 'lines': array('i', [lo - 1])}
+        _add_samples(block, ((line_num, _live_date(raw)) for line_num, raw in
+                             enumerate(line_index.read_raw_lines(user_id, lo, hi - SPARSE_STEP // 2), lo)))
+        index['dates'][i:i] = block['dates']
+        index['lines'][i:i] = block['lines'][1:]
+
+
+def insert_lines(user_id, items):
+    """
+    items((날짜 문자열, 줄 내용) 목록)를 날짜 자리에 끼워 넣음 (같은 날짜는 기존 내역 뒤, items 순서 유지).
+    각 줄의 행 번호 목록 반환 (items 순서). 모두 마지막 날짜 이후이면 파일 끝에 추가만 한다.
+    날짜순 저장을 쓰지 않으면 끝에 추가
+    """
+    index = get_date_index(user_id)
+    if index is None:
+        first = line_index.append_lines(user_id, [text for _, text in items])
+        return list(range(first, first + len(items)))
+    order = sorted(range(len(items)), key=lambda i: items[i][0])
+    line_count = line_index.line_count(user_id)
+    positions, blocks = _insert_positions(user_id, index, line_count, [items[i][0] for i in order])
+    inserted = line_index.insert_lines(user_id, positions, [items[i][1] for i in order])
+    line_nums = [0] * len(items)
+    for line_num, i in zip(inserted, order):
+        line_nums[i] = line_num
+    if positions[0] > line_count:
+        # 끝에 추가만 한 경우
+        _add_samples(index, ((line_num, items[i][0]) for line_num, i in zip(inserted, order)))
+    else:
+        # 뒤의 표본은 그 앞에 들어간 줄 수만큼 행 번호가 밀림
+        sample_lines = index['lines']
+        for k in range(bisect_left(sample_lines, positions[0]), len(sample_lines)):
+            sample_lines[k] += bisect_right(positions, sample_lines[k])
+        _split_blocks(user_id, index, blocks, line_count + len(items))
+    index['fingerprint'] = _fingerprint(_ledger_path(user_id))
+    _save(user_id, index)
+    return line_nums
+
+
+def find_start(user_id, date_ord):
+    """
+    date_ord 이후의 내역을 읽기 시작할 (행 번호, 바이트 위치). 그 앞의 줄은 모두 date_ord보다 이르다.
+    날짜순 저장을 쓰지 않으면 None
+    """
+    index = get_date_index(user_id)
+    if index is None:
+        return None
+    i = bisect_left(index['dates'], date_ord) if date_ord is not None else 0
+    if i == 0:
+        return 1, 0
+    line_num = index['lines'][i - 1]
+    return line_num, line_index.get_index(user_id)['offsets'][line_num - 1]
+
+
+def migrate(user_id):
+    """
+    가계부를 날짜순으로 다시 쓰고(같은 날짜는 원래 순서, 빈 줄/삭제된 줄/줄 끝 공백은 정리)
+    날짜 색인을 만들어 날짜순 저장을 켬. 내역 수 반환. 형식이 틀린 줄이 있으면 ValueError (행 번호)
+    """
+    ledger_path = _ledger_path(user_id)
+    if not ledger_path.exists():
+        raise ValueError(f"{ledger_path.name} 파일이 존재하지 않습니다.")
+    # 형식 검사 (틀린 줄이 있으면 정렬하지 않음)
+    for _ in ledger_reader.iter_ledger_batches(ledger_path, ('date',)):
+        pass
+    records = []
+    with open(ledger_path, 'rb') as f:
+        for raw in f.read().split(b'\n'):
+            live = _live_date(raw)
+            if live is not None:
+                records.append((live, raw.strip()))
+    # 한 번만 정렬 (안정 정렬이므로 같은 날짜는 원래 순서)
+    records.sort(key=itemgetter(0))
+    file_rewrite.rewrite_file(ledger_path, (raw.decode('utf-8') + "\n" for _, raw in records))
+    # 행 번호가 바뀌었으므로 파일 검사는 처음부터 다시
+    verify_cache.invalidate(ledger_path)
+    verify_cache.save_cache()
+    # 줄 위치 색인도 지금 다시 만들어 둠 (첫 기록 때 가계부 전체를 읽지 않도록)
+    line_index.get_index(user_id)
+    _indexes.pop(user_id, None)
+    index = _build(user_id, _fingerprint(ledger_path))
+    _save(user_id, index)
+    _indexes[user_id] = index
+    return len(records)
+
+
+# 사용법: python sorted_ledger.py migrate|off <ID>
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in ('migrate', 'off'):
+        print("사용법: python sorted_ledger.py migrate|off <ID>")
+        sys.exit(1)
+    command, user_id = sys.argv[1], sys.argv[2]
+    try:
+        if command == 'migrate':
+            count = migrate(user_id)
+        else:
+            disable(user_id)
+    except Exception as e:
+        print(f"!오류: {e}")
+        sys.exit(1)
+    if command == 'migrate':
+        print(f"{count}개의 내역을 날짜순으로 정렬했습니다. 새 내역은 날짜 자리에 추가됩니다.")
+    else:
+        print("날짜순 저장을 해제했습니다. 새 내역은 가계부 끝에 추가됩니다.")
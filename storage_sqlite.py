@@ -0,0 +1,283 @@
+import sqlite3
+from itertools import repeat
+from pathlib import Path
+import date_codec
+import ledger_reader
+import storage_tsv
+
+# 홈 경로 설정
+HOME_DIR = Path.cwd()
+# 모든 사용자의 가계부를 담는 데이터베이스 파일
+DB_FILE_NAME = "household_ledger.db"
+
+
+# --------------------------------------------------------------
+# SQLite 가계부 저장소 (ledger_storage의 sqlite 백엔드)
+# 검색과 합계를 인덱스를 쓰는 SQL로 처리한다.
+#   (user, date)     : 기간 검색, 잔고, 월별 예산 지출 (type, amount를 함께 담아 표를 읽지 않음)
+#   (user, category) : 카테고리 검색 (date를 붙여 최신순 정렬도 인덱스로 처리)
+#   (user, payment)  : 결제수단 검색 (위와 같음)
+# 날짜는 ordinal 정수로 저장. 행 번호(line)는 TSV 파일의 줄 번호와 같다.
+# 파일 검사(verify_files)와 다른 도구가 TSV 파일을 기준으로 하므로 쓰기는 TSV 파일에도
+# 그대로 반영하고(storage_tsv), 데이터베이스 변경은 같은 트랜잭션 안에서 처리한다.
+# TSV 파일의 크기나 수정시각이 기록과 다르면(다른 곳에서 고친 경우) 그 사용자의 내역을
+# 파일에서 다시 가져온다.
+# 날짜순 저장(sorted_ledger)으로 새 줄이 가운데에 들어가면 그 뒤 행의 line을 함께 민다.
+# --------------------------------------------------------------
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ledger (
+    user TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    date INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    payment TEXT NOT NULL,
+    PRIMARY KEY (user, line)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ledger_user_date ON ledger (user, date, type, amount);
+CREATE INDEX IF NOT EXISTS ledger_user_category ON ledger (user, category, date);
+CREATE INDEX IF NOT EXISTS ledger_user_payment ON ledger (user, payment, date);
+CREATE TABLE IF NOT EXISTS ledger_source (
+    user TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    line_count INTEGER NOT NULL
+);
+"""
+
+_INSERT_SQL = "INSERT INTO ledger VALUES (?, ?, ?, ?, ?, ?, ?)"
+_SELECT_SQL = "SELECT line, date, type, amount, category, payment FROM ledger"
+
+_conn = None
+
+
+def _connect():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(HOME_DIR / DB_FILE_NAME)
+        _conn.executescript(_SCHEMA)
+    return _conn
+
+
+def _record_source(conn, user_id, line_count):
+    """방금 맞춘 TSV 파일 상태(크기, 수정시각, 줄 수) 기록"""
+    size, mtime_ns = storage_tsv.ledger_fingerprint(storage_tsv.ledger_file_path(user_id))
+    conn.execute("INSERT OR REPLACE INTO ledger_source VALUES (?, ?, ?, ?)",
+                 (user_id, size, mtime_ns, line_count))
+
+
+def _import_file(conn, user_id, file_path):
+    """TSV 파일의 내역으로 사용자의 행을 교체 (트랜잭션 안에서 호출)"""
+    stats = {}
+    conn.execute("DELETE FROM ledger WHERE user = ?", (user_id,))
+    for line_nums, (dates, types, amounts, categories, payments) in \
+            ledger_reader.iter_ledger_batches(file_path, stats=stats):
+        date_ords = list(map(date_codec.parse_date, dates))
+        if None in date_ords or not set(types) <= {'E', 'I'}:
+            bad = next(i for i in range(len(dates)) if date_ords[i] is None or types[i] not in ('E', 'I'))
+            raise ValueError(f"{line_nums[bad]}행")
+        conn.executemany(_INSERT_SQL, zip(repeat(user_id), line_nums, date_ords, types,
+                                          amounts, categories, payments))
+    _record_source(conn, user_id, stats['line_count'])
+
+
+def _sync(user_id):
+    """데이터베이스를 TSV 파일과 맞춘 뒤 연결 반환"""
+    conn = _connect()
+    file_path = storage_tsv.ledger_file_path(user_id)
+    storage_tsv.ensure_ledger_file(user_id)
+    source = conn.execute("SELECT size, mtime_ns FROM ledger_source WHERE user = ?", (user_id,)).fetchone()
+    if source == storage_tsv.ledger_fingerprint(file_path):
+        return conn
+    try:
+        with conn:
+            _import_file(conn, user_id, file_path)
+    except Exception as e:
+        storage_tsv.exit_on_read_error(file_path, e)
+    return conn
+
+
+def _line_count(conn, user_id):
+    return conn.execute("SELECT line_count FROM ledger_source WHERE user = ?", (user_id,)).fetchone()[0]
+
+
+def _replace_rows(conn, user_id, rows):
+    """TSV 파일을 rows 순서대로 다시 쓴 뒤 같은 내용으로 사용자의 행 교체 (트랜잭션 안에서 호출)"""
+    conn.execute("DELETE FROM ledger WHERE user = ?", (user_id,))
+    conn.executemany(_INSERT_SQL, (
+        (user_id, line, date_codec.parse_date(item['날짜']), item['유형'], item['금액'],
+         item['카테고리'], item['결제수단'])
+        for line, item in enumerate(rows, 1)))
+    _record_source(conn, user_id, len(rows))
+
+
+def _shift_lines(conn, user_id, line_num):
+    """line_num 이상인 행의 line을 하나씩 뒤로 (가운데에 줄이 끼워진 경우, 트랜잭션 안에서 호출)"""
+    # 기본 키가 겹치지 않도록 음수로 옮긴 뒤 되돌림
+    conn.execute("UPDATE ledger SET line = -(line + 1) WHERE user = ? AND line >= ?", (user_id, line_num))
+    conn.execute("UPDATE ledger SET line = -line WHERE user = ? AND line < 0", (user_id,))
+
+
+def _to_dicts(cursor):
+    return [{'idx': line, '날짜': date_codec.to_date(date_ord).isoformat(), '유형': type_str,
+             '금액': amount, '카테고리': category, '결제수단': payment}
+            for line, date_ord, type_str, amount, category, payment in cursor]
+
+
+# --------------------------------------------------------------
+# 저장소 인터페이스 (ledger_storage 참고)
+# --------------------------------------------------------------
+
+def start_session(user_id):
+    storage_tsv.start_session(user_id)
+    _connect()
+
+
+def end_session():
+    global _conn
+    storage_tsv.end_session()
+    if _conn is not None:
+        try:
+            # 검색 조건별 인덱스 선택에 쓰이는 통계 갱신 (필요한 경우만 수행)
+            _conn.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
+        _conn.close()
+        _conn = None
+
+
+def load_rows(user_id):
+    return search_rows(user_id)
+
+
+def _where(user_id, date_from, date_to, category, payment, type, amount_min, amount_max):
+    """검색 조건의 WHERE 절과 인자"""
+    where = ["user = ?"]
+    params = [user_id]
+    # 어느 인덱스를 쓸지는 SQLite가 고른다 (세션 종료 시 PRAGMA optimize로 통계 갱신)
+    for condition, value in (("date >= ?", date_from), ("date <= ?", date_to),
+                             ("category = ?", category), ("payment = ?", payment), ("type = ?", type),
+                             ("amount >= ?", amount_min), ("amount <= ?", amount_max)):
+        if value is not None:
+            where.append(condition)
+            params.append(value)
+    return ' AND '.join(where), params
+
+
+def search_rows(user_id, date_from=None, date_to=None, category=None, payment=None,
+                type=None, amount_min=None, amount_max=None):
+    conn = _sync(user_id)
+    where, params = _where(user_id, date_from, date_to, category, payment, type, amount_min, amount_max)
+    # 같은 날짜는 파일 순서 유지 (TSV 백엔드와 같은 순서)
+    return _to_dicts(conn.execute(f"{_SELECT_SQL} WHERE {where} ORDER BY date DESC, line", params))
+
+
+def search_result(user_id, date_from=None, date_to=None, category=None, payment=None,
+                  type=None, amount_min=None, amount_max=None):
+    conn = _sync(user_id)
+    where, params = _where(user_id, date_from, date_to, category, payment, type, amount_min, amount_max)
+    count = conn.execute(f"SELECT COUNT(*) FROM ledger WHERE {where}", params).fetchone()[0]
+
+    def fetch(start, stop):
+        # 요청한 구간만 가져옴 (search_rows와 같은 순서)
+        return _to_dicts(_connect().execute(
+            f"{_SELECT_SQL} WHERE {where} ORDER BY date DESC, line LIMIT ? OFFSET ?",
+            [*params, stop - start, start]))
+
+    return {'count': count, 'fetch': fetch}
+
+
+def total_asset(user_id):
+    conn = _sync(user_id)
+    return conn.execute(
+        "SELECT COALESCE(SUM(CASE type WHEN 'I' THEN amount ELSE -amount END), 0)"
+        " FROM ledger WHERE user = ?", (user_id,)).fetchone()[0]
+
+
+def range_totals(user_id, date_from, date_to):
+    conn = _sync(user_id)
+    totals = dict(conn.execute(
+        "SELECT type, SUM(amount) FROM ledger WHERE user = ? AND date BETWEEN ? AND ? GROUP BY type",
+        (user_id, date_from, date_to)))
+    return totals.get('E', 0), totals.get('I', 0)
+
+
+def month_expenses(user_id, months):
+    conn = _sync(user_id)
+    expenses = {}
+    for month in months:
+        month_range = date_codec.parse_month_range(month)
+        if month_range is None:
+            expenses[month] = 0
+            continue
+        expenses[month] = conn.execute(
+            "SELECT COALESCE(SUM(amount), 0) FROM ledger"
+            " WHERE user = ? AND date BETWEEN ? AND ? AND type = 'E'",
+            (user_id, *month_range)).fetchone()[0]
+    return expenses
+
+
+def append_row(user_id, date, type, amount, category, payment):
+    conn = _sync(user_id)
+    line_count = _line_count(conn, user_id)
+    with conn:
+        line = storage_tsv.append_row(user_id, date, type, amount, category, payment)
+        if line <= line_count:
+            _shift_lines(conn, user_id, line)
+        conn.execute(_INSERT_SQL, (user_id, line, date_codec.parse_date(date), type, amount, category, payment))
+        _record_source(conn, user_id, max(line, line_count + 1))
+
+
+def append_rows(user_id, entries):
+    conn = _sync(user_id)
+    line_count = _line_count(conn, user_id)
+    with conn:
+        line_nums = storage_tsv.add_rows(user_id, entries)
+        if min(line_nums) <= line_count:
+            # 날짜순 가계부의 여러 자리에 들어감: 파일에서 다시 가져옴
+            _import_file(conn, user_id, storage_tsv.ledger_file_path(user_id))
+        else:
+            conn.executemany(_INSERT_SQL, (
+                (user_id, line, date_codec.parse_date(date), type, amount, category, payment)
+                for line, (date, type, amount, category, payment) in zip(line_nums, entries)))
+            _record_source(conn, user_id, max(line_nums))
+    return min(line_nums)
+
+
+def save_rows(user_id, rows):
+    conn = _sync(user_id)
+    with conn:
+        rows = storage_tsv.save_rows(user_id, rows)
+        _replace_rows(conn, user_id, rows)
+
+
+def update_row(user_id, idx, date, type, amount, category, payment):
+    conn = _sync(user_id)
+    line_count = _line_count(conn, user_id)
+    with conn:
+        new_idx = storage_tsv.update_row(user_id, idx, date, type, amount, category, payment)
+        if new_idx == idx:
+            conn.execute("UPDATE ledger SET date = ?, type = ?, amount = ?, category = ?, payment = ?"
+                         " WHERE user = ? AND line = ?",
+                         (date_codec.parse_date(date), type, amount, category, payment, user_id, idx))
+        else:
+            # 원래 줄에 들어가지 않아(또는 날짜순 가계부에서 날짜가 바뀌어) 다시 추가된 경우
+            conn.execute("DELETE FROM ledger WHERE user = ? AND line = ?", (user_id, idx))
+            if new_idx <= line_count:
+                _shift_lines(conn, user_id, new_idx)
+            conn.execute(_INSERT_SQL, (user_id, new_idx, date_codec.parse_date(date), type, amount,
+                                       category, payment))
+            line_count += 1
+        _record_source(conn, user_id, line_count)
+    return new_idx
+
+
+def delete_row(user_id, idx):
+    conn = _sync(user_id)
+    line_count = _line_count(conn, user_id)
+    with conn:
+        storage_tsv.delete_row(user_id, idx)
+        conn.execute("DELETE FROM ledger WHERE user = ? AND line = ?", (user_id, idx))
+        _record_source(conn, user_id, line_count)
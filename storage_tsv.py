@@ -0,0 +1,337 @@
+import os
+import sys
+from pathlib import Path
+import balance_index
+import file_rewrite
+import ledger_columns
+import ledger_summary
+import line_index
+import sorted_ledger
+
+# 홈 경로 설정
+HOME_DIR = Path.cwd()
+# 가계부 파일 접미사
+LEDGER_FILE_SUFFIX = "_HL.txt"
+
+
+# --------------------------------------------------------------
+# TSV 가계부 저장소 (<ID>_HL.txt, ledger_storage의 기본 백엔드)
+# 가계부 파일을 열 단위(ledger_columns)로 읽어 로그인 세션 동안 캐시하고,
+# 합계는 총계/월별 집계 파일(ledger_summary)과 날짜별 누적합 트리(balance_index)로 구한다.
+# 행 번호(idx)는 파일의 줄 번호. 수정/삭제는 줄 위치 색인(line_index)으로 그 줄만 고친다.
+# 날짜순 저장(sorted_ledger)을 쓰는 사용자는 새 내역을 날짜 자리에 끼워 넣는다. 가운데에 들어가면
+# 뒤의 행 번호가 바뀌므로 세션 캐시는 다음 조회 때 다시 읽는다.
+# --------------------------------------------------------------
+
+
+def ledger_file_path(user_id):
+    return HOME_DIR / f"{user_id}{LEDGER_FILE_SUFFIX}"
+
+
+def ensure_ledger_file(user_id):
+    """가계부 파일이 없으면 빈 파일 생성. 새로 만들었으면 True"""
+    file_path = ledger_file_path(user_id)
+    if os.path.exists(file_path):
+        return False
+    print(f"!오류: 가계부 파일이 존재하지 않습니다. 새로운 파일 생성.")
+    with open(file_path, 'w', encoding='utf-8') as f:
+        pass
+    return True
+
+
+def exit_on_read_error(file_path, e):
+    """가계부를 읽다가 난 오류 출력 후 종료 (ValueError는 6.2.1절 문법 검사 오류, 메시지: 행 번호)"""
+    if isinstance(e, ValueError):
+        print(f"!치명적오류: 현재 {file_path.name} {e}에서 오류가 발생되었습니다.")
+    else:
+        print(f"!치명적오류: {file_path.name} 파일을 읽는 중 오류가 발생했습니다: {e}")
+    print("프로그램을 종료시킵니다.")
+    sys.exit()
+
+
+def load_columns(user_id):
+    """사용자의 가계부 파일을 열 단위(ledger_columns)로 읽어 반환"""
+    file_path = ledger_file_path(user_id)
+    try:
+        if ensure_ledger_file(user_id):
+            return ledger_columns.new_columns()
+        return ledger_columns.load_ledger_columns(user_id)
+    except Exception as e:
+        exit_on_read_error(file_path, e)
+
+
+# --------------------------------------------------------------
+# 로그인 세션 가계부 캐시
+# 로그인한 사용자의 가계부를 열 단위로 한 번만 읽어 두고 조회/편집/저장에서 함께 쓴다.
+# 이 모듈의 저장 함수는 파일과 캐시를 함께 갱신하고, 세션 밖에서 파일의 크기나
+# 수정시각이 바뀌면 다음 조회 때 다시 읽는다. (mainPrompt에서 시작/종료)
+# --------------------------------------------------------------
+
+# {'user_id': str, 'fingerprint': (크기, 수정시각) 또는 None, 'columns': dict 또는 None}
+_ledger_session = None
+
+
+def start_session(user_id):
+    """로그인한 사용자의 가계부 캐시 시작 (파일은 처음 조회할 때 읽음)"""
+    global _ledger_session
+    _ledger_session = {'user_id': user_id, 'fingerprint': None, 'columns': None}
+
+
+def end_session():
+    """가계부 캐시 종료 (로그아웃). 삭제/수정으로 생긴 빈 자리가 많으면 가계부 정리"""
+    global _ledger_session
+    if _ledger_session is not None:
+        try:
+            if line_index.needs_compaction(_ledger_session['user_id']):
+                line_index.compact(_ledger_session['user_id'])
+        except Exception:
+            # 정리는 다음 로그아웃 때 다시 시도 (임시 파일에 쓴 뒤 교체하므로 가계부는 그대로)
+            pass
+    _ledger_session = None
+
+
+def ledger_fingerprint(file_path):
+    st = os.stat(file_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _session_for(user_id):
+    if _ledger_session is not None and _ledger_session['user_id'] == user_id:
+        return _ledger_session
+    return None
+
+
+def get_columns(user_id):
+    """
+    사용자의 가계부를 열 단위로 반환.
+    세션 캐시가 있고 파일이 그대로이면 다시 읽지 않는다.
+    """
+    session = _session_for(user_id)
+    if session is None:
+        return load_columns(user_id)
+    file_path = ledger_file_path(user_id)
+    if session['columns'] is not None and os.path.exists(file_path):
+        if ledger_fingerprint(file_path) == session['fingerprint']:
+            return session['columns']
+    columns = load_columns(user_id)
+    session['columns'] = columns
+    session['fingerprint'] = ledger_fingerprint(file_path)
+    return columns
+
+
+def _store_session_columns(user_id, columns):
+    """방금 파일에 쓴 내용(columns)을 세션 캐시에 반영"""
+    session = _session_for(user_id)
+    if session is None:
+        return
+    session['columns'] = columns
+    session['fingerprint'] = ledger_fingerprint(ledger_file_path(user_id)) if columns is not None else None
+
+
+# --------------------------------------------------------------
+# 저장소 인터페이스 (ledger_storage 참고)
+# --------------------------------------------------------------
+
+def load_rows(user_id):
+    """가계부 전체를 날짜 최신순 dict 리스트로 반환"""
+    columns = get_columns(user_id)
+    return ledger_columns.get_rows(columns, ledger_columns.sorted_row_ids(columns))
+
+
+def search_rows(user_id, date_from=None, date_to=None, category=None, payment=None,
+                type=None, amount_min=None, amount_max=None):
+    """조건에 맞는 내역을 날짜 최신순 dict 리스트로 반환 (날짜는 ordinal, 날짜/금액은 양 끝 포함)"""
+    columns = get_columns(user_id)
+    # 카테고리/결제수단/월 보조 색인으로 후보만 골라 정렬 (가계부 전체를 훑지 않음)
+    row_ids = ledger_columns.search_row_ids(columns, date_from, date_to, category, payment,
+                                            type, amount_min, amount_max)
+    return ledger_columns.get_rows(columns, row_ids)
+
+
+def search_result(user_id, date_from=None, date_to=None, category=None, payment=None,
+                  type=None, amount_min=None, amount_max=None):
+    """
+    search_rows와 같은 검색 결과를 {'count': 내역 수, 'fetch': fetch(start, stop)}로 반환.
+    row id 목록만 정해 두고 dict는 fetch로 요청한 구간(화면에 보여줄 페이지)만 만든다.
+    """
+    columns = get_columns(user_id)
+    row_ids = ledger_columns.search_row_ids(columns, date_from, date_to, category, payment,
+                                            type, amount_min, amount_max)
+
+    def fetch(start, stop):
+        return ledger_columns.get_rows(columns, row_ids[start:stop])
+
+    return {'count': len(row_ids), 'fetch': fetch}
+
+
+def total_asset(user_id):
+    """총 자산 (총 수입 - 총 지출)"""
+    return ledger_summary.get_total_asset(user_id)
+
+
+def range_totals(user_id, date_from, date_to):
+    """기간(날짜 ordinal, 양 끝 포함)의 (총 지출, 총 수입)"""
+    return balance_index.range_totals(user_id, date_from, date_to)
+
+
+def month_expenses(user_id, months):
+    """months('YYYY-MM' 목록) 각각의 총 지출 {'YYYY-MM': 지출}"""
+    summary = ledger_summary.load_months(user_id)
+    return {month: summary[month]['expense'] if month in summary else 0 for month in months}
+
+
+def _prepare_summary(user_id):
+    """가계부를 고치기 전에 집계 파일 준비 (없으면 고치기 전의 가계부로 생성해야 변경이 두 번 더해지지 않음)"""
+    ledger_summary.load_totals(user_id)
+    ledger_summary.load_months(user_id)
+
+
+def _fresh_session_columns(user_id):
+    """세션 캐시가 지금 파일과 같으면 그 열 단위 가계부, 아니면 None"""
+    session = _session_for(user_id)
+    file_path = ledger_file_path(user_id)
+    if session is not None and session['columns'] is not None and os.path.exists(file_path):
+        if ledger_fingerprint(file_path) == session['fingerprint']:
+            return session['columns']
+    return None
+
+
+def _format_line(date, type, amount, category, payment):
+    # 6.2.1절 형식: <Date><탭문자><Type><탭문자><Amount><탭문자><Category><탭문자><Payment>
+    return f"{date}\t{type}\t{amount}\t{category}\t{payment}"
+
+
+def _read_entry(user_id, idx):
+    """idx 행의 (날짜, 유형, 금액)을 그 줄만 읽어 반환"""
+    date, type, amount = line_index.read_line(user_id, idx).split('\t')[:3]
+    return date, type, int(amount)
+
+
+def _add_lines(user_id, entries):
+    """
+    내역들((날짜, 유형, 금액, 카테고리, 결제수단) 목록)을 가계부에 쓰고 각 내역의 행 번호 목록 반환 (entries 순서).
+    날짜순 저장이면 날짜 자리에, 아니면 파일 끝에 한 번의 쓰기로 추가
+    """
+    if sorted_ledger.is_enabled(user_id):
+        return sorted_ledger.insert_lines(user_id, [(entry[0], _format_line(*entry)) for entry in entries])
+    first_line = line_index.append_lines(user_id, [_format_line(*entry) for entry in entries])
+    return list(range(first_line, first_line + len(entries)))
+
+
+def add_rows(user_id, entries):
+    """
+    내역 여러 건((날짜, 유형, 금액, 카테고리, 결제수단) 목록)을 추가한 뒤 캐시/집계 갱신.
+    각 내역의 행 번호 목록 반환 (entries 순서)
+    """
+    ensure_ledger_file(user_id)
+    _prepare_summary(user_id)
+    # 추가 직전까지 캐시가 파일과 같았는지 확인
+    cached = _fresh_session_columns(user_id)
+    line_nums = _add_lines(user_id, entries)
+    if cached is not None and min(line_nums) <= cached['line_count']:
+        # 날짜순 가계부의 가운데에 들어가 뒤의 행 번호가 바뀜: 다음 조회 때 다시 읽음
+        cached = None
+    if cached is not None:
+        for line_num, entry in sorted(zip(line_nums, entries)):
+            ledger_columns.append_row(cached, line_num, *entry)
+        cached['line_count'] = max(line_nums)
+    _store_session_columns(user_id, cached)
+    ledger_summary.apply_entries(user_id, [entry[:3] for entry in entries])
+    return line_nums
+
+
+def append_row(user_id, date, type, amount, category, payment):
+    """가계부에 내역 한 줄 추가 후 캐시/집계 갱신 (보통 파일 끝, 날짜순 저장이면 날짜 자리). 추가한 행 번호 반환"""
+    return add_rows(user_id, [(date, type, amount, category, payment)])[0]
+
+
+def append_rows(user_id, entries):
+    """
+    내역 여러 건((날짜, 유형, 금액, 카테고리, 결제수단) 목록)을 한 번의 쓰기로 추가 후
+    캐시/집계 갱신. 추가한 첫 행 번호 반환
+    """
+    return min(add_rows(user_id, entries))
+
+
+def save_rows(user_id, rows):
+    """
+    가계부 파일을 rows(dict 리스트)로 다시 쓰고 세션 캐시를 다시 구성. 쓴 순서의 rows 반환.
+    줄은 원래 파일 순서(idx)대로 쓰고, 처음 달라진 줄부터만 임시 파일에 써서 교체하므로
+    중간에 끊겨도 원래 파일이 남는다.
+    집계 파일은 고치지 않으므로 금액 합계가 그대로인 변경(카테고리 변경 등)에 사용
+    """
+    file_path = ledger_file_path(user_id)
+    rows = sorted(rows, key=lambda item: item['idx'])
+    try:
+        file_rewrite.rewrite_file(file_path, (
+            _format_line(item['날짜'], item['유형'], item['금액'], item['카테고리'], item['결제수단']) + "\n"
+            for item in rows))
+    except Exception as e:
+        print(f"!치명적오류: {file_path.name} 파일을 저장하는 중 오류가 발생했습니다: {e}")
+        print("프로그램을 종료시킵니다.")
+        sys.exit()
+
+    # 저장한 내용으로 세션 캐시를 다시 구성 (파일을 다시 읽지 않음)
+    if _session_for(user_id) is not None:
+        columns = ledger_columns.new_columns()
+        try:
+            for i, item in enumerate(rows, 1):
+                ledger_columns.append_row(columns, i, item['날짜'], item['유형'], item['금액'],
+                                          item['카테고리'], item['결제수단'])
+            columns['line_count'] = len(rows)
+        except ValueError:
+            # 캐시에 담을 수 없는 내용이면 다음 조회 때 파일에서 다시 읽음
+            columns = None
+        _store_session_columns(user_id, columns)
+    return rows
+
+
+def update_row(user_id, idx, date, type, amount, category, payment):
+    """
+    idx 행을 새 내용으로 바꾸고 캐시/집계 갱신. 새 줄이 원래 줄 길이 안에 들어가면 제자리에서
+    덮어쓰고, 아니면 새 줄을 추가한 뒤 원래 줄을 지움 (날짜순 저장이면 날짜가 바뀐 경우에도 날짜 자리로 옮김).
+    추가와 삭제 사이에 끊기면 내역이 두 번 남을 뿐 사라지지 않는다.
+    바뀐 내역의 행 번호 반환
+    """
+    removed = _read_entry(user_id, idx)
+    _prepare_summary(user_id)
+    cached = _fresh_session_columns(user_id)
+    text = _format_line(date, type, amount, category, payment)
+    new_idx = idx
+    before = ledger_fingerprint(ledger_file_path(user_id))
+    moved = sorted_ledger.is_enabled(user_id) and date != removed[0]
+    if moved or not line_index.overwrite_line(user_id, idx, text):
+        new_idx = _add_lines(user_id, [(date, type, amount, category, payment)])[0]
+        # 날짜순 가계부에서 원래 줄 앞에 들어갔으면 원래 줄은 한 줄 뒤로 밀림
+        old_idx = idx + 1 if new_idx <= idx else idx
+        before = ledger_fingerprint(ledger_file_path(user_id))
+        line_index.delete_line(user_id, old_idx)
+    sorted_ledger.note_write(user_id, before)
+    if cached is not None and new_idx != idx and new_idx <= cached['line_count']:
+        # 날짜순 가계부의 가운데로 옮겨져 뒤의 행 번호가 바뀜: 다음 조회 때 다시 읽음
+        cached = None
+    if cached is not None:
+        row_id = ledger_columns.find_row(cached, idx)
+        if new_idx == idx:
+            ledger_columns.set_row(cached, row_id, date, type, amount, category, payment)
+        else:
+            ledger_columns.remove_row(cached, row_id)
+            cached['line_count'] = new_idx
+            ledger_columns.append_row(cached, new_idx, date, type, amount, category, payment)
+    _store_session_columns(user_id, cached)
+    ledger_summary.apply_change(user_id, removed=removed, added=(date, type, amount))
+    return new_idx
+
+
+def delete_row(user_id, idx):
+    """idx 행에 삭제 표시를 하고 캐시/집계 갱신"""
+    removed = _read_entry(user_id, idx)
+    _prepare_summary(user_id)
+    cached = _fresh_session_columns(user_id)
+    before = ledger_fingerprint(ledger_file_path(user_id))
+    line_index.delete_line(user_id, idx)
+    sorted_ledger.note_write(user_id, before)
+    if cached is not None:
+        ledger_columns.remove_row(cached, ledger_columns.find_row(cached, idx))
+    _store_session_columns(user_id, cached)
+    ledger_summary.apply_change(user_id, removed=removed)
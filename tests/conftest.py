@@ -0,0 +1,72 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# 모듈들이 저장소 최상위에 있으므로 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import balance_index
+import category
+import fileCheck
+import ledger_columns
+import ledger_pipeline
+import ledger_summary
+import line_index
+import sorted_ledger
+import storage_tsv
+import verify_cache
+
+# HOME_DIR을 임시 폴더로 바꿀 모듈
+HOME_MODULES = (balance_index, category, fileCheck, ledger_columns, ledger_pipeline, ledger_summary,
+                line_index, sorted_ledger, storage_tsv, verify_cache)
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    """임시 폴더를 홈 경로로 쓰고 모듈별 캐시를 비움"""
+    for module in HOME_MODULES:
+        monkeypatch.setattr(module, 'HOME_DIR', tmp_path)
+    monkeypatch.setattr(line_index, '_indexes', {})
+    monkeypatch.setattr(sorted_ledger, '_indexes', {})
+    monkeypatch.setattr(balance_index, '_trees', {})
+    monkeypatch.setattr(category, '_category_ids', {})
+    monkeypatch.setattr(storage_tsv, '_ledger_session', None)
+    monkeypatch.setattr(verify_cache, '_cache', None)
+    monkeypatch.setattr(verify_cache, '_dirty', False)
+    return tmp_path
+
+
+def external_write(path, text):
+    """
+    다른 프로그램이 가계부를 고친 것처럼 파일을 다시 씀.
+    크기가 같아도 지문이 달라지도록 수정시각을 1초 뒤로 옮긴다.
+    """
+    before = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(text)
+    mtime = max(os.stat(path).st_mtime_ns, before + 1_000_000_000)
+    os.utime(path, ns=(mtime, mtime))
+
+
+def parse_ledger(path):
+    """
+    가계부 파일을 단순하게 다시 읽은 결과: 날짜 최신순(같은 날짜는 파일 순서) dict 리스트.
+    빈 줄과 삭제 표시된 줄은 건너뛰고 줄 끝 공백은 무시한다.
+    """
+    rows = []
+    with open(path, 'r', encoding='utf-8', newline='\n') as f:
+        for line_num, line in enumerate(f.read().split('\n'), 1):
+            line = line.rstrip(' ')
+            if not line or line.startswith('#'):
+                continue
+            date, type, amount, category_id, payment = line.split('\t')
+            rows.append({'idx': line_num, '날짜': date, '유형': type, '금액': int(amount),
+                         '카테고리': category_id, '결제수단': payment})
+    return sorted(rows, key=lambda row: row['날짜'], reverse=True)
+
+
+def asset_of(rows):
+    """내역들의 총 자산 (수입 - 지출)"""
+    return sum(row['금액'] if row['유형'] == 'I' else -row['금액'] for row in rows)
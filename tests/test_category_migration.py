@@ -0,0 +1,66 @@
+import pytest
+
+import category
+import fileCheck
+import ledger_storage
+from conftest import external_write, parse_ledger
+
+USER = 'tester01'
+# 구분자를 쓰기 전의 설정 파일과 가계부 (카테고리 칸에 표준명이 그대로 저장됨)
+SETTINGS = "C1\t입금\t월급\nC2\t식비\t밥\nC3\t교통\n\n2023-01\t500000\n"
+LEGACY_LINES = [
+    "2023-01-01\tI\t100000\t입금\t계좌이체",
+    "2023-01-02\tE\t3000\t식비\t현금",
+    "2023-01-03\tE\t1200\t교통\t카드",
+    "2023-01-04\tE\t5000\t문화생활\t카드",
+    "2023-01-05\tE\t700\t미분류\t현금",
+    "2023-01-06\tE\t800\t밥\t현금   ",
+]
+
+
+@pytest.fixture
+def legacy_home(home):
+    external_write(home / "user_info.txt", f"{USER}\tpassword1\n")
+    external_write(home / f"{USER}_setting.txt", SETTINGS)
+    external_write(home / f"{USER}_HL.txt", "".join(line + "\n" for line in LEGACY_LINES))
+    return home
+
+
+def test_verify_files_upgrades_legacy_ledger(legacy_home, capsys):
+    assert fileCheck.verify_files(workers=1) is True
+    assert "카테고리 6건을 구분자로 바꿨습니다" in capsys.readouterr().out
+    # 설정 파일에 없던 이름은 새 카테고리, 쓸 수 없는 이름은 삭제된 구분자('미분류')가 됨
+    rows = sorted(parse_ledger(legacy_home / f"{USER}_HL.txt"), key=lambda row: row['idx'])
+    assert [row['카테고리'] for row in rows] == ['C1', 'C2', 'C3', 'C4', 'C5', 'C2']
+    assert (legacy_home / f"{USER}_HL.txt").read_text(encoding='utf-8').split('\n')[5].endswith("현금   ")
+    names, ids = category.category_ids(USER)
+    assert ids['문화생활'] == 'C4' and names['C5'] == category.UNCATEGORIZED
+    # 예산 섹션은 그대로
+    assert (legacy_home / f"{USER}_setting.txt").read_text(encoding='utf-8').endswith("\n\n2023-01\t500000")
+    assert [row['카테고리'] for row in sorted(ledger_storage.load_rows(USER), key=lambda row: row['idx'])] == \
+        ['입금', '식비', '교통', '문화생활', category.UNCATEGORIZED, '식비']
+    # 한 번 바꾼 뒤에는 다시 바꾸지 않음
+    assert fileCheck.verify_user_files(USER) is True
+    assert "구분자로 바꿨습니다" not in capsys.readouterr().out
+
+
+def test_legacy_ledger_with_default_settings(legacy_home):
+    # 카테고리가 없는 설정 파일은 기본 카테고리로 읽으므로 기본 구분자(동의어 포함)로 바꾸고
+    # 기본 카테고리에 없는 이름은 기본 카테고리 뒤에 추가
+    external_write(legacy_home / f"{USER}_setting.txt", "")
+    external_write(legacy_home / f"{USER}_HL.txt", "".join(line + "\n" for line in [
+        LEGACY_LINES[1], LEGACY_LINES[3], "2023-01-07\tE\t900\t경조사\t현금"]))
+    assert ledger_storage.migrate_categories(USER) == 3
+    rows = sorted(parse_ledger(legacy_home / f"{USER}_HL.txt"), key=lambda row: row['idx'])
+    assert [row['카테고리'] for row in rows] == ['C2', 'C5', 'C7']
+    ids = category.category_ids(USER)[1]
+    assert ids['교통'] == 'C3' and ids['경조사'] == 'C7'
+
+
+def test_other_errors_still_fatal_after_migration(legacy_home, capsys):
+    external_write(legacy_home / f"{USER}_HL.txt", LEGACY_LINES[0] + "\n2023-13-01\tE\t5\t식비\t현금\n")
+    with pytest.raises(SystemExit):
+        fileCheck.verify_files(workers=1)
+    out = capsys.readouterr().out
+    assert "카테고리 2건을 구분자로 바꿨습니다" in out
+    assert "2행에서 오류가 발생되었습니다" in out
@@ -0,0 +1,105 @@
+import pytest
+
+import category
+import ledger_import
+import storage_tsv
+from conftest import external_write, parse_ledger
+
+USER = 'tester01'
+
+
+@pytest.fixture
+def statement_home(home, monkeypatch):
+    """기본 카테고리 설정 파일과 수입 한 건이 있는 가계부"""
+    monkeypatch.setattr(category, 'USER_CATEGORY_MAP', {})
+    monkeypatch.setattr(category, 'USER_DELETED_SEPARATORS', [])
+    category.create_default_settings(USER)
+    external_write(home / f"{USER}_HL.txt", "2023-01-01\tI\t10000\tC1\t계좌이체\n")
+    return home
+
+
+def write_statement(home, name, text):
+    path = home / name
+    path.write_text(text, encoding='utf-8')
+    return path
+
+
+def test_maps_header_aliases(statement_home):
+    path = write_statement(statement_home, "card.csv", "\n".join([
+        "거래 일자,거래구분,거래금액,분류,결제 방법",
+        '2023.02.01,지출,"12,000원",밥,카드',
+        "2023/02/02 13:20,입금,₩3000,,현금",
+        "2023-02-03,E,-500,교,card",
+    ]) + "\n")
+    entries, errors = ledger_import.read_statement(USER, path)
+    assert errors == []
+    # 유형 열이 있으면 금액의 부호는 보지 않음, 수입은 항상 입금 카테고리
+    assert entries == [('2023-02-01', 'E', 12000, '식비', '카드'),
+                       ('2023-02-02', 'I', 3000, '입금', '현금'),
+                       ('2023-02-03', 'E', 500, '교통', '카드')]
+
+
+def test_maps_withdrawal_and_deposit_columns(statement_home):
+    path = write_statement(statement_home, "bank.tsv", "\n".join([
+        "거래일\t찾으신금액\t맡기신금액",
+        "2023-03-01\t1,500\t0",
+        "2023-03-02\t\t20000",
+        "2023-03-03\t100\t100",
+    ]) + "\n")
+    entries, errors = ledger_import.read_statement(USER, path, default_payment='현금')
+    assert entries == [('2023-03-01', 'E', 1500, '기타', '현금'), ('2023-03-02', 'I', 20000, '입금', '현금')]
+    assert errors == [(4, "출금액과 입금액 중 하나만 있어야 합니다.")]
+
+
+def test_amount_without_type_needs_rule(statement_home):
+    path = write_statement(statement_home, "plain.csv", "날짜,금액\n2023-04-01,-700\n2023-04-02,900\n")
+    # 유형 열이 없으면 부호로 추측하지 않음
+    with pytest.raises(ValueError, match="--sign"):
+        ledger_import.read_statement(USER, path, default_payment='현금')
+    entries, _ = ledger_import.read_statement(USER, path, '현금', ledger_import.SIGN_TYPE)
+    assert [entry[1:3] for entry in entries] == [('E', 700), ('I', 900)]
+    entries, errors = ledger_import.read_statement(USER, path, '현금', '지출')
+    assert entries == [('2023-04-02', 'E', 900, '기타', '현금')]
+    assert errors == [(2, "유형을 지정해 가져올 때는 금액에 부호를 쓸 수 없습니다.")]
+    with pytest.raises(ValueError):
+        ledger_import.read_statement(USER, path, '현금', '환불')
+
+
+def test_parse_args():
+    assert ledger_import._parse_args(['id', 'a.csv']) == ('id', 'a.csv', None, None)
+    assert ledger_import._parse_args(['id', 'a.csv', '현금', '--sign']) == \
+        ('id', 'a.csv', '현금', ledger_import.SIGN_TYPE)
+    assert ledger_import._parse_args(['--default-type', 'I', 'id', 'a.csv']) == ('id', 'a.csv', None, 'I')
+    assert ledger_import._parse_args(['id', 'a.csv', '--sign', '--default-type', 'E']) is None
+    assert ledger_import._parse_args(['id', 'a.csv', '--default-type']) is None
+    assert ledger_import._parse_args(['id', 'a.csv', '--signs']) is None
+
+
+def test_import_is_all_or_nothing(statement_home, capsys):
+    ledger = statement_home / f"{USER}_HL.txt"
+    before = ledger.read_bytes()
+    bad = write_statement(statement_home, "bad.csv", "\n".join([
+        "날짜,유형,금액,결제수단",
+        "2023-05-01,E,100,현금",
+        "2023-05-02,E,0,현금",
+        "2099-05-03,E,100,현금",
+    ]) + "\n")
+    with pytest.raises(ValueError, match="2개 행"):
+        ledger_import.import_statement(USER, bad)
+    assert "3행" in capsys.readouterr().out
+    # 지출이 수입보다 커지는 경우도 한 건도 쓰지 않음
+    overdraw = write_statement(statement_home, "overdraw.csv",
+                               "날짜,유형,금액,결제수단\n2023-05-01,E,6000,현금\n2023-05-02,E,6000,현금\n")
+    with pytest.raises(ValueError, match="지출이 수입보다"):
+        ledger_import.import_statement(USER, overdraw)
+    assert ledger.read_bytes() == before
+
+    good = write_statement(statement_home, "good.csv",
+                           "날짜,유형,금액,결제수단\n2023-05-01,E,6000,현금\n2023-05-02,I,50,카드\n")
+    assert ledger_import.import_statement(USER, good) == 2
+    rows = sorted(parse_ledger(ledger), key=lambda row: row['idx'])
+    assert [(row['날짜'], row['유형'], row['금액'], row['카테고리'], row['결제수단']) for row in rows] == [
+        ('2023-01-01', 'I', 10000, 'C1', '계좌이체'),
+        ('2023-05-01', 'E', 6000, 'C6', '현금'),
+        ('2023-05-02', 'I', 50, 'C1', '카드')]
+    assert storage_tsv.total_asset(USER) == 4050
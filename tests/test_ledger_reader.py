@@ -0,0 +1,44 @@
+import pytest
+
+import ledger_reader
+
+RECORDS = (
+    "2023-01-05\tE\t1000\tC2\t현금\n"
+    "\n"
+    "#023-01-06\tE\t\xff\tC2\t현금\n"
+    "  2023-01-07\tI\t500\tC5\t카드   \n"
+)
+
+
+def write_bytes(tmp_path, data):
+    path = tmp_path / "reader_HL.txt"
+    path.write_bytes(data)
+    return path
+
+
+@pytest.mark.parametrize('fields', [ledger_reader.FIELD_NAMES, ('date', 'amount'), ('payment',)])
+def test_reads_requested_fields(tmp_path, fields):
+    path = write_bytes(tmp_path, RECORDS.encode('utf-8'))
+    rows = {1: ('2023-01-05', 'E', 1000, 'C2', '현금'), 4: ('2023-01-07', 'I', 500, 'C5', '카드')}
+    expected = [(line_num, *(row[ledger_reader.FIELD_NAMES.index(name)] for name in fields))
+                for line_num, row in rows.items()]
+    stats = {}
+    assert list(ledger_reader.iter_ledger_fields(path, fields, stats)) == expected
+    assert stats['line_count'] == 4
+
+
+@pytest.mark.parametrize('fields', [ledger_reader.FIELD_NAMES, ('payment',), ('category', 'payment')])
+def test_undecodable_line_reports_line_number(tmp_path, fields):
+    # 요청한 열에 변환할 수 없는 바이트가 있으면 그 줄 번호. 삭제된 줄의 바이트는 보지 않음
+    data = RECORDS.encode('utf-8').replace(b'\xc3\xbf', b'\xff') + "2023-01-08\tE\t1\tC2\t".encode() + b'\xff\n'
+    path = write_bytes(tmp_path, data)
+    with pytest.raises(ValueError, match="^5행$"):
+        list(ledger_reader.iter_ledger_batches(path, fields))
+    # 요청하지 않은 열이면 읽을 수 있음
+    assert [row[0] for row in ledger_reader.iter_ledger_fields(path, ('date',))] == [1, 4, 5]
+
+
+def test_bad_field_count_reports_line_number(tmp_path):
+    path = write_bytes(tmp_path, "2023-01-05\tE\t1000\tC2\t현금\n2023-01-06\tE\t1000\tC2\n".encode('utf-8'))
+    with pytest.raises(ValueError, match="^2행$"):
+        list(ledger_reader.iter_ledger_batches(path, ('date',)))
@@ -0,0 +1,190 @@
+import random
+
+import pytest
+
+import ledger_columns
+import line_index
+import storage_tsv
+import verify_cache
+from conftest import asset_of, external_write, parse_ledger
+
+USER = 'tester'
+PAYMENTS = ['현금', '카드', '계좌이체']
+CATEGORIES = ['C1', 'C2', 'C3', 'C12']
+
+
+def random_entry(rng):
+    """(날짜, 유형, 금액, 카테고리, 결제수단) 임의 생성. 금액 자릿수를 섞어 줄 길이가 달라지게 함"""
+    date = f"2023-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    amount = rng.randint(1, 10 ** rng.randint(1, 9) - 1)
+    return date, rng.choice('EI'), amount, rng.choice(CATEGORIES), rng.choice(PAYMENTS)
+
+
+def write_ledger(home, entries):
+    path = home / f"{USER}_HL.txt"
+    external_write(path, "".join("\t".join(map(str, entry)) + "\n" for entry in entries))
+    return path
+
+
+def assert_consistent(path):
+    """세션 캐시, 새로 읽은 가계부, 집계, 줄 위치 색인이 모두 파일을 단순히 다시 읽은 결과와 같은지 확인"""
+    expected = parse_ledger(path)
+    assert storage_tsv.load_rows(USER) == expected
+    fresh = ledger_columns.load_ledger_columns(USER)
+    assert ledger_columns.get_rows(fresh, ledger_columns.sorted_row_ids(fresh)) == expected
+    assert storage_tsv.total_asset(USER) == asset_of(expected)
+    # 색인의 줄 위치와 죽은 바이트 수가 파일을 처음부터 읽어 만든 것과 같음
+    index = line_index.get_index(USER)
+    offsets, dead = line_index.build_index(path)
+    assert list(index['offsets']) == list(offsets)
+    assert index['dead'] == dead
+    lines = path.read_text(encoding='utf-8').split('\n')
+    for row in expected:
+        assert line_index.read_line(USER, row['idx']) == lines[row['idx'] - 1].strip()
+    return expected
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_edits_match_reparse(home, seed):
+    rng = random.Random(seed)
+    path = write_ledger(home, [random_entry(rng) for _ in range(40)])
+    storage_tsv.start_session(USER)
+    rows = assert_consistent(path)
+    for _ in range(150):
+        op = rng.random()
+        if op < 0.45 and rows:
+            # 새 줄이 짧으면 제자리 덮어쓰기, 길면 원래 줄을 지우고 끝에 추가
+            storage_tsv.update_row(USER, rng.choice(rows)['idx'], *random_entry(rng))
+        elif op < 0.75 and rows:
+            storage_tsv.delete_row(USER, rng.choice(rows)['idx'])
+        elif op < 0.95:
+            storage_tsv.append_row(USER, *random_entry(rng))
+        else:
+            line_index.compact(USER)
+        rows = assert_consistent(path)
+    storage_tsv.end_session()
+
+
+def test_overwrite_pads_with_spaces(home):
+    path = write_ledger(home, [('2023-01-01', 'I', 123456, 'C1', '계좌이체'),
+                               ('2023-01-02', 'E', 500, 'C2', '현금')])
+    size = path.stat().st_size
+    assert line_index.overwrite_line(USER, 1, "2023-01-01\tI\t7\tC1\t카드") is True
+    lines = path.read_text(encoding='utf-8').split('\n')
+    # 줄 길이는 그대로이고 줄어든 만큼 공백으로 채움
+    assert path.stat().st_size == size
+    assert lines[0] == "2023-01-01\tI\t7\tC1\t카드" + " " * 11
+    assert line_index.read_line(USER, 1) == "2023-01-01\tI\t7\tC1\t카드"
+    assert line_index.get_index(USER)['dead'] == 11
+    # 원래 줄보다 긴 내용은 쓰지 않음
+    assert line_index.overwrite_line(USER, 2, "2023-01-02\tE\t500\tC2\t계좌이체") is False
+    assert lines[1] == "2023-01-02\tE\t500\tC2\t현금"
+    assert parse_ledger(path)[1]['결제수단'] == '카드'
+
+
+def test_delete_marks_first_byte(home):
+    path = write_ledger(home, [('2023-01-01', 'I', 100, 'C1', '현금'),
+                               ('2023-01-02', 'E', 50, 'C2', '카드')])
+    line_index.delete_line(USER, 1)
+    assert path.read_text(encoding='utf-8').split('\n')[0] == "#023-01-01\tI\t100\tC1\t현금"
+    # 이미 지운 줄은 다시 지우거나 덮어쓸 수 없음
+    with pytest.raises(IndexError):
+        line_index.delete_line(USER, 1)
+    with pytest.raises(IndexError):
+        line_index.overwrite_line(USER, 1, "2023-01-01\tI\t1\tC1\t현금")
+    assert line_index.get_index(USER)['dead'] == len("#023-01-01\tI\t100\tC1\t현금".encode('utf-8')) + 1
+
+
+def test_insert_lines_shifts_following_lines(home):
+    path = write_ledger(home, [('2023-01-0' + str(day), 'E', day, 'C2', '현금') for day in range(1, 6)])
+    texts = ["2023-02-01\tE\t1\tC3\t카드", "2023-02-02\tE\t2\tC3\t카드", "2023-02-03\tE\t3\tC3\t카드"]
+    line_nums = line_index.insert_lines(USER, [2, 4, 6], texts)
+    lines = path.read_text(encoding='utf-8').split('\n')[:-1]
+    assert line_nums == [2, 5, 8]
+    for line_num, text in zip(line_nums, texts):
+        assert lines[line_num - 1] == text
+    assert [line for line in lines if line not in texts] == \
+        [f"2023-01-0{day}\tE\t{day}\tC2\t현금" for day in range(1, 6)]
+    assert list(line_index.get_index(USER)['offsets']) == list(line_index.build_index(path)[0])
+
+
+def test_compact_renumbers_lines(home):
+    path = write_ledger(home, [('2023-01-0' + str(day), 'E', 10 ** day, 'C2', '현금') for day in range(1, 8)])
+    storage_tsv.start_session(USER)
+    storage_tsv.delete_row(USER, 2)
+    storage_tsv.update_row(USER, 5, '2023-01-05', 'E', 1, 'C2', '현금')
+    storage_tsv.delete_row(USER, 6)
+    before = [(row['날짜'], row['금액']) for row in storage_tsv.load_rows(USER)]
+    assert line_index.needs_compaction(USER)
+    reclaimed = line_index.compact(USER)
+    text = path.read_text(encoding='utf-8')
+    assert reclaimed > 0 and '#' not in text and ' \n' not in text
+    rows = assert_consistent(path)
+    # 남은 줄은 순서대로 1번부터 다시 번호가 매겨짐
+    assert sorted(row['idx'] for row in rows) == list(range(1, 6))
+    assert [(row['날짜'], row['금액']) for row in rows] == before
+    assert line_index.get_index(USER)['dead'] == 0
+    assert not line_index.needs_compaction(USER)
+    storage_tsv.end_session()
+
+
+def test_index_file_header_tracks_ledger(home):
+    path = write_ledger(home, [('2023-01-01', 'I', 100, 'C1', '현금')])
+    line_index.append_line(USER, "2023-01-02\tE\t5\tC2\t카드")
+    line_index.overwrite_line(USER, 1, "2023-01-01\tI\t99\tC1\t현금")
+    fingerprint = line_index._fingerprint(path)
+    # 헤더의 지문이 지금 가계부와 같으면 파일에서 그대로 읽음
+    loaded = line_index._load(USER, fingerprint)
+    assert loaded is not None
+    assert list(loaded['offsets']) == list(line_index.build_index(path)[0])
+    assert loaded['dead'] == line_index.get_index(USER)['dead']
+    # 다른 곳에서 가계부를 고치면 색인 파일은 맞지 않는 것으로 보고 다시 만든다
+    external_write(path, path.read_text(encoding='utf-8') + "2023-01-03\tE\t1\tC2\t현금\n")
+    assert line_index._load(USER, line_index._fingerprint(path)) is None
+    line_index._indexes.clear()
+    assert line_index.line_count(USER) == 3
+    assert line_index.read_line(USER, 3) == "2023-01-03\tE\t1\tC2\t현금"
+
+
+def test_external_edit_invalidates_session_cache(home):
+    path = write_ledger(home, [('2023-01-01', 'I', 100, 'C1', '현금')])
+    storage_tsv.start_session(USER)
+    assert_consistent(path)
+    external_write(path, "2023-01-01\tI\t100\tC1\t현금\n2023-03-01\tE\t30\tC2\t카드\n")
+    rows = storage_tsv.load_rows(USER)
+    assert rows == parse_ledger(path)
+    assert line_index.read_line(USER, 2) == "2023-03-01\tE\t30\tC2\t카드"
+    storage_tsv.end_session()
+
+
+def test_in_place_writes_invalidate_verify_checkpoint(home):
+    path = write_ledger(home, [('2023-01-01', 'I', 100, 'C1', '현금')])
+
+    def mark():
+        verify_cache.mark_valid(path, verify_cache.get_fingerprint(path), '-', (1, 100, 'x', 0))
+
+    # 끝에 추가만 하면 체크포인트를 남겨 추가된 부분만 검사
+    mark()
+    line_index.append_line(USER, "2023-01-02\tE\t5\tC2\t카드")
+    assert verify_cache.get_checkpoint(path) is not None
+    # 제자리 수정/삭제는 앞부분이 바뀌므로 처음부터 다시 검사
+    mark()
+    line_index.overwrite_line(USER, 1, "2023-01-01\tI\t1\tC1\t현금")
+    assert verify_cache.get_checkpoint(path) is None
+    mark()
+    line_index.delete_line(USER, 2)
+    assert verify_cache.get_checkpoint(path) is None
+
+
+def test_update_adds_new_line_before_deleting_old(home, monkeypatch):
+    path = write_ledger(home, [('2023-01-01', 'I', 100, 'C1', '현금'), ('2023-01-02', 'E', 5, 'C2', '카드')])
+
+    def crash(user_id, idx):
+        raise KeyboardInterrupt
+
+    # 원래 줄을 지우기 전에 끊겨도 새 내용과 원래 내용이 모두 남음
+    monkeypatch.setattr(line_index, 'delete_line', crash)
+    with pytest.raises(KeyboardInterrupt):
+        storage_tsv.update_row(USER, 2, '2023-01-02', 'E', 5, 'C2', '계좌이체')
+    assert [row['결제수단'] for row in sorted(parse_ledger(path), key=lambda row: row['idx'])] == \
+        ['현금', '카드', '계좌이체']
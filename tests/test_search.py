@@ -0,0 +1,122 @@
+import itertools
+import random
+
+import pytest
+
+import date_codec
+import ledger_columns
+
+CATEGORIES = ['C1', 'C2', 'C3']
+PAYMENTS = ['현금', '카드', '계좌이체']
+
+
+def random_entry(rng):
+    date = f"2023-{rng.randint(1, 6):02d}-{rng.choice((1, 2, 15, 28)):02d}"
+    return date, rng.choice('EI'), rng.randint(1, 1000), rng.choice(CATEGORIES), rng.choice(PAYMENTS)
+
+
+def build_columns(rng, rows, in_order):
+    """rows행짜리 열 단위 가계부. in_order면 날짜순(columns['sorted'])으로 만든다"""
+    entries = [random_entry(rng) for _ in range(rows)]
+    if in_order:
+        entries.sort(key=lambda entry: entry[0])
+    columns = ledger_columns.new_columns()
+    for line_num, entry in enumerate(entries, 1):
+        ledger_columns.append_row(columns, line_num, *entry)
+    columns['line_count'] = rows
+    return columns
+
+
+def brute_force(columns, date_from=None, date_to=None, category=None, payment=None,
+                type=None, amount_min=None, amount_max=None):
+    """모든 행을 조건과 하나씩 비교한 뒤 날짜 최신순(같은 날짜는 파일 순서)으로 정렬"""
+    result = []
+    for row_id in range(ledger_columns.row_count(columns)):
+        row = ledger_columns.get_row(columns, row_id)
+        date_ord = date_codec.parse_date(row['날짜'])
+        if ((date_from is None or date_ord >= date_from) and (date_to is None or date_ord <= date_to)
+                and (category is None or row['카테고리'] == category)
+                and (payment is None or row['결제수단'] == payment)
+                and (type is None or row['유형'] == type)
+                and (amount_min is None or row['금액'] >= amount_min)
+                and (amount_max is None or row['금액'] <= amount_max)):
+            result.append(row_id)
+    return sorted(result, key=lambda row_id: columns['date'][row_id], reverse=True)
+
+
+def d(date_str):
+    return date_codec.parse_date(date_str)
+
+
+DATE_RANGES = [
+    (None, None),
+    (d('2023-03-01'), None),
+    (None, d('2023-02-15')),
+    (d('2023-02-02'), d('2023-04-28')),
+    (d('2023-03-15'), d('2023-03-15')),
+    # 내역이 없는 기간, 시작이 끝보다 늦은 기간
+    (d('2023-03-03'), d('2023-03-14')),
+    (d('2023-05-01'), d('2023-04-01')),
+]
+CATEGORY_VALUES = [None, 'C2', '없는카테고리']
+PAYMENT_VALUES = [None, '카드', '없는결제수단']
+TYPE_VALUES = [None, 'E', 'I']
+AMOUNT_RANGES = [(None, None), (500, None), (None, 300), (200, 700), (1001, None)]
+
+
+def assert_all_combinations(columns):
+    for (date_from, date_to), category, payment, type, (amount_min, amount_max) in itertools.product(
+            DATE_RANGES, CATEGORY_VALUES, PAYMENT_VALUES, TYPE_VALUES, AMOUNT_RANGES):
+        query = dict(date_from=date_from, date_to=date_to, category=category, payment=payment,
+                     type=type, amount_min=amount_min, amount_max=amount_max)
+        assert list(ledger_columns.search_row_ids(columns, **query)) == brute_force(columns, **query), query
+
+
+@pytest.fixture(params=[False, True], ids=['python', 'numpy'])
+def use_numpy(request, monkeypatch):
+    """NumPy 경로를 켜거나 끔. 켤 때는 작은 가계부에서도 쓰도록 최소 행 수를 0으로"""
+    if request.param:
+        if ledger_columns.np is None:
+            pytest.skip("NumPy가 설치되어 있지 않음")
+        monkeypatch.setattr(ledger_columns, 'NUMPY_MIN_ROWS', 0)
+    else:
+        monkeypatch.setattr(ledger_columns, 'np', None)
+    return request.param
+
+
+@pytest.mark.parametrize('in_order', [False, True], ids=['unsorted', 'sorted'])
+def test_search_matches_brute_force(use_numpy, in_order):
+    columns = build_columns(random.Random(7), 300, in_order)
+    assert columns['sorted'] is in_order
+    assert_all_combinations(columns)
+
+
+def test_search_after_edits_matches_brute_force(use_numpy):
+    # 추가/수정/삭제로 보조 색인이 바뀐 뒤에도 같은 결과
+    rng = random.Random(11)
+    columns = build_columns(rng, 200, True)
+    line_num = columns['line_count']
+    for _ in range(100):
+        op = rng.random()
+        if op < 0.4:
+            line_num += 1
+            ledger_columns.append_row(columns, line_num, *random_entry(rng))
+        elif op < 0.7:
+            ledger_columns.set_row(columns, rng.randrange(ledger_columns.row_count(columns)), *random_entry(rng))
+        else:
+            ledger_columns.remove_row(columns, rng.randrange(ledger_columns.row_count(columns)))
+    columns['line_count'] = line_num
+    assert_all_combinations(columns)
+
+
+def test_plan_search_picks_smallest_candidate_list():
+    columns = ledger_columns.new_columns()
+    for line_num in range(1, 101):
+        # C1은 두 건뿐, 결제수단은 모두 현금, 날짜는 모두 1월
+        category = 'C1' if line_num in (10, 90) else 'C2'
+        ledger_columns.append_row(columns, line_num, '2023-01-05', 'E', line_num, category, '현금')
+    kind, lists = ledger_columns.plan_search(columns, d('2023-01-01'), d('2023-01-31'), 'C1', '현금')
+    assert kind == 'category'
+    assert [list(lines) for lines in lists] == [[10, 90]]
+    assert ledger_columns.plan_search(columns, category='없는카테고리')[0] == 'empty'
+    assert ledger_columns.plan_search(columns)[0] == 'scan'
@@ -0,0 +1,167 @@
+import random
+
+import pytest
+
+import date_codec
+import line_index
+import sorted_ledger
+import storage_tsv
+from conftest import asset_of, external_write, parse_ledger
+
+USER = 'tester'
+# 작은 가계부로도 표본 경계를 여러 번 넘도록 표본 간격을 줄임
+STEP = 4
+
+
+@pytest.fixture
+def small_step(home, monkeypatch):
+    monkeypatch.setattr(sorted_ledger, 'SPARSE_STEP', STEP)
+    return home
+
+
+def line_text(date, amount, payment='현금'):
+    return f"{date}\tE\t{amount}\tC2\t{payment}"
+
+
+def live_lines(path):
+    """(행 번호, 날짜 문자열, 줄 내용) 목록. 빈 줄/삭제된 줄 제외"""
+    result = []
+    for line_num, line in enumerate(path.read_text(encoding='utf-8').split('\n'), 1):
+        line = line.rstrip(' ')
+        if line and not line.startswith('#'):
+            result.append((line_num, line[:10], line))
+    return result
+
+
+def assert_sorted_with_index(path):
+    """가계부가 날짜순이고 날짜 색인의 표본과 find_start가 파일과 맞는지 확인"""
+    lines = live_lines(path)
+    dates = [date for _, date, _ in lines]
+    assert dates == sorted(dates)
+    index = sorted_ledger.get_date_index(USER)
+    assert index is not None
+    line_count = line_index.line_count(USER)
+    by_line = {line_num: date for line_num, date, _ in lines}
+    # 표본 날짜는 그 앞의 내역보다 늦거나 같고 뒤의 내역보다 이르거나 같음
+    # (표본 줄이 나중에 지워져도 자리는 그대로이므로 경계로 쓸 수 있음)
+    # 표본 사이 구간은 2 * SPARSE_STEP줄을 넘지 않음
+    bounds = [0] + list(index['lines']) + [line_count + 1]
+    assert bounds == sorted(bounds)
+    for date_ord, line_num in zip(index['dates'], index['lines']):
+        assert all(date_codec.parse_date(date) <= date_ord for n, date in by_line.items() if n < line_num)
+        assert all(date_codec.parse_date(date) >= date_ord for n, date in by_line.items() if n > line_num)
+        if line_num in by_line:
+            assert date_codec.parse_date(by_line[line_num]) == date_ord
+    assert all(hi - lo - 1 <= 2 * STEP for lo, hi in zip(bounds, bounds[1:]))
+    # find_start: 돌려준 행 앞의 내역은 모두 그 날짜보다 이름
+    offsets = line_index.get_index(USER)['offsets']
+    probes = {date_codec.parse_date(date) + delta for date in dates for delta in (-1, 0, 1)}
+    for date_ord in sorted(probes) + [None]:
+        start, offset = sorted_ledger.find_start(USER, date_ord)
+        assert offset == offsets[start - 1]
+        if date_ord is not None:
+            assert all(date_codec.parse_date(date) < date_ord
+                       for line_num, date in by_line.items() if line_num < start)
+    return lines
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_inserts_keep_date_order(small_step, seed):
+    rng = random.Random(seed)
+    days = [f"2023-{month:02d}-{day:02d}" for month in range(1, 13) for day in (1, 15)]
+    path = small_step / f"{USER}_HL.txt"
+    external_write(path, "".join(line_text(rng.choice(days), k + 1) + "\n" for k in range(30)))
+    assert sorted_ledger.migrate(USER) == 30
+    assert sorted_ledger.is_enabled(USER)
+    storage_tsv.start_session(USER)
+    amount = 1000
+    assert_sorted_with_index(path)
+    for _ in range(80):
+        op = rng.random()
+        rows = storage_tsv.load_rows(USER)
+        if op < 0.7 or not rows:
+            # 한 번에 1~3건, 같은 날짜가 겹치도록 적은 날짜 중에서 고름
+            entries = []
+            for _ in range(rng.randint(1, 3)):
+                amount += 1
+                entries.append((rng.choice(days), 'E', amount, 'C2', '현금'))
+            line_nums = storage_tsv.add_rows(USER, entries)
+            lines = assert_sorted_with_index(path)
+            texts = {line_num: text for line_num, _, text in lines}
+            for line_num, entry in zip(line_nums, entries):
+                assert texts[line_num] == line_text(entry[0], entry[2])
+            # 같은 날짜의 기존 내역 뒤, 같이 넣은 내역끼리는 넣은 순서
+            for date in {entry[0] for entry in entries}:
+                same_day = [text for _, d, text in lines if d == date]
+                added = [line_text(date, entry[2]) for entry in entries if entry[0] == date]
+                assert same_day[-len(added):] == added
+        elif op < 0.85:
+            storage_tsv.delete_row(USER, rng.choice(rows)['idx'])
+        else:
+            # 날짜가 바뀐 수정은 지운 뒤 새 날짜 자리로 옮김
+            amount += 1
+            storage_tsv.update_row(USER, rng.choice(rows)['idx'], rng.choice(days), 'E', amount, 'C2', '카드')
+        expected = parse_ledger(path)
+        assert storage_tsv.load_rows(USER) == expected
+        assert storage_tsv.total_asset(USER) == asset_of(expected)
+        assert_sorted_with_index(path)
+    storage_tsv.end_session()
+
+
+def test_migrate_sorts_stably_and_cleans(small_step):
+    path = small_step / f"{USER}_HL.txt"
+    external_write(path, "\n".join([
+        line_text('2023-03-01', 1),
+        line_text('2023-01-01', 2) + "   ",
+        "#023-01-05\tE\t3\tC2\t현금",
+        "",
+        line_text('2023-03-01', 4),
+        line_text('2023-02-01', 5),
+    ]) + "\n")
+    assert sorted_ledger.migrate(USER) == 4
+    assert path.read_text(encoding='utf-8') == "".join(line + "\n" for line in [
+        line_text('2023-01-01', 2), line_text('2023-02-01', 5),
+        line_text('2023-03-01', 1), line_text('2023-03-01', 4)])
+    assert_sorted_with_index(path)
+
+
+def test_insert_before_first_and_after_last(small_step):
+    path = small_step / f"{USER}_HL.txt"
+    external_write(path, "".join(line_text(f"2023-05-{day:02d}", day) + "\n" for day in range(1, 21)))
+    sorted_ledger.migrate(USER)
+    assert sorted_ledger.insert_lines(USER, [('2023-01-01', line_text('2023-01-01', 100))]) == [1]
+    line_count = line_index.line_count(USER)
+    assert sorted_ledger.insert_lines(USER, [('2023-12-31', line_text('2023-12-31', 200))]) == [line_count + 1]
+    lines = assert_sorted_with_index(path)
+    assert lines[0][2] == line_text('2023-01-01', 100)
+    assert lines[-1][2] == line_text('2023-12-31', 200)
+
+
+def test_unsorted_outside_edit_disables_sorted_mode(small_step, capsys):
+    path = small_step / f"{USER}_HL.txt"
+    external_write(path, "".join(line_text(f"2023-05-{day:02d}", day) + "\n" for day in range(1, 11)))
+    sorted_ledger.migrate(USER)
+    assert_sorted_with_index(path)
+    # 다른 곳에서 고쳐 지문이 달라졌고 날짜순도 아님
+    external_write(path, path.read_text(encoding='utf-8') + line_text('2023-01-01', 99) + "\n")
+    assert sorted_ledger.find_start(USER, date_codec.parse_date('2023-05-05')) is None
+    assert not sorted_ledger.is_enabled(USER)
+    assert not (small_step / f"{USER}_HL.dix").exists()
+    assert "날짜순 저장을 해제합니다" in capsys.readouterr().out
+    # 해제된 뒤에는 끝에 추가
+    line_count = line_index.line_count(USER)
+    assert sorted_ledger.insert_lines(USER, [('2023-01-02', line_text('2023-01-02', 98))]) == [line_count + 1]
+
+
+def test_sorted_outside_edit_rebuilds_index(small_step):
+    path = small_step / f"{USER}_HL.txt"
+    external_write(path, "".join(line_text(f"2023-05-{day:02d}", day) + "\n" for day in range(1, 11)))
+    sorted_ledger.migrate(USER)
+    old = sorted_ledger.get_date_index(USER)['fingerprint']
+    # 날짜순을 지킨 바깥 편집: 색인만 다시 만들고 날짜순 저장은 유지
+    external_write(path, line_text('2023-04-30', 1) + "\n" + path.read_text(encoding='utf-8'))
+    assert sorted_ledger._load(USER, sorted_ledger._fingerprint(path)) is None
+    index = sorted_ledger.get_date_index(USER)
+    assert index is not None and index['fingerprint'] != old
+    assert sorted_ledger.is_enabled(USER)
+    assert_sorted_with_index(path)
@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+import balance_index
+import date_codec
+import ledger_columns
+import ledger_summary
+from conftest import external_write
+
+USER = 'tester'
+
+
+@pytest.fixture(params=[False, True], ids=['python', 'numpy'])
+def use_numpy(request, monkeypatch):
+    """NumPy 경로를 켜거나 끔. 켤 때는 작은 가계부에서도 쓰도록 최소 행 수를 0으로"""
+    if request.param:
+        if ledger_columns.np is None:
+            pytest.skip("NumPy가 설치되어 있지 않음")
+        monkeypatch.setattr(ledger_columns, 'NUMPY_MIN_ROWS', 0)
+    else:
+        monkeypatch.setattr(ledger_columns, 'np', None)
+    return request.param
+
+
+def random_entries(rng, rows):
+    entries = []
+    for _ in range(rows):
+        date = f"{rng.choice((1900, 2023, 2099))}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        entries.append((date, rng.choice('EI'), rng.randint(1, 10 ** 7)))
+    return entries
+
+
+def write_ledger(home, entries):
+    external_write(home / f"{USER}_HL.txt", "".join(
+        f"{date}\t{type}\t{amount}\tC2\t현금\n" for date, type, amount in entries))
+
+
+def test_scan_ledger_matches_brute_force(home, use_numpy):
+    entries = random_entries(random.Random(3), 500)
+    write_ledger(home, entries)
+    expected = {}
+    for date, type, amount in entries:
+        month = expected.setdefault(date[:7], {'expense': 0, 'income': 0, 'count': 0})
+        month['income' if type == 'I' else 'expense'] += amount
+        month['count'] += 1
+    totals, months = ledger_summary.scan_ledger(USER)
+    assert months == expected
+    assert totals == {'income': sum(a for _, t, a in entries if t == 'I'),
+                      'expense': sum(a for _, t, a in entries if t == 'E'), 'count': len(entries)}
+
+
+def test_balance_tree_matches_brute_force(home, use_numpy):
+    rng = random.Random(5)
+    entries = random_entries(rng, 500)
+    write_ledger(home, entries)
+    ords = [(date_codec.parse_date(date), type, amount) for date, type, amount in entries]
+    probes = [date_codec.parse_date("1900-01-01"), date_codec.parse_date("2099-12-31")]
+    probes += [rng.choice(ords)[0] + rng.randint(-3, 3) for _ in range(40)]
+    for _ in range(100):
+        lo, hi = sorted(rng.sample(probes, 2))
+        expense = sum(a for d, t, a in ords if lo <= d <= hi and t == 'E')
+        income = sum(a for d, t, a in ords if lo <= d <= hi and t == 'I')
+        assert balance_index.range_totals(USER, lo, hi) == (expense, income)
+
+
+def test_sum_columns_skips_bad_rows(use_numpy):
+    dates = ['2023-01-31', '2023-02-30', '2023-1-05', '2099-12-31', '1899-12-31']
+    columns = ledger_columns.sum_columns(dates, ['I', 'E', 'E', 'E', 'X'], [1, 2, 3, 4, 5])
+    assert list(columns['date']) == [date_codec.parse_date('2023-01-31'), date_codec.parse_date('2099-12-31')]
+    assert list(columns['type']) == [ledger_columns.TYPE_INCOME, ledger_columns.TYPE_EXPENSE]
+    assert list(columns['amount']) == [1, 4]
+    good = ledger_columns.sum_columns(['2024-02-29', '2023-12-01'], ['E', 'I'], [7, 8])
+    assert list(good['date']) == [date_codec.parse_date('2024-02-29'), date_codec.parse_date('2023-12-01')]
+    assert list(good['type']) == [ledger_columns.TYPE_EXPENSE, ledger_columns.TYPE_INCOME]
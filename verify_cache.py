@@ -0,0 +1,181 @@
+import os
+import hashlib
+from pathlib import Path
+
+# 홈 경로 설정
+HOME_DIR = Path.cwd()
+# 검사 결과 캐시 파일 이름
+VERIFY_CACHE_FILE = "verify_cache.txt"
+# 체크포인트 직전 내용이 그대로인지 비교할 때 해시하는 크기 (bytes)
+TAIL_BLOCK_SIZE = 4096
+# 검사 규칙 버전. 규칙이 바뀌면 올려서 예전 규칙으로 통과한 기록을 버림 (2: 카테고리 구분자 검사)
+RULES_VERSION = 2
+RULES_LINE_PREFIX = "#rules\t"
+
+# 마지막으로 검사를 통과한 파일들의 지문
+# 키: 파일 경로 (str), 값: {'size': int, 'mtime': int, 'digest': str, 'checkpoint': tuple 또는 None}
+# 가계부 파일의 checkpoint: (줄 수, 총 자산, 파일 끝 블록 해시, 삭제 표시된 줄 수). 오프셋은 size와 같음
+# digest가 '-'이면 뒷부분만 검사하여 전체 내용 해시를 모르는 상태
+_cache = None
+_dirty = False
+
+
+def _cache_path():
+    return HOME_DIR / VERIFY_CACHE_FILE
+
+
+def load_cache():
+    """
+    캐시 파일을 읽어 메모리에 올림. 파일이 없거나 형식이 깨져 있으면 빈 캐시로 시작.
+    """
+    global _cache, _dirty
+    _cache = {}
+    _dirty = False
+    rules = None
+    try:
+        with open(_cache_path(), 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith(RULES_LINE_PREFIX):
+                    rules = line[len(RULES_LINE_PREFIX):].strip()
+                    continue
+                parts = line.rstrip('\n').split('\t')
+                if len(parts) not in (4, 7, 8):
+                    continue
+                path, size, mtime, digest = parts[:4]
+                if not size.isdigit() or not mtime.isdigit():
+                    continue
+                checkpoint = None
+                if len(parts) >= 7:
+                    # 삭제 표시된 줄 수가 없는 예전 기록은 0
+                    deleted = int(parts[7]) if len(parts) == 8 else 0
+                    checkpoint = (int(parts[4]), int(parts[5]), parts[6], deleted)
+                _cache[path] = {'size': int(size), 'mtime': int(mtime), 'digest': digest,
+                                'checkpoint': checkpoint}
+        if rules != str(RULES_VERSION):
+            # 예전 규칙으로 검사한 기록: 전부 다시 검사
+            _cache = {}
+            _dirty = True
+    except FileNotFoundError:
+        pass
+    except Exception:
+        # 캐시는 보조 정보이므로 읽지 못하면 전부 다시 검사
+        _cache = {}
+        _dirty = True
+    return _cache
+
+
+def _get_cache():
+    if _cache is None:
+        load_cache()
+    return _cache
+
+
+def save_cache():
+    """
+    변경된 캐시를 임시 파일에 쓴 뒤 교체하여 저장.
+    """
+    global _dirty
+    if not _dirty:
+        return True
+    cache_path = _cache_path()
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(f"{RULES_LINE_PREFIX}{RULES_VERSION}\n")
+            for path, entry in _get_cache().items():
+                line = f"{path}\t{entry['size']}\t{entry['mtime']}\t{entry['digest']}"
+                if entry['checkpoint'] is not None:
+                    lines, total, tail, deleted = entry['checkpoint']
+                    line += f"\t{lines}\t{total}\t{tail}\t{deleted}"
+                f.write(line + "\n")
+        os.replace(tmp_path, cache_path)
+        _dirty = False
+        return True
+    except Exception:
+        # 캐시 저장 실패는 다음 검사가 느려질 뿐이므로 무시
+        return False
+
+
+def get_fingerprint(path):
+    """파일의 (크기, 수정시각) 반환"""
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def new_digest():
+    """나누어 읽는 파일 내용을 이어서 해시할 객체 (update 후 hexdigest가 compute_digest와 같음)"""
+    return hashlib.sha1()
+
+
+def compute_digest(data):
+    """파일 내용(bytes)의 해시 반환"""
+    return hashlib.sha1(data).hexdigest()
+
+
+def compute_tail_digest(data):
+    """내용(bytes)의 마지막 TAIL_BLOCK_SIZE 바이트 해시 반환"""
+    return hashlib.sha1(data[-TAIL_BLOCK_SIZE:]).hexdigest()
+
+
+def read_tail_digest(f, offset):
+    """열린 바이너리 파일에서 offset 직전 TAIL_BLOCK_SIZE 바이트의 해시 반환"""
+    start = max(0, offset - TAIL_BLOCK_SIZE)
+    f.seek(start)
+    return compute_tail_digest(f.read(offset - start))
+
+
+def get_checkpoint(path):
+    """
+    가계부 파일의 마지막 검사 지점 반환: (오프셋, 줄 수, 총 자산, 끝 블록 해시, 삭제 표시된 줄 수).
+    기록이 없으면 None
+    """
+    entry = _get_cache().get(str(path))
+    if entry is None or entry['checkpoint'] is None:
+        return None
+    return (entry['size'],) + entry['checkpoint']
+
+
+def is_unchanged(path, fingerprint):
+    """
+    마지막 검사 이후 파일이 바뀌지 않았으면 True.
+    크기와 수정시각이 같으면 바로 통과, 수정시각만 다르면 내용 해시로 다시 비교.
+    """
+    global _dirty
+    entry = _get_cache().get(str(path))
+    if entry is None:
+        return False
+    size, mtime = fingerprint
+    if entry['size'] != size:
+        return False
+    if entry['mtime'] == mtime:
+        return True
+    # 내용은 그대로인데 수정시각만 바뀐 경우 (touch, 같은 내용으로 다시 저장 등)
+    try:
+        with open(path, 'rb') as f:
+            digest = compute_digest(f.read())
+    except Exception:
+        return False
+    if digest != entry['digest']:
+        return False
+    entry['mtime'] = mtime
+    _dirty = True
+    return True
+
+
+def mark_valid(path, fingerprint, digest, checkpoint=None):
+    """
+    검사를 통과한 파일의 지문 기록.
+    checkpoint: 가계부 파일이 줄바꿈으로 끝날 때 (줄 수, 총 자산, 끝 블록 해시, 삭제 표시된 줄 수)
+    """
+    global _dirty
+    size, mtime = fingerprint
+    _get_cache()[str(path)] = {'size': size, 'mtime': mtime, 'digest': digest,
+                               'checkpoint': checkpoint}
+    _dirty = True
+
+
+def invalidate(path):
+    """파일의 캐시 항목 제거 (다음 검사에서 다시 검사)"""
+    global _dirty
+    if _get_cache().pop(str(path), None) is not None:
+        _dirty = True